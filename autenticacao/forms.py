@@ -1,8 +1,15 @@
 from django import forms
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth import authenticate, get_user_model
+from django.conf import settings
 from django.forms import modelformset_factory, BaseModelFormSet
-from core.models import Turma, AlunoTurma, ProfessorMateriaAnoCursoModalidade, Curso, Estagio
+from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIterator, ModelChoiceIteratorValue
+from django.db import transaction
+from core import orientadores, referencias
+from core.cache_versoes import invalidar_versao
+from core.models import Turma, AlunoTurma, AtribuicaoProfessor, ProfessorMateriaAnoCursoModalidade, Curso, Estagio, Materia
+from core.orientadores import invalidar_diretorio
 import datetime
 import random
 
@@ -29,7 +36,53 @@ class EmailAuthenticationForm(AuthenticationForm):
                 )
         return self.cleaned_data
     
+class IteradorReferencia(ModelChoiceIterator):
+    """Opções vindas de core.referencias: renderizar o select não consulta o banco."""
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.field.opcoes():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.opcoes()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.opcoes())
+
+
+class CampoReferencia(forms.ModelChoiceField):
+    """
+    ModelChoiceField de Curso, Materia ou Turma cujas opções e validação saem
+    do registro em memória (core.referencias). `filtro` (objeto -> bool)
+    restringe as opções válidas, no lugar de trocar o queryset.
+    """
+    iterator = IteradorReferencia
+
+    def __init__(self, model, filtro=None, **kwargs):
+        self.modelo = model.__name__
+        self.filtro = filtro
+        super().__init__(queryset=model.objects.all(), **kwargs)
+
+    def opcoes(self):
+        return [obj for obj in referencias.lista(self.modelo) if self.filtro is None or self.filtro(obj)]
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            obj = referencias.obter(self.modelo, int(getattr(value, 'pk', value)))
+        except (TypeError, ValueError):
+            obj = None
+        if obj is None or (self.filtro is not None and not self.filtro(obj)):
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+        return obj
+
+
 class ProfessorMateriaAnoCursoModalidadeForm(forms.ModelForm):
+    materia = CampoReferencia(Materia, label='Matéria', widget=forms.Select(attrs={'class': 'form-select'}))
+    curso = CampoReferencia(Curso, label='Curso', widget=forms.Select(attrs={'class': 'form-select'}))
+
     class Meta:
         model = ProfessorMateriaAnoCursoModalidade
         fields = ['materia', 'curso', 'ano_modulo', 'modalidade']
@@ -46,23 +99,141 @@ class ProfessorMateriaAnoCursoModalidadeForm(forms.ModelForm):
             'modalidade': forms.Select(attrs={'class': 'form-select'}),
         }
 
+    def _get_validation_exclusions(self):
+        # Matéria e curso já foram conferidos no registro: sem o SELECT de
+        # existência da ForeignKey para cada linha do formset
+        exclusoes = super()._get_validation_exclusions()
+        exclusoes.update({'materia', 'curso'})
+        return exclusoes
+
 class RequiredIdFormSet(BaseModelFormSet):
     def add_fields(self, form, index):
         super().add_fields(form, index)
         if 'id' in form.fields:
             form.fields['id'].required = False
 
+class CampoIdExistente(forms.ModelChoiceField):
+    """'id' de uma linha do formset, procurado entre os objetos que o formset já carregou."""
+    def __init__(self, objetos, **kwargs):
+        self.objetos = objetos
+        super().__init__(**kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.objetos[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+
+
+class VinculosFormSet(RequiredIdFormSet):
+    """
+    Editor dos vínculos de um professor. salvar() compara o conjunto enviado
+    com as linhas que já existem, em memória, e grava tudo numa transação
+    com no máximo um UPDATE em lote, um INSERT em lote e um DELETE.
+    """
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        campo = form.fields.get('id')
+        if campo is not None:
+            # Sem o SELECT por linha que o ModelChoiceField padrão faz para validar o id
+            if not hasattr(self, '_objetos_por_pk'):
+                self._objetos_por_pk = {obj.pk: obj for obj in self.get_queryset()}
+            form.fields['id'] = CampoIdExistente(
+                self._objetos_por_pk, queryset=campo.queryset, initial=campo.initial,
+                required=False, widget=campo.widget,
+            )
+
+    def chaves_enviadas(self):
+        chaves = set()
+        for form in self.forms:
+            if not form.has_changed() and not form.instance.pk:
+                continue
+            if self.can_delete and self._should_delete_form(form):
+                continue
+            dados = form.cleaned_data
+            chaves.add((dados['materia'].pk, dados['curso'].pk, dados['ano_modulo'], dados['modalidade']))
+        return chaves
+
+    def salvar(self, professor, curso_inteiro=None):
+        """
+        Deixa o professor exatamente com os vínculos enviados (mais, se
+        informado, todas as matérias da grade de `curso_inteiro`).
+        Retorna (criados, alterados, removidos).
+        """
+        Vinculo = ProfessorMateriaAnoCursoModalidade
+        desejadas = self.chaves_enviadas()
+        if curso_inteiro is not None:
+            desejadas |= vinculos_da_grade(curso_inteiro)
+
+        with transaction.atomic():
+            existentes = {
+                (v.materia_id, v.curso_id, v.ano_modulo, v.modalidade): v
+                for v in Vinculo.objects.filter(professor=professor)
+            }
+            novas = sorted(desejadas - existentes.keys())
+            livres = [v for chave, v in existentes.items() if chave not in desejadas]
+
+            # Linhas que saíram são reaproveitadas para as chaves novas (mantêm o id)
+            alteradas = []
+            for vinculo, (materia_id, curso_id, ano_modulo, modalidade) in zip(livres, novas):
+                vinculo.materia_id, vinculo.curso_id = materia_id, curso_id
+                vinculo.ano_modulo, vinculo.modalidade = ano_modulo, modalidade
+                alteradas.append(vinculo)
+            Vinculo.objects.bulk_update(alteradas, ['materia', 'curso', 'ano_modulo', 'modalidade'], batch_size=500)
+
+            Vinculo.objects.bulk_create([
+                Vinculo(professor=professor, materia_id=materia_id, curso_id=curso_id,
+                        ano_modulo=ano_modulo, modalidade=modalidade)
+                for materia_id, curso_id, ano_modulo, modalidade in novas[len(alteradas):]
+            ], batch_size=500, ignore_conflicts=True)
+
+            removidas = [v.pk for v in livres[len(alteradas):]]
+            if removidas:
+                Vinculo.objects.filter(pk__in=removidas).delete()
+
+            if novas or removidas:
+                # bulk_create/bulk_update não disparam os sinais
+                AtribuicaoProfessor.reconstruir(professor_ids=[professor.pk])
+                invalidar_versao('ProfessorMateriaAnoCursoModalidade')
+                invalidar_diretorio()
+
+        return len(novas) - len(alteradas), len(alteradas), len(removidas)
+
+
+def vinculos_da_grade(curso):
+    """Chaves de vínculo de todas as matérias que as turmas do curso têm (Materia.turmas)."""
+    return set(
+        Materia.turmas.through.objects.filter(turma__curso=curso)
+        .values_list('materia_id', 'turma__curso_id', 'turma__ano_modulo', 'turma__modalidade')
+        .exclude(turma__modalidade__isnull=True)
+        .distinct()
+    )
+
+
 ProfessorMateriaAnoCursoModalidadeFormSet = modelformset_factory(
     ProfessorMateriaAnoCursoModalidade,
     form=ProfessorMateriaAnoCursoModalidadeForm,
     extra=3,
     can_delete=True,
-    formset=RequiredIdFormSet
+    formset=VinculosFormSet
 )
 
+
+class AtribuirCursoForm(forms.Form):
+    """Atalho do editor de vínculos: todas as matérias da grade de um curso de uma vez."""
+    curso = CampoReferencia(
+        Curso,
+        required=False,
+        label="Atribuir todas as matérias do curso",
+        empty_label="-- Nenhum --",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+
 class AlunoCreateForm(forms.ModelForm):
-    curso = forms.ModelChoiceField(
-        queryset=Curso.objects.all().order_by('nome'),
+    curso = CampoReferencia(
+        Curso,
         label="1. Escolha o Curso",
         widget=forms.Select(attrs={'class': 'form-select'})
     )
@@ -78,8 +249,9 @@ class AlunoCreateForm(forms.ModelForm):
         widget=forms.Select(attrs={'class': 'form-select'}),
         required=True
     )
-    turma = forms.ModelChoiceField(
-        queryset=Turma.objects.none(), 
+    turma = CampoReferencia(
+        Turma,
+        filtro=lambda turma: False,
         label="4. Escolha a Turma",
         widget=forms.Select(attrs={'class': 'form-select'}),
         required=True
@@ -101,35 +273,38 @@ class AlunoCreateForm(forms.ModelForm):
         
         self.fields['turma'].label_from_instance = lambda obj: obj.nome_curto
 
+        # As escolhas em cascata saem de core.referencias (sem consultar o banco)
         if 'curso' in self.data:
             try:
                 curso_id = int(self.data.get('curso'))
-                self.fields['ano_modulo'].choices = [('', '---------')] + list(Turma.objects.filter(curso_id=curso_id).order_by('ano_modulo').values_list('ano_modulo', 'ano_modulo').distinct())
+                self.fields['ano_modulo'].choices = [('', '---------')] + [(ano, ano) for ano in referencias.anos_modulo(curso_id)]
                 
                 if 'ano_modulo' in self.data:
                     ano_modulo_val = self.data.get('ano_modulo')
-                    self.fields['turno'].choices = [('', '---------')] + list(Turma.objects.filter(curso_id=curso_id, ano_modulo=ano_modulo_val).values_list('turno', 'turno').distinct())
+                    self.fields['turno'].choices = [('', '---------')] + referencias.turnos(curso_id=curso_id, ano_modulo=ano_modulo_val)
                     
                     if 'turno' in self.data:
                         turno_val = self.data.get('turno')
-                        self.fields['turma'].queryset = Turma.objects.filter(curso_id=curso_id, ano_modulo=ano_modulo_val, turno=turno_val).order_by('turma')
+                        self.fields['turma'].filtro = (
+                            lambda turma: (turma.curso_id, turma.ano_modulo, turma.turno) == (curso_id, ano_modulo_val, turno_val)
+                        )
             except (ValueError, TypeError):
                 pass 
         if self.instance and self.instance.pk:
             try:
-                turma_atual = self.instance.alunoturma_set.first().turma
+                matricula = self.instance.alunoturma_set.first()
+                turma_atual = referencias.obter('Turma', matricula.turma_id) if matricula else None
                 if turma_atual:
-                    self.fields['curso'].initial = turma_atual.curso
+                    self.fields['curso'].initial = turma_atual.curso_id
                     
-                    anos_queryset = Turma.objects.filter(curso=turma_atual.curso).values_list('ano_modulo', 'ano_modulo').distinct()
-                    self.fields['ano_modulo'].choices = [('', '---------')] + list(anos_queryset)
+                    self.fields['ano_modulo'].choices = [('', '---------')] + [(ano, ano) for ano in referencias.anos_modulo(turma_atual.curso_id)]
                     self.fields['ano_modulo'].initial = turma_atual.ano_modulo
                     
-                    turnos_queryset = Turma.objects.filter(curso=turma_atual.curso, ano_modulo=turma_atual.ano_modulo).values_list('turno', flat=True).distinct()
-                    self.fields['turno'].choices = [('', '---------')] + [(v, d) for v, d in Turma.TURNO_CHOICES if v in turnos_queryset]
+                    self.fields['turno'].choices = [('', '---------')] + referencias.turnos(curso_id=turma_atual.curso_id, ano_modulo=turma_atual.ano_modulo)
                     self.fields['turno'].initial = turma_atual.turno
                     
-                    self.fields['turma'].queryset = Turma.objects.filter(pk=turma_atual.pk)
+                    if 'turno' not in self.data:
+                        self.fields['turma'].filtro = lambda turma: turma.pk == turma_atual.pk
                     self.fields['turma'].initial = turma_atual
             except (AttributeError, Exception):
                 pass
@@ -152,7 +327,9 @@ class AlunoCreateForm(forms.ModelForm):
             aleatorio = ''.join(str(random.randint(0, 9)) for _ in range(8))
             aluno.numero_matricula = f"{ano}{aleatorio}"
             aluno.username = aluno.numero_matricula
-            aluno.set_password("Senha123#")
+            # O hash fica para o worker (core.tarefas.definir_senha_inicial)
+            aluno.set_unusable_password()
+            aluno._senha_inicial_pendente = True
             aluno.senha_temporaria = True
 
         if commit:
@@ -206,7 +383,9 @@ class ProfessorCreateForm(forms.ModelForm):
             aleatorio = ''.join(str(random.randint(0, 9)) for _ in range(8))
             professor.numero_matricula = f"{ano}{aleatorio}"
             professor.username = professor.numero_matricula
-            professor.set_password("Senha123#")
+            # O hash fica para o worker (core.tarefas.definir_senha_inicial)
+            professor.set_unusable_password()
+            professor._senha_inicial_pendente = True
             professor.senha_temporaria = True
 
         if commit:
@@ -266,7 +445,9 @@ class ServidorCreateForm(forms.ModelForm):
             aleatorio = ''.join(str(random.randint(0, 9)) for _ in range(8))
             servidor.numero_matricula = f"{ano}{aleatorio}"
             servidor.username = servidor.numero_matricula
-            servidor.set_password("Senha123#")
+            # O hash fica para o worker (core.tarefas.definir_senha_inicial)
+            servidor.set_unusable_password()
+            servidor._senha_inicial_pendente = True
             servidor.senha_temporaria = True
 
         if commit:
@@ -279,22 +460,31 @@ class ServidorCreateForm(forms.ModelForm):
 # é usado para preencher os dados.
 
 
+class IteradorOrientadores(ModelChoiceIterator):
+    """Opções montadas do diretório em cache (core.orientadores): renderizar não consulta o banco."""
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for professor in orientadores.diretorio():
+            yield (ModelChoiceIteratorValue(professor['id'], None), professor['rotulo'])
+
+    def __len__(self):
+        return len(orientadores.diretorio()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(orientadores.diretorio())
+
+
 class ProfessorOrientadorChoiceField(forms.ModelChoiceField):
     """
     Campo customizado que muda como o nome do professor é exibido.
     Ex: "Alex Barbosa - Informática (Internet)"
     """
+    iterator = IteradorOrientadores
+
     def label_from_instance(self, obj):
-        prof_name = obj.get_full_name()
-        
-        vinculo = obj.professormateriaanocursomodalidade_set.select_related('materia', 'curso').first()
-        
-        if vinculo:
-            details = f"{vinculo.materia.nome} ({vinculo.curso.nome})"
-            return f"{prof_name} - {details}"
-        else:
-            return f"{prof_name} - (Sem vínculos cadastrados)"
-        
+        return orientadores.rotulos().get(obj.pk) or f"{obj.get_full_name()} - (Sem vínculos cadastrados)"
+
 
 class TermoCompromissoForm(forms.Form):
     """
@@ -367,4 +557,21 @@ class TermoCompromissoForm(forms.Form):
                 field.widget.attrs.update(attrs)
             
             elif field_name == 'orientador' and orientador_initial:
-                 self.initial['orientador'] = orientador_initial
\ No newline at end of file
+                 self.initial['orientador'] = orientador_initial
+
+    @property
+    def orientador_com_busca(self):
+        """Muitos professores: o template troca a lista inteira pela busca paginada (api_orientadores)."""
+        return len(orientadores.diretorio()) > getattr(settings, 'ORIENTADORES_LIMITE_SELECT', 200)
+
+    @property
+    def orientador_selecionado(self):
+        """{'id', 'rotulo'} do orientador escolhido (POST ou inicial), ou None."""
+        valor = self['orientador'].value()
+        pk = getattr(valor, 'pk', valor)
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return None
+        rotulo = orientadores.rotulos().get(pk)
+        return {'id': pk, 'rotulo': rotulo} if rotulo else None
\ No newline at end of file
@@ -1,3 +1,69 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.models import AlunoTurma, Curso, CustomUser, Materia, Nota, ProfessorMateriaAnoCursoModalidade, Turma
+
+
+class TurmaDoProfessorTestCase(TestCase):
+    """Um professor com vínculo na matéria/turma, um aluno matriculado e um de fora."""
+
+    @classmethod
+    def setUpTestData(cls):
+        curso = Curso.objects.create(nome='Informática')
+        cls.turma = Turma.objects.create(curso=curso, ano_modulo='1º ANO', turno='matutino', turma='M1')
+        cls.materia = Materia.objects.create(nome='Algoritmos')
+        cls.professor = CustomUser.objects.create(username='prof', tipo='professor')
+        cls.outro_professor = CustomUser.objects.create(username='outro', tipo='professor')
+        cls.aluno = CustomUser.objects.create(username='aluno', tipo='aluno')
+        cls.fora_da_turma = CustomUser.objects.create(username='fora', tipo='aluno')
+        AlunoTurma.objects.create(aluno=cls.aluno, turma=cls.turma)
+        ProfessorMateriaAnoCursoModalidade.objects.create(
+            professor=cls.professor, materia=cls.materia, curso=curso, ano_modulo='1º ANO', modalidade='EPI',
+        )
+
+
+class InserirNotaTests(TurmaDoProfessorTestCase):
+    def _postar(self, professor, aluno):
+        self.client.force_login(professor)
+        return self.client.post(reverse('inserir_nota'), {
+            'aluno_id': aluno.pk, 'materia_id': self.materia.pk, 'turma_id': self.turma.pk, 'nota_1': '7',
+        })
+
+    def test_professor_da_turma_grava(self):
+        resposta = self._postar(self.professor, self.aluno)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(Nota.objects.filter(aluno=self.aluno, materia=self.materia, turma=self.turma).count(), 1)
+
+    def test_professor_que_nao_leciona_recebe_403(self):
+        resposta = self._postar(self.outro_professor, self.aluno)
+        self.assertEqual(resposta.status_code, 403)
+        self.assertFalse(Nota.objects.exists())
+
+    def test_aluno_fora_da_turma_e_recusado(self):
+        resposta = self._postar(self.professor, self.fora_da_turma)
+        self.assertEqual(resposta.status_code, 400)
+        self.assertFalse(Nota.objects.exists())
+
+
+class PlanilhaNotasEtagTests(TurmaDoProfessorTestCase):
+    """ETag de api_planilha_notas: muda quando algo que vai na resposta muda."""
+
+    def _pedir(self, etag=None):
+        self.client.force_login(self.professor)
+        cabecalhos = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(
+            reverse('api_planilha_notas', args=[self.materia.pk, self.turma.pk]), **cabecalhos,
+        )
+
+    def test_etag_valido_responde_304(self):
+        etag = self._pedir()['ETag']
+        self.assertEqual(self._pedir(etag).status_code, 304)
+
+    def test_aluno_renomeado_invalida_o_etag(self):
+        etag = self._pedir()['ETag']
+        self.aluno.first_name = 'Renomeado'
+        self.aluno.save()
+
+        resposta = self._pedir(etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('Renomeado', resposta.json()['colunas']['nome'][0])
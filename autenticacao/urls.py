@@ -18,6 +18,7 @@ urlpatterns = [
     path('professor/dashboard/', views.professor_dashboard_view, name='professor_dashboard'),
     path('aluno/dashboard/', views.aluno_dashboard_view, name='aluno_dashboard'),
     path('servidor/dashboard/', views.servidor_dashboard_view, name='servidor_dashboard'),
+    path('fila-assinaturas/eventos/', views.fila_assinaturas_eventos, name='fila_assinaturas_eventos'),
 
     # ADMIN - Dashboard
     path('admin/professor_crud/professores/', views.gerenciar_professores, name='gerenciar_professores'),
@@ -37,6 +38,7 @@ urlpatterns = [
     path('admin/aluno_crud/alunos/<int:aluno_id>/editar/', views.editar_aluno, name='editar_aluno'),
     path('admin/aluno_crud/alunos/<int:aluno_id>/remover/', views.remover_aluno, name='remover_aluno'),
     path('admin/aluno_crud/alunos/<int:aluno_id>/ver/', views.ver_detalhes_aluno, name='ver_detalhes_aluno'),
+    path('admin/aluno_crud/alunos/<int:aluno_id>/historico/', views.historico_escolar_aluno, name='historico_escolar_aluno'),
     
     # ADMIN - Servidores 
     path('admin/servidores/novo/', views.cadastrar_servidor, name='cadastrar_servidor'),
@@ -53,15 +55,20 @@ urlpatterns = [
     
     # ADMIN - Turmas
     path('admin/turmas_crud/turmas/<int:turma_id>/', views.detalhar_turma, name='detalhar_turma'),
+    path('admin/turmas_crud/relatorio-notas/', views.relatorio_notas_cursos, name='relatorio_notas_cursos'),
+    path('admin/turmas_crud/rematricula/', views.rematricula_turmas, name='rematricula_turmas'),
+    path('admin/tarefas/', views.status_tarefas, name='status_tarefas'),
     
     # PROFESSOR - Dashboard
     path('professor/materia/<int:materia_id>/turma/<int:turma_id>/', views.detalhar_turma_professor, name='detalhar_turma_professor'),
+    path('professor/materia/<int:materia_id>/turma/<int:turma_id>/notas.json', views.api_planilha_notas, name='api_planilha_notas'),
     
     # PROFESSOR - Turmas/Matérias/Notas/Estágio
     path('professor/materia/<int:materia_id>/turma/<int:turma_id>/', views.ver_turma_professor, name='ver_turma_professor'),
     path('professor/vinculo/<int:vinculo_id>/turmas/', views.listar_turmas_vinculadas, name='listar_turmas_vinculadas'),
     path('professor/aluno/<int:aluno_id>/detalhes/', views.ver_detalhes_aluno_professor, name='ver_detalhes_aluno_professor'),
     path('professor/inserir-nota/', views.inserir_nota, name="inserir_nota"),
+    path('professor/politicas-notas.js', views.politicas_notas_js, name="politicas_notas_js"),
     
     # 🎯 PROFESSOR - Rotas de Estágio (Limpas)
     path('professor/estagio/documento/<int:documento_id>/visualizar/', views.professor_visualizar_documento, name='professor_visualizar_documento'),
@@ -78,6 +85,7 @@ urlpatterns = [
     path('aluno/estagio/detalhes/', views.detalhes_estagio_aluno, name='detalhes_estagio_aluno'),
     path('aluno/estagio/documento/<int:documento_id>/visualizar/', views.visualizar_documento_estagio, name='visualizar_documento_estagio'),
     path('aluno/estagio/documento/<int:documento_id>/preencher/', views.preencher_documento_estagio, name='preencher_documento_estagio'),
+    path('estagio/orientadores/', views.api_orientadores, name='api_orientadores'),
     path('aluno/estagio/documento/<int:documento_id>/upload-pdf/', views.upload_pdf_assinado, name='upload_pdf_assinado'),
     path('aluno/estagio/documento/<int:documento_id>/remover_pdf/', views.remover_pdf_assinado, name='remover_pdf_assinado'),
     path('aluno/estagio/documento/<int:documento_id>/assinar/', views.assinar_documento_aluno, name='assinar_documento_aluno'),
@@ -90,4 +98,7 @@ urlpatterns = [
     path('direcao/documento/<int:documento_id>/assinar/', views.direcao_assinar_documento, name='direcao_assinar_documento'),
     path('direcao/documento/<int:documento_id>/visualizar/', views.direcao_visualizar_documento, name='direcao_visualizar_documento'),
     # 🎯 REMOVIDO: direcao_analisar_dossie (obsoleto)
+
+    # Arquivos protegidos (PDFs/anexos do estágio)
+    path('estagio/documento/<int:documento_id>/arquivo/<str:campo>/', views.servir_arquivo_documento, name='servir_arquivo_documento'),
 ]
\ No newline at end of file
@@ -1,28 +1,52 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from collections import defaultdict, OrderedDict
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q, Count # 🎯 ADICIONADO Q e Count
+from django.db import transaction
+from django.db.models import Q, Count, Sum # 🎯 ADICIONADO Q e Count
 from django.utils.timezone import now
+from django.utils.functional import SimpleLazyObject
 from core.decorators import role_required
+from core.media import CAMPOS_ARQUIVO, usuario_pode_acessar_documento, servir_arquivo
+from core.painel_admin import contadores_admin
+from core.permissoes import acesso
+from core.cache_versoes import versoes_modelos
+from core.politicas_notas import gerar_javascript, politica_da_turma
+from core.eventos import assinar
+from core.fila_assinaturas import canal_do_usuario
+from core import fila_tarefas, historico, orientadores, referencias, rematricula
+import asyncio
 import datetime
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
 
 from .forms import (
     EmailAuthenticationForm,
     ProfessorCreateForm,
     ProfessorMateriaAnoCursoModalidadeFormSet,
     ProfessorMateriaAnoCursoModalidadeForm,
+    AtribuirCursoForm,
     AlunoCreateForm,
     ServidorCreateForm,
     ProfessorOrientadorChoiceField,
     TermoCompromissoForm
 )
 
-from core.models import Materia, Turma, CustomUser, ProfessorMateriaAnoCursoModalidade, AlunoTurma, Nota, Estagio, DocumentoEstagio
+from core.models import Materia, Turma, CustomUser, ProfessorMateriaAnoCursoModalidade, AtribuicaoProfessor, AlunoTurma, Nota, Estagio, DocumentoEstagio, EstatisticaNotaTurma, Tarefa
+
+# Linhas por página da planilha de notas (api_planilha_notas)
+PLANILHA_LIMITE_PADRAO = 50
+PLANILHA_LIMITE_MAXIMO = 200
+
+# Resultados por página da busca de orientadores (api_orientadores)
+ORIENTADORES_POR_PAGINA = 20
 
 
 # === AUTENTICAÇÃO ===
@@ -119,14 +143,25 @@ def alterar_senha(request):
 
 # === DASHBOARDS ===
 
+# As views de leitura mais acessadas (dashboards, boletim, monitoramento e
+# get_opcoes_turma) são assíncronas: usam o ORM assíncrono e disparam as
+# consultas independentes juntas com asyncio.gather. Sob ASGI (uvicorn) o
+# worker não fica preso esperando o SQLite. Tudo que o template usa precisa
+# estar carregado antes do render (listas + select_related): consulta
+# preguiçosa dentro do template levanta SynchronousOnlyOperation.
+
+async def _listar(queryset):
+    return [obj async for obj in queryset]
+
 @login_required
 @role_required('admin')
-def admin_dashboard_view(request):
-    return render(request, 'admin/admin_dashboard.html')
+async def admin_dashboard_view(request):
+    contadores = await sync_to_async(contadores_admin)()
+    return render(request, 'admin/admin_dashboard.html', {'contadores': contadores})
 
 @login_required
 @role_required('professor')
-def professor_dashboard_view(request):
+async def professor_dashboard_view(request):
     # 🎯 CORREÇÃO: A lógica do dashboard foi alterada
     # para buscar DOCUMENTOS pendentes, não DOSSIÊS.
     
@@ -134,32 +169,39 @@ def professor_dashboard_view(request):
         professor=request.user
     ).select_related('materia', 'curso')
 
+    # Todas as turmas concretas em que lança notas, numa consulta pelo índice
+    atribuicoes = AtribuicaoProfessor.objects.filter(
+        professor=request.user
+    ).select_related('materia', 'turma__curso').order_by('materia__nome', 'turma__ano_modulo', 'turma__turma')
+
     # Busca por DOCUMENTOS INDIVIDUAIS que aguardam assinatura
     documentos_pendentes = DocumentoEstagio.objects.filter(
         estagio__orientador=request.user,
         status='AGUARDANDO_ASSINATURA_PROF' 
     ).select_related('estagio__aluno')
 
+    vinculos, atribuicoes, documentos_pendentes = await asyncio.gather(
+        _listar(vinculos), _listar(atribuicoes), _listar(documentos_pendentes)
+    )
+
     context = {
         'vinculos': vinculos,
+        'atribuicoes': atribuicoes,
         'documentos_pendentes': documentos_pendentes 
     }
     return render(request, 'professor/professor_dashboard.html', context)
 
 @login_required
 @role_required('aluno')
-def aluno_dashboard_view(request):
-    aluno = request.user
-    notas = Nota.objects.filter(aluno=aluno).select_related('materia', 'turma')
-
+async def aluno_dashboard_view(request):
+    # O template só mostra o menu: nada a consultar além do usuário
     return render(request, 'aluno/aluno_dashboard.html', {
-        'notas': notas,
-        'aluno': aluno
+        'aluno': request.user
     })
     
 @login_required
 @role_required('servidor', 'direcao')
-def servidor_dashboard_view(request):
+async def servidor_dashboard_view(request):
     """
     🎯 CORREÇÃO: Esta view foi refatorada.
     - 'direcao' vê sua fila de documentos para assinar.
@@ -173,27 +215,71 @@ def servidor_dashboard_view(request):
             status='AGUARDANDO_ASSINATURA_DIR' 
         ).select_related('estagio__aluno', 'estagio__orientador')
         
-        context['documentos_pendentes'] = documentos_pendentes
+        context['documentos_pendentes'] = await _listar(documentos_pendentes)
         # (Usando o nome do template que você especificou)
         template_name = 'servidor/direcao/servidor-direcao_dashboard.html'
     
     elif request.user.tipo == 'servidor':
-        # Servidor Admin vê um portal de monitoramento
-        # Contamos alunos no eixo do servidor
-        alunos_no_eixo_count = 0
-        if request.user.eixo:
-            alunos_no_eixo_count = CustomUser.objects.filter(
-                tipo='aluno',
-                alunoturma_set__turma__curso__eixo=request.user.eixo
-            ).distinct().count()
-        
-        context['alunos_no_eixo_count'] = alunos_no_eixo_count
+        # Servidor Admin vê um portal de monitoramento do seu eixo
+        context.update(alunos_no_eixo_count=0, estagios_ativos_count=0,
+                       documentos_pendentes_count=0, documentos_finalizados_count=0, documentos_pendentes=[])
+        eixo = request.user.eixo
+        if eixo:
+            permissoes = acesso(request.user)
+            alunos = permissoes.filtrar_alunos(CustomUser.objects.all())
+            estagios = permissoes.filtrar_estagios(Estagio.objects.all())
+            documentos = permissoes.filtrar_documentos(DocumentoEstagio.objects.all())
+            status_fila = ['AGUARDANDO_ASSINATURA_PROF', 'AGUARDANDO_ASSINATURA_DIR']
+
+            (
+                context['alunos_no_eixo_count'],
+                context['estagios_ativos_count'],
+                context['documentos_pendentes_count'],
+                context['documentos_finalizados_count'],
+                context['documentos_pendentes'],
+            ) = await asyncio.gather(
+                alunos.acount(),
+                estagios.filter(status_geral='EM_ANDAMENTO').acount(),
+                documentos.filter(status__in=status_fila).acount(),
+                documentos.filter(status='CONCLUIDO').acount(),
+                _listar(documentos.filter(status__in=status_fila).select_related('estagio__aluno').order_by('-id')[:20]),
+            )
         # (Usando o nome do template que você especificou)
         template_name = 'servidor/administrativo/servidor-administrativo_dashboard.html'
         
     return render(request, template_name, context)
 
 
+@login_required
+@role_required('professor', 'direcao')
+async def fila_assinaturas_eventos(request):
+    """
+    Server-sent events da fila de assinaturas do usuário (orientador ou
+    direção). Cada evento é um delta ('entrou'/'saiu') publicado pelos sinais
+    do DocumentoEstagio via core.eventos; a conexão não consulta o banco.
+    Precisa de ASGI (uvicorn): sob WSGI cada conexão ocupa uma thread.
+    """
+    assinatura = assinar(canal_do_usuario(request.user))
+
+    async def fluxo():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    evento = await assinatura.proximo(timeout=settings.SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {evento['id']}\nevent: fila\ndata: {json.dumps(evento['dados'])}\n\n"
+        finally:
+            assinatura.cancelar()
+
+    response = StreamingHttpResponse(fluxo(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # === ADMIN - PROFESSORES ===
 # (Esta secção não foi alterada)
 
@@ -222,14 +308,12 @@ def cadastrar_professor(request):
     if request.method == 'POST':
         form = ProfessorCreateForm(request.POST)
         formset = ProfessorMateriaAnoCursoModalidadeFormSet(request.POST, queryset=ProfessorMateriaAnoCursoModalidade.objects.none())
+        atribuir_curso = AtribuirCursoForm(request.POST, prefix='atribuir')
 
-        if form.is_valid() and formset.is_valid():
-            professor = form.save() 
-
-            instances = formset.save(commit=False)
-            for instance in instances:
-                instance.professor = professor
-                instance.save()
+        if form.is_valid() and formset.is_valid() and atribuir_curso.is_valid():
+            with transaction.atomic():
+                professor = form.save()
+                formset.salvar(professor, curso_inteiro=atribuir_curso.cleaned_data['curso'])
             
             messages.success(request, "Professor cadastrado com sucesso.")
             return redirect('gerenciar_professores')
@@ -238,10 +322,12 @@ def cadastrar_professor(request):
     else:
         form = ProfessorCreateForm()
         formset = ProfessorMateriaAnoCursoModalidadeFormSet(queryset=ProfessorMateriaAnoCursoModalidade.objects.none())
+        atribuir_curso = AtribuirCursoForm(prefix='atribuir')
 
     return render(request, 'admin/professor_crud/cadastrar_professor.html', {
         'form': form,
-        'formset': formset
+        'formset': formset,
+        'atribuir_curso': atribuir_curso,
     })
 
 
@@ -255,17 +341,13 @@ def editar_professor(request, professor_id):
         request.POST or None,
         queryset=ProfessorMateriaAnoCursoModalidade.objects.filter(professor=professor)
     )
+    atribuir_curso = AtribuirCursoForm(request.POST or None, prefix='atribuir')
 
-    if request.method == 'POST' and form.is_valid() and formset.is_valid():
-        form.save()
-        
-        instances = formset.save(commit=False)
-        for instance in instances:
-            instance.professor = professor
-            instance.save()
-        
-        for obj in formset.deleted_objects:
-            obj.delete()
+    if request.method == 'POST' and form.is_valid() and formset.is_valid() and atribuir_curso.is_valid():
+        with transaction.atomic():
+            form.save()
+            # Diferença em memória: um INSERT, um UPDATE e um DELETE no máximo
+            formset.salvar(professor, curso_inteiro=atribuir_curso.cleaned_data['curso'])
 
         messages.success(request, "Professor atualizado com sucesso.")
         return redirect('gerenciar_professores')
@@ -273,6 +355,7 @@ def editar_professor(request, professor_id):
     return render(request, 'admin/professor_crud/editar_professor.html', {
         'form': form,
         'formset': formset,
+        'atribuir_curso': atribuir_curso,
         'professor': professor
     })
 
@@ -348,19 +431,11 @@ def editar_aluno(request, aluno_id):
 
         form = AlunoCreateForm(request.POST, instance=aluno)
 
-        turmas_queryset = Turma.objects.all()
-        if curso_id:
-            turmas_queryset = turmas_queryset.filter(curso_id=curso_id)
-        if ano_modulo:
-            turmas_queryset = turmas_queryset.filter(ano_modulo=ano_modulo)
-        if turno:
-            turmas_queryset = turmas_queryset.filter(turno=turno)
+        curso_id = int(curso_id) if curso_id and curso_id.isdigit() else None
+        turmas_validas = {turma.pk for turma in referencias.turmas(curso_id=curso_id, ano_modulo=ano_modulo, turno=turno)}
 
-        form.fields['turma'].queryset = turmas_queryset
-        form.fields['turno'].choices = [
-            (valor, label) for valor, label in Turma.TURNO_CHOICES
-            if valor in turmas_queryset.values_list('turno', flat=True)
-        ]
+        form.fields['turma'].filtro = lambda turma: turma.pk in turmas_validas
+        form.fields['turno'].choices = referencias.turnos(curso_id=curso_id, ano_modulo=ano_modulo, turno=turno)
 
         if form.is_valid():
             form.save()
@@ -374,14 +449,10 @@ def editar_aluno(request, aluno_id):
     else:
         form = AlunoCreateForm(instance=aluno)
 
-        if hasattr(aluno, 'alunoturma_set') and aluno.alunoturma_set.exists():
-            turma_atual = aluno.alunoturma_set.first().turma
-            turmas_queryset = Turma.objects.filter(
-                curso=turma_atual.curso,
-                ano_modulo=turma_atual.ano_modulo,
-                turno=turma_atual.turno
-            )
-            form.fields['turma'].queryset = turmas_queryset
+        turma_atual = form.fields['turma'].initial
+        if turma_atual:
+            chave = (turma_atual.curso_id, turma_atual.ano_modulo, turma_atual.turno)
+            form.fields['turma'].filtro = lambda turma: (turma.curso_id, turma.ano_modulo, turma.turno) == chave
             form.fields['turno'].choices = [
                 (turma_atual.turno, turma_atual.get_turno_display())
             ]
@@ -413,6 +484,14 @@ def ver_detalhes_aluno(request, aluno_id):
     turmas = aluno.alunoturma_set.all()
     return render(request, 'admin/aluno_crud/detalhes_aluno.html', {'aluno': aluno, 'turmas': turmas})
 
+
+@login_required
+@role_required('admin')
+def historico_escolar_aluno(request, aluno_id):
+    aluno = get_object_or_404(CustomUser, id=aluno_id, tipo='aluno')
+    # Períodos fechados vêm dos retratos; o período em andamento entra como provisório
+    return HttpResponse(historico.renderizar_historico(aluno, incluir_periodo_aberto=True))
+
 # === ADMIN - SERVIDORES ===
 # (Esta secção está correta e foi mantida como na última correção)
 
@@ -510,24 +589,26 @@ def ver_detalhes_servidor(request, servidor_id):
 # === VIEWS DE API ===
 # (Esta secção não foi alterada)
 
-def get_opcoes_turma(request):
+async def get_opcoes_turma(request):
     curso_id = request.GET.get('curso_id')
     ano_modulo = request.GET.get('ano_modulo')
     turno = request.GET.get('turno')
     target = request.GET.get('target')
 
-    queryset = Turma.objects.all()
+    try:
+        curso_id = int(curso_id) if curso_id else None
+    except ValueError:
+        return JsonResponse({}, status=400)
 
-    if curso_id: queryset = queryset.filter(curso_id=curso_id)
-    if ano_modulo: queryset = queryset.filter(ano_modulo=ano_modulo)
-    if turno: queryset = queryset.filter(turno=turno)
+    # Do registro em memória (core.referencias): só relê o banco se as turmas mudaram
+    turmas = await sync_to_async(referencias.turmas)(curso_id=curso_id, ano_modulo=ano_modulo, turno=turno)
 
     if target == 'ano_modulo':
-        data = list(queryset.order_by('ano_modulo').values_list('ano_modulo', flat=True).distinct())
+        data = sorted({turma.ano_modulo for turma in turmas})
         return JsonResponse({'options': data})
 
     if target == 'turno':
-        turnos_existentes = list(queryset.values_list('turno', flat=True).distinct())
+        turnos_existentes = {turma.turno for turma in turmas}
         data = []
         for valor, display in Turma.TURNO_CHOICES:
             if valor in turnos_existentes:
@@ -536,7 +617,7 @@ def get_opcoes_turma(request):
 
     if target == 'turma':
         data = []
-        for turma_obj in queryset.order_by('turma'):
+        for turma_obj in sorted(turmas, key=lambda turma: (turma.turma or '', turma.id)):
             data.append({'id': turma_obj.id, 'display': turma_obj.nome_curto})
         return JsonResponse({'options': data})
 
@@ -566,7 +647,105 @@ def listar_turmas(request):
 def detalhar_turma(request, turma_id):
     turma = get_object_or_404(Turma, id=turma_id)
     alunos = CustomUser.objects.filter(alunoturma__turma=turma, tipo='aluno')
-    return render(request, 'admin/turmas_crud/detalhar_turma.html', {'turma': turma, 'alunos': alunos})
+    # Lê o resumo mantido pelo Nota.save(), sem agregar as notas aqui
+    estatisticas = EstatisticaNotaTurma.objects.filter(turma=turma).select_related('materia').order_by('materia__nome')
+    return render(request, 'admin/turmas_crud/detalhar_turma.html', {
+        'turma': turma,
+        'alunos': alunos,
+        'estatisticas': estatisticas,
+    })
+
+
+@login_required
+@role_required('admin')
+def relatorio_notas_cursos(request):
+    """Médias e aprovação por curso/matéria, somando o resumo por turma."""
+    linhas = (
+        EstatisticaNotaTurma.objects
+        .values('turma__curso__nome', 'materia__nome')
+        .annotate(
+            total_notas=Sum('total_notas'),
+            notas_com_media=Sum('notas_com_media'),
+            soma_medias=Sum('soma_medias'),
+            aprovados=Sum('aprovados'),
+            reprovados=Sum('reprovados'),
+            pendentes=Sum('pendentes'),
+        )
+        .order_by('turma__curso__nome', 'materia__nome')
+    )
+
+    cursos = OrderedDict()
+    for linha in linhas:
+        avaliados = linha['aprovados'] + linha['reprovados']
+        linha['media'] = linha['soma_medias'] / linha['notas_com_media'] if linha['notas_com_media'] else None
+        linha['taxa_aprovacao'] = 100 * linha['aprovados'] / avaliados if avaliados else None
+        cursos.setdefault(linha['turma__curso__nome'], []).append(linha)
+
+    return render(request, 'admin/turmas_crud/relatorio_notas.html', {'cursos': cursos})
+
+@login_required
+@role_required('admin')
+def status_tarefas(request):
+    """Situação da fila de tarefas em segundo plano (run_workers); permite reenfileirar as que falharam."""
+    if request.method == 'POST':
+        falhas = Tarefa.objects.filter(status='FALHOU')
+        if request.POST.get('tarefa_id'):
+            falhas = falhas.filter(pk=request.POST['tarefa_id'])
+        total = fila_tarefas.reenfileirar(falhas)
+        messages.success(request, f"{total} tarefa(s) devolvida(s) à fila.")
+        return redirect('status_tarefas')
+
+    contagem = dict(Tarefa.objects.order_by().values_list('status').annotate(total=Count('id')))
+    context = {
+        'contagem': [(rotulo, contagem.get(status, 0)) for status, rotulo in Tarefa.STATUS_CHOICES],
+        'prontas': Tarefa.objects.filter(status='PENDENTE', executar_apos__lte=now()).count(),
+        'em_execucao': Tarefa.objects.filter(status='EXECUTANDO').order_by('iniciada_em'),
+        'pendentes': Tarefa.objects.filter(status='PENDENTE').order_by('-prioridade', 'executar_apos', 'id')[:50],
+        'falhas': Tarefa.objects.filter(status='FALHOU').order_by('-concluida_em')[:50],
+    }
+    return render(request, 'admin/tarefas.html', context)
+
+@login_required
+@role_required('admin')
+def rematricula_turmas(request):
+    """
+    Rematrícula da virada do ano (core.rematricula): cada turma com alunos
+    ganha um destino sugerido, que o admin pode trocar. 'Simular' só mostra o
+    diff; 'Aplicar' move as turmas inteiras numa transação.
+    """
+    mapeamento = rematricula.sugerir_mapeamento()
+    turmas = Turma.objects.select_related('curso').in_bulk()
+    ano_letivo = rematricula.ano_letivo_atual()
+    criar_turmas = False
+
+    if request.method == 'POST':
+        for origem in list(mapeamento):
+            destino_id = request.POST.get(f'destino_{origem.pk}', '')
+            mapeamento[origem] = turmas.get(int(destino_id)) if destino_id.isdigit() else None
+        ano_letivo = request.POST.get('ano_letivo') or ano_letivo
+        criar_turmas = request.POST.get('criar_turmas') == 'on'
+
+        if request.POST.get('acao') == 'aplicar':
+            movidos, criadas = rematricula.aplicar(mapeamento, ano_letivo, criar_turmas)
+            messages.success(request, f"{movidos} aluno(s) rematriculado(s), {criadas} turma(s) criada(s).")
+            return redirect('listar_turmas')
+
+    turmas_por_curso = defaultdict(list)
+    for turma in sorted(turmas.values(), key=lambda t: (t.ano_modulo, t.turno, t.turma or '')):
+        turmas_por_curso[turma.curso_id].append(turma)
+
+    linhas = rematricula.planejar(mapeamento)
+    for linha in linhas:
+        linha['opcoes'] = turmas_por_curso[linha['origem'].curso_id]
+        linha['nova'] = rematricula.turma_seguinte_a_criar(linha['origem']) if linha['destino'] is None else None
+
+    context = {
+        'linhas': linhas,
+        'ano_letivo': ano_letivo,
+        'criar_turmas': criar_turmas,
+        'total': sum(l['alunos'] for l in linhas if l['destino'] is not None or (criar_turmas and l['nova'])),
+    }
+    return render(request, 'admin/turmas_crud/rematricula.html', context)
 
 # === ADMIN - MATÉRIAS ===
 # (Esta secção não foi alterada)
@@ -602,11 +781,7 @@ def detalhar_materia(request, materia_id):
 def listar_turmas_vinculadas(request, vinculo_id):
     vinculo = get_object_or_404(ProfessorMateriaAnoCursoModalidade, id=vinculo_id, professor=request.user)
 
-    turmas = Turma.objects.filter(
-        curso=vinculo.curso,
-        ano_modulo=vinculo.ano_modulo,
-        modalidade=vinculo.modalidade
-    )
+    turmas = Turma.objects.filter(atribuicoes__vinculo=vinculo)
 
     context = {
         'vinculo': vinculo,
@@ -617,28 +792,99 @@ def listar_turmas_vinculadas(request, vinculo_id):
 @login_required
 @role_required('professor')
 def detalhar_turma_professor(request, materia_id, turma_id):
+    """
+    Casca da planilha de notas: as linhas vêm paginadas de api_planilha_notas
+    (static/js/planilha_notas.js) e um único editor de notas é reaproveitado
+    para todos os alunos, então o HTML não cresce com o tamanho da turma.
+    """
     materia = get_object_or_404(Materia, id=materia_id)
-    turma = get_object_or_404(Turma, id=turma_id)
+    turma = get_object_or_404(Turma.objects.select_related('curso'), id=turma_id)
 
-    vinculado = ProfessorMateriaAnoCursoModalidade.objects.filter(
-        professor=request.user,
-        materia=materia,
-        curso=turma.curso,
-        ano_modulo=turma.ano_modulo,
-        modalidade=turma.modalidade
-    ).exists()
-
-    if not vinculado:
+    if not acesso(request.user).leciona(materia, turma):
         messages.error(request, "Você não tem permissão para lecionar esta matéria nesta turma.")
         return redirect('professor_dashboard')
 
-    alunos = CustomUser.objects.filter(tipo='aluno', alunoturma__turma=turma).distinct()
-    notas_dict = {nota.aluno.id: nota for nota in Nota.objects.filter(materia=materia, turma=turma)}
-    
     context = {
-        'materia': materia, 'turma': turma, 'alunos': alunos, 'notas_dict': notas_dict
+        'materia': materia, 'turma': turma, 'politica': politica_da_turma(turma),
     }
     return render(request, 'professor/lescionação/detalhar_turma.html', context)
+
+@login_required
+@role_required('professor')
+def api_planilha_notas(request, materia_id, turma_id):
+    """
+    Página da planilha de notas em JSON colunar, paginada por cursor (id do
+    último aluno entregue): ?cursor=<id>&limite=<n>.
+
+    O ETag sai dos carimbos de versão de Nota, AlunoTurma e CustomUser (nome
+    e e-mail dos alunos vão na resposta) de core.cache_versoes, então um
+    If-None-Match válido responde 304 sem consultar as notas.
+    """
+    materia = get_object_or_404(Materia, id=materia_id)
+    turma = get_object_or_404(Turma.objects.select_related('curso'), id=turma_id)
+
+    if not acesso(request.user).leciona(materia, turma):
+        return JsonResponse({"error": "Sem permissão para esta turma."}, status=403)
+
+    try:
+        cursor = int(request.GET.get('cursor') or 0)
+        limite = min(max(int(request.GET.get('limite') or PLANILHA_LIMITE_PADRAO), 1), PLANILHA_LIMITE_MAXIMO)
+    except ValueError:
+        return JsonResponse({"error": "Parâmetros inválidos."}, status=400)
+
+    politica = politica_da_turma(turma)
+    versoes = versoes_modelos('Nota', 'AlunoTurma', 'CustomUser')
+    etag = '"{}"'.format(hashlib.sha256(
+        f"{turma.id}:{materia.id}:{cursor}:{limite}:{politica.codigo}:"
+        f"{versoes['Nota']}:{versoes['AlunoTurma']}:{versoes['CustomUser']}".encode()
+    ).hexdigest()[:20])
+
+    if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponseNotModified()
+    else:
+        alunos = list(
+            CustomUser.objects.filter(tipo='aluno', alunoturma__turma=turma, id__gt=cursor)
+            .order_by('id').distinct()
+            .values_list('id', 'first_name', 'last_name', 'email')[:limite + 1]
+        )
+        proximo_cursor = alunos[limite - 1][0] if len(alunos) > limite else None
+        alunos = alunos[:limite]
+
+        notas = {
+            nota['aluno_id']: nota
+            for nota in Nota.objects.filter(materia=materia, turma=turma, aluno_id__in=[a[0] for a in alunos])
+            .order_by('id').values('aluno_id', *Nota.COLUNAS_COMPONENTES, 'componentes', 'media_final', 'status_final')
+        }
+
+        colunas = {
+            'id': [a[0] for a in alunos],
+            'nome': [f"{a[1]} {a[2]}".strip() for a in alunos],
+            'email': [a[3] for a in alunos],
+            'media_final': [],
+            'status_final': [],
+        }
+        colunas.update({nome: [] for nome in politica.componentes})
+        for aluno_id, *_ in alunos:
+            nota = notas.get(aluno_id)
+            valores = {}
+            if nota:
+                valores = {campo: nota[campo] for campo in Nota.COLUNAS_COMPONENTES}
+                valores.update(nota['componentes'] or {})
+            for nome in politica.componentes:
+                colunas[nome].append(valores.get(nome))
+            colunas['media_final'].append(nota['media_final'] if nota else None)
+            colunas['status_final'].append((nota['status_final'] if nota else '') or "Pendente")
+
+        response = JsonResponse({
+            'politica': politica.codigo,
+            'componentes': politica.componentes,
+            'colunas': colunas,
+            'proximo_cursor': proximo_cursor,
+        })
+
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
     
 @login_required
 @role_required('professor')
@@ -646,23 +892,22 @@ def ver_turma_professor(request, materia_id, turma_id):
     materia = get_object_or_404(Materia, id=materia_id)
     turma = get_object_or_404(Turma, id=turma_id)
 
-    if not ProfessorMateriaAnoCursoModalidade.objects.filter(professor=request.user, materia=materia, turma=turma).exists():
+    if not acesso(request.user).leciona(materia, turma):
         messages.error(request, "Você não tem acesso a essa turma.")
         return redirect('professor_dashboard')
 
-    alunos = CustomUser.objects.filter(tipo='aluno', alunoturma__turma=turma).distinct()
-    notas_dict = {nota.aluno_id: nota for nota in Nota.objects.filter(materia=materia, turma=turma)}
-
     return render(request, 'professor/lescionação/detalhar_turma.html', {
         'materia': materia,
         'turma': turma,
-        'alunos': alunos,
-        'notas_dict': notas_dict
+        'politica': politica_da_turma(turma),
     })
 
 @login_required
 @role_required('professor')
 def ver_detalhes_aluno_professor(request, aluno_id):
+    if not acesso(request.user).pode_ver_aluno(aluno_id):
+        messages.error(request, "Você não tem acesso a este aluno.")
+        return redirect('professor_dashboard')
     aluno = get_object_or_404(CustomUser, id=aluno_id, tipo='aluno')
     turmas = Turma.objects.filter(alunoturma__aluno=aluno)
     return render(request, 'professor/detalhes_aluno.html', {'aluno': aluno, 'turmas': turmas})
@@ -682,10 +927,9 @@ def professor_assinar_documento(request, documento_id):
     do professor.
     """
     documento = get_object_or_404(DocumentoEstagio, id=documento_id)
-    estagio = documento.estagio
 
     # Segurança: Garante que é o orientador
-    if estagio.orientador != request.user:
+    if not acesso(request.user).pode_ver_documento(documento):
         messages.error(request, "Você não tem permissão para assinar este documento.")
         return redirect('professor_dashboard')
     
@@ -726,10 +970,10 @@ def professor_visualizar_documento(request, documento_id):
     Página GENÉRICA para o Professor VISUALIZAR e ASSINAR um documento.
     (Esta função foi mantida, mas precisa de lógica de template)
     """
-    documento = get_object_or_404(DocumentoEstagio, id=documento_id)
+    documento = get_object_or_404(DocumentoEstagio.objects.select_related('estagio'), id=documento_id)
     estagio = documento.estagio
 
-    if estagio.orientador != request.user:
+    if not acesso(request.user).pode_ver_documento(documento):
         messages.error(request, "Você não tem permissão para visualizar este documento.")
         return redirect('professor_dashboard')
 
@@ -782,24 +1026,28 @@ def inserir_nota(request):
     materia = get_object_or_404(Materia, id=materia_id)
     turma = get_object_or_404(Turma, id=turma_id)
 
-    nota_obj, _ = Nota.objects.get_or_create(aluno=aluno, materia=materia, turma=turma)
+    if not acesso(request.user).leciona(materia, turma):
+        return JsonResponse({"error": "Sem permissão para esta turma."}, status=403)
+    if not AlunoTurma.objects.filter(aluno=aluno, turma=turma).exists():
+        return JsonResponse({"error": "O aluno não está matriculado nesta turma."}, status=400)
+
+    politica = politica_da_turma(turma)
 
     def parse_optional_float(val):
         try:
             if val == '' or val is None:
                 return None
             f = float(val.replace(',', '.')) 
-            return min(f, 100) 
+            return min(f, politica.maximo) 
         except (ValueError, TypeError):
             return None
 
-    nota_obj.nota_1 = parse_optional_float(request.POST.get("nota_1"))
-    nota_obj.nota_2 = parse_optional_float(request.POST.get("nota_2"))
-    nota_obj.nota_3 = parse_optional_float(request.POST.get("nota_3"))
-    nota_obj.nota_recuperacao = parse_optional_float(request.POST.get("nota_recuperacao"))
-
+    # Os campos do formulário são os componentes da política da modalidade da turma.
+    # Um só upsert: sem get_or_create, dois envios simultâneos não duplicam a nota.
     try:
-        nota_obj.save() 
+        nota_obj = Nota.objects.gravar(aluno.pk, materia.pk, turma, {
+            nome: parse_optional_float(request.POST.get(nome)) for nome in politica.componentes
+        })
     except Exception as e:
         return JsonResponse({"error": f"Erro ao salvar a nota: {str(e)}"}, status=500)
 
@@ -808,6 +1056,7 @@ def inserir_nota(request):
         "Aprovado": "bg-success text-white",
         "Reprovado na Final": "bg-danger text-white",
         "Reprovado": "bg-danger-subtle text-dark",
+        "Requer Final": "bg-warning text-dark",
         "Pendente": "bg-secondary text-white", 
     }
     badge_class = badge_map.get(status, "bg-secondary text-white")
@@ -819,21 +1068,44 @@ def inserir_nota(request):
     })
 
 
+@login_required
+def politicas_notas_js(request):
+    """
+    Avaliador JavaScript gerado a partir de core/politicas_notas.py, para o
+    formulário de notas calcular a situação com a mesma fórmula do servidor.
+    """
+    codigo, versao = gerar_javascript()
+    etag = f'"{versao}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(codigo, content_type='text/javascript; charset=utf-8')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 # ==========================================================
 # === ALUNO - BOLETIM - ESTÁGIO 
 # ==========================================================
 
 @login_required
 @role_required('aluno')
-def ver_boletim_aluno(request):
+async def ver_boletim_aluno(request):
     aluno = request.user
     turmas_ids = AlunoTurma.objects.filter(aluno=aluno).values_list('turma_id', flat=True)
     materias = Materia.objects.filter(turmas__id__in=turmas_ids).distinct()
 
+    # Matérias e notas em paralelo; a primeira nota (menor id) de cada matéria, como antes
+    materias, notas = await asyncio.gather(
+        _listar(materias),
+        _listar(Nota.objects.filter(aluno=aluno, materia__turmas__id__in=turmas_ids).distinct().order_by('-id')),
+    )
+    nota_por_materia = {nota.materia_id: nota for nota in notas}
+
     boletim = []
     for materia in materias:
-        nota = Nota.objects.filter(aluno=aluno, materia=materia).first()
-        boletim.append({'materia': materia, 'nota': nota})
+        boletim.append({'materia': materia, 'nota': nota_por_materia.get(materia.id)})
 
     return render(request, 'aluno/boletim/boletim.html', {'boletim': boletim, 'aluno': aluno})
 
@@ -877,7 +1149,6 @@ def gestao_estagio_aluno(request):
 @role_required('aluno')
 def detalhes_estagio_aluno(request):
     estagio = get_object_or_404(Estagio, aluno=request.user)
-    documentos_qs = DocumentoEstagio.objects.filter(estagio=estagio)
     
     ordem_desejada = [
         'TERMO_COMPROMISSO', 'FICHA_IDENTIFICACAO', 'FICHA_PESSOAL',
@@ -885,12 +1156,14 @@ def detalhes_estagio_aluno(request):
         'COMP_RESIDENCIA', 'COMP_AGUA_LUZ', 'ID_CARD', 
         'SUS_CARD', 'VACINA_CARD', 'APOLICE_SEGURO',
     ]
-    docs_encontrados = {doc.tipo_documento: doc for doc in documentos_qs}
-    
-    documentos_ordenados = []
-    for tipo in ordem_desejada:
-        if tipo in docs_encontrados:
-            documentos_ordenados.append(docs_encontrados[tipo])
+
+    def ordenar_documentos():
+        docs_encontrados = {doc.tipo_documento: doc for doc in DocumentoEstagio.objects.filter(estagio=estagio)}
+        return [docs_encontrados[tipo] for tipo in ordem_desejada if tipo in docs_encontrados]
+
+    # Lista preguiçosa: só consulta o banco se o fragmento
+    # 'estagio_documentos' não estiver em cache.
+    documentos_ordenados = SimpleLazyObject(ordenar_documentos)
 
     # 🎯 CORREÇÃO: Lógica de 'all_docs_concluidos' removida
     # pois o envio não é mais por dossiê.
@@ -964,7 +1237,9 @@ def remover_pdf_assinado(request, documento_id):
 
     if request.method == 'POST':
         if documento.pdf_supervisor_assinado:
-            documento.pdf_supervisor_assinado.delete(save=True) 
+            # O arquivo é apagado pelo worker (sinal substituir_pdf_antigo)
+            documento.pdf_supervisor_assinado = None
+            documento.save()
             messages.success(request, "O PDF anexado foi removido com sucesso.")
         else:
             messages.warning(request, "Nenhum PDF estava anexado a este documento.")
@@ -1023,6 +1298,19 @@ def assinar_documento_aluno(request, documento_id):
 # 🎯 REMOVIDO: submeter_dossie_orientador (obsoleto)
 
 
+@login_required
+def api_orientadores(request):
+    """
+    Busca paginada de orientadores (?q=&pagina=) para o Termo de Compromisso
+    quando a lista de professores é grande demais para um select.
+    """
+    try:
+        pagina = max(int(request.GET.get('pagina') or 1), 1)
+    except ValueError:
+        return JsonResponse({"error": "Parâmetros inválidos."}, status=400)
+    return JsonResponse(orientadores.buscar(request.GET.get('q', ''), pagina, ORIENTADORES_POR_PAGINA))
+
+
 @login_required
 @role_required('aluno')
 def preencher_documento_estagio(request, documento_id):
@@ -1195,7 +1483,7 @@ def direcao_visualizar_documento(request, documento_id):
 
 @login_required
 @role_required('servidor')
-def servidor_monitorar_alunos(request):
+async def servidor_monitorar_alunos(request):
     """
     🎯 NOVA FUNÇÃO: Página para o Servidor Admin listar todos os alunos
     do seu eixo e ver um resumo do status.
@@ -1206,21 +1494,17 @@ def servidor_monitorar_alunos(request):
         return redirect('servidor_dashboard')
 
     # 1. Busca todos os alunos do eixo
-    alunos_no_eixo = CustomUser.objects.filter(
-        tipo='aluno',
-        alunoturma_set__turma__curso__eixo=eixo_servidor
-    ).distinct().order_by('first_name', 'last_name')
-
-    # 2. Busca os dados de estágio (se existirem) para esses alunos
-    estagios_map = {
-        estagio.aluno_id: estagio
-        for estagio in Estagio.objects.filter(
-            aluno__in=alunos_no_eixo
-        ).annotate(
-            # Conta quantos documentos NÃO estão 'CONCLUIDO' ou 'RASCUNHO'
-            docs_pendentes_count=Count('documentos', filter=~Q(documentos__status__in=['CONCLUIDO', 'RASCUNHO']))
-        )
-    }
+    alunos_no_eixo = acesso(request.user).filtrar_alunos(CustomUser.objects.all()).order_by('first_name', 'last_name')
+
+    # 2. Busca os dados de estágio (se existirem) para esses alunos, junto com a lista
+    estagios = Estagio.objects.filter(
+        aluno__in=alunos_no_eixo
+    ).annotate(
+        # Conta quantos documentos NÃO estão 'CONCLUIDO' ou 'RASCUNHO'
+        docs_pendentes_count=Count('documentos', filter=~Q(documentos__status__in=['CONCLUIDO', 'RASCUNHO']))
+    )
+    alunos_no_eixo, estagios = await asyncio.gather(_listar(alunos_no_eixo), _listar(estagios))
+    estagios_map = {estagio.aluno_id: estagio for estagio in estagios}
 
     # 3. Combina os dados para o template
     alunos_data = []
@@ -1248,7 +1532,6 @@ def servidor_ver_documentos_aluno(request, aluno_id):
     🎯 NOVA FUNÇÃO: Página (Checklist) para o Servidor Admin ver TODOS
     os documentos de um aluno específico.
     """
-    eixo_servidor = request.user.eixo
     aluno = get_object_or_404(CustomUser, id=aluno_id, tipo='aluno')
 
     # 1. Busca o estágio (dossiê) do aluno
@@ -1260,11 +1543,7 @@ def servidor_ver_documentos_aluno(request, aluno_id):
 
     # 2. 🚨 Verificação de Segurança
     # Garante que o servidor só veja alunos do seu próprio eixo.
-    aluno_pertence_ao_eixo = aluno.alunoturma_set.filter(
-        turma__curso__eixo=eixo_servidor
-    ).exists()
-    
-    if not aluno_pertence_ao_eixo:
+    if not acesso(request.user).pode_ver_aluno(aluno):
         messages.error(request, "Você não tem permissão para ver este aluno.")
         return redirect('servidor_monitorar_alunos')
 
@@ -1287,4 +1566,32 @@ def servidor_ver_documentos_aluno(request, aluno_id):
         'estagio': estagio,
         'documentos': documentos_ordenados
     }
-    return render(request, 'servidor/administrativo/ver_documentos_aluno.html', context)
\ No newline at end of file
+    return render(request, 'servidor/administrativo/ver_documentos_aluno.html', context)
+
+
+# ==========================================================
+# === ARQUIVOS PROTEGIDOS (MEDIA DO ESTÁGIO)
+# ==========================================================
+
+@login_required
+def servir_arquivo_documento(request, documento_id, campo):
+    """
+    Entrega o PDF/anexo de um documento apenas para quem participa
+    do estágio (aluno, orientador, servidor do eixo ou direção).
+    """
+    if campo not in CAMPOS_ARQUIVO:
+        raise Http404("Arquivo não encontrado.")
+
+    documento = get_object_or_404(
+        DocumentoEstagio.objects.select_related('estagio__aluno'), id=documento_id
+    )
+
+    if not usuario_pode_acessar_documento(request.user, documento):
+        messages.error(request, "Você não tem permissão para acessar este arquivo.")
+        return redirect('inicio')
+
+    arquivo = getattr(documento, campo)
+    if not arquivo or not arquivo.storage.exists(arquivo.name):
+        raise Http404("Arquivo não encontrado.")
+
+    return servir_arquivo(request, arquivo)
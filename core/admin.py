@@ -3,7 +3,8 @@ from django.contrib.auth.admin import UserAdmin
 from .models import (
     CustomUser, Curso, Turma, Materia, 
     ProfessorMateriaAnoCursoModalidade, AlunoTurma, 
-    Nota, Estagio, DocumentoEstagio
+    Nota, Estagio, DocumentoEstagio, EstatisticaNotaTurma, Tarefa,
+    Notificacao, PeriodoArquivado, NotaArquivada, AlunoTurmaArquivada, HistoricoPeriodo, AtribuicaoProfessor
 )
 
 # --- Configurações para melhorar a exibição no Admin ---
@@ -54,6 +55,28 @@ class AlunoTurmaAdmin(admin.ModelAdmin):
     search_fields = ('aluno__first_name', 'turma__curso__nome')
     autocomplete_fields = ['aluno', 'turma'] # Facilita a busca
 
+class TarefaAdmin(admin.ModelAdmin):
+    list_display = ('id', 'funcao', 'status', 'prioridade', 'tentativas', 'executar_apos', 'concluida_em')
+    list_filter = ('status', 'funcao')
+
+class HistoricoPeriodoAdmin(admin.ModelAdmin):
+    """
+    Retratos congelados do histórico escolar: só consulta. Quem grava é
+    core.historico.congelar_periodo.
+    """
+    list_display = ('aluno', 'turma_nome', 'ano_letivo', 'ch_total', 'ch_aprovada', 'congelado_em')
+    list_filter = ('ano_letivo', 'curso')
+    search_fields = ('aluno__first_name', 'aluno__last_name', 'turma_nome')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 # --- REGISTRO DOS MODELOS ---
 # (Isto é o que faz eles aparecerem na tela)
 
@@ -62,7 +85,15 @@ admin.site.register(Curso)
 admin.site.register(Turma, TurmaAdmin)
 admin.site.register(Materia)
 admin.site.register(ProfessorMateriaAnoCursoModalidade)
+admin.site.register(AtribuicaoProfessor)
 admin.site.register(AlunoTurma, AlunoTurmaAdmin)
 admin.site.register(Nota)
+admin.site.register(EstatisticaNotaTurma)
 admin.site.register(Estagio, EstagioAdmin) # <-- O mais importante para você agora
-admin.site.register(DocumentoEstagio)
\ No newline at end of file
+admin.site.register(DocumentoEstagio)
+admin.site.register(Tarefa, TarefaAdmin)
+admin.site.register(Notificacao)
+admin.site.register(PeriodoArquivado)
+admin.site.register(NotaArquivada)
+admin.site.register(AlunoTurmaArquivada)
+admin.site.register(HistoricoPeriodo, HistoricoPeriodoAdmin)
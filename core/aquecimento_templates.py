@@ -0,0 +1,55 @@
+"""
+Pré-compilação dos templates na subida do worker.
+
+Com o loader em cache, cada template é lido e compilado só uma vez por
+processo, mas essa vez cai no primeiro usuário que abre a página. O
+`precompilar_templates()` é chamado pelo wsgi.py/asgi.py quando
+settings.TEMPLATES_PRECOMPILAR está ligado e deixa tudo pronto antes do
+worker aceitar requisições.
+"""
+import logging
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+
+logger = logging.getLogger(__name__)
+
+
+def listar_templates(engine):
+    """Nomes (relativos) de todos os .html das pastas DIRS do engine."""
+    nomes = []
+    for pasta in engine.dirs:
+        for raiz, _, arquivos in os.walk(pasta):
+            for arquivo in arquivos:
+                if arquivo.endswith('.html'):
+                    caminho = os.path.join(raiz, arquivo)
+                    nomes.append(os.path.relpath(caminho, pasta).replace(os.sep, '/'))
+    return sorted(nomes)
+
+
+def precompilar_templates(engine=None):
+    """
+    Compila todos os templates de templates/ no loader em cache do engine.
+    Retorna [(nome, segundos)] e registra no log o tempo de cada um.
+    """
+    engine = engine or engines['django'].engine
+    tempos = []
+    inicio_total = time.perf_counter()
+
+    for nome in listar_templates(engine):
+        inicio = time.perf_counter()
+        try:
+            engine.get_template(nome)
+        except TemplateSyntaxError as e:
+            logger.warning("Template %s não compilou: %s", nome, e)
+            continue
+        segundos = time.perf_counter() - inicio
+        tempos.append((nome, segundos))
+        logger.debug("Template %s compilado em %.2f ms", nome, segundos * 1000)
+
+    logger.info(
+        "%d templates pré-compilados em %.1f ms",
+        len(tempos), (time.perf_counter() - inicio_total) * 1000,
+    )
+    return tempos
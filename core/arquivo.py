@@ -0,0 +1,203 @@
+"""
+Arquivo histórico por período letivo.
+
+Nota e AlunoTurma guardam só os períodos abertos. Ao fechar um período,
+arquivar_periodo() move as notas e matrículas dele para NotaArquivada e
+AlunoTurmaArquivada (INSERT ... SELECT + DELETE, numa transação), e as
+consultas do dia a dia (boletim, planilha do professor, relatórios) deixam
+de passar pelos anos antigos. O histórico continua acessível pelas funções
+de consulta abaixo; restaurar_periodo() desfaz o arquivamento.
+
+    python manage.py arquivar_periodo 2024.2 --dry-run
+"""
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+
+from core.cache_versoes import invalidar_versao
+from core.historico import congelar_periodo
+from core.models import (
+    AlunoTurma, AlunoTurmaArquivada, EstatisticaNotaTurma, HistoricoPeriodo, Nota, NotaArquivada, PeriodoArquivado,
+    ano_letivo_atual,
+)
+from core.painel_admin import invalidar_contadores_admin
+
+COLUNAS_NOTA = (
+    'aluno_id', 'materia_id', 'turma_id', 'ano_letivo',
+    'nota_1', 'nota_2', 'nota_3', 'nota_recuperacao', 'componentes', 'media_final', 'status_final',
+)
+COLUNAS_MATRICULA = ('aluno_id', 'turma_id', 'data_matricula', 'ano_letivo')
+
+
+def mover_linhas(cursor, origem, destino, colunas, filtro, parametros, id_origem='id', id_destino='id_original',
+                 extras=None):
+    """
+    Copia as linhas de `origem` para `destino` (mais as colunas constantes de
+    `extras` no destino) e as apaga de `origem`. Retorna quantas.
+    """
+    origem_sql = connection.ops.quote_name(origem._meta.db_table)
+    destino_sql = connection.ops.quote_name(destino._meta.db_table)
+    extras = extras or {}
+    lista = ', '.join(colunas)
+    lista_destino = ', '.join([id_destino, *colunas, *extras])
+    valores = ', '.join([id_origem, *colunas, *(['%s'] * len(extras))])
+    cursor.execute(
+        f"INSERT INTO {destino_sql} ({lista_destino}) SELECT {valores} FROM {origem_sql} WHERE {filtro}",
+        list(extras.values()) + list(parametros),
+    )
+    cursor.execute(f"DELETE FROM {origem_sql} WHERE {filtro}", parametros)
+    return cursor.rowcount
+
+
+def contar_periodo(ano_letivo):
+    """(notas, matrículas) vivas do período: o que arquivar_periodo moveria."""
+    return (
+        Nota.objects.filter(ano_letivo=ano_letivo).count(),
+        AlunoTurma.objects.filter(ano_letivo=ano_letivo).count(),
+    )
+
+
+def arquivar_periodo(ano_letivo, incluir_matriculas=True):
+    """
+    Congela o histórico do período (core.historico) e move as notas (e, por
+    padrão, as matrículas) para o arquivo. O período atual não pode ser
+    arquivado. Retorna (notas, matrículas).
+    """
+    if ano_letivo == ano_letivo_atual():
+        raise ValueError(f"{ano_letivo} é o período letivo atual e não pode ser arquivado.")
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        turma_ids = set(Nota.objects.filter(ano_letivo=ano_letivo).values_list('turma_id', flat=True).distinct())
+        # Retrato do período para o histórico escolar, antes de as notas saírem da tabela viva
+        congelar_periodo(ano_letivo)
+        notas = mover_linhas(cursor, Nota, NotaArquivada, COLUNAS_NOTA, 'ano_letivo = %s', [ano_letivo])
+        matriculas = 0
+        if incluir_matriculas:
+            matriculas = mover_linhas(cursor, AlunoTurma, AlunoTurmaArquivada, COLUNAS_MATRICULA,
+                                      'ano_letivo = %s', [ano_letivo], extras={'motivo': 'PERIODO'})
+
+        # O resumo por turma/matéria passa a refletir só as notas vivas
+        EstatisticaNotaTurma.reconstruir(turma_ids=turma_ids)
+
+        periodo, _ = PeriodoArquivado.objects.get_or_create(ano_letivo=ano_letivo)
+        periodo.notas += notas
+        periodo.matriculas += matriculas
+        periodo.save()
+
+    # SQL direto não dispara os sinais
+    invalidar_versao('Nota')
+    invalidar_versao('AlunoTurma')
+    invalidar_contadores_admin()
+    return notas, matriculas
+
+
+def conflitos_restauracao(ano_letivo):
+    """
+    Ids das linhas arquivadas do período cuja chave já existe de novo nas
+    tabelas vivas (ex.: nota lançada outra vez depois do arquivamento), que
+    quebrariam a chave única de Nota (aluno, matéria, turma) ou de AlunoTurma
+    (aluno, turma) na restauração. Retorna ([ids de NotaArquivada],
+    [ids de AlunoTurmaArquivada]).
+    """
+    notas = NotaArquivada.objects.filter(
+        Exists(Nota.objects.filter(
+            aluno_id=OuterRef('aluno_id'), materia_id=OuterRef('materia_id'), turma_id=OuterRef('turma_id'),
+        )),
+        ano_letivo=ano_letivo,
+    )
+    matriculas = AlunoTurmaArquivada.objects.filter(
+        Exists(AlunoTurma.objects.filter(aluno_id=OuterRef('aluno_id'), turma_id=OuterRef('turma_id'))),
+        ano_letivo=ano_letivo, motivo='PERIODO',
+    )
+    return list(notas.values_list('id', flat=True)), list(matriculas.values_list('id', flat=True))
+
+
+def _exceto(filtro, parametros, ids):
+    if not ids:
+        return filtro, parametros
+    return f"{filtro} AND id NOT IN ({', '.join(['%s'] * len(ids))})", [*parametros, *ids]
+
+
+def restaurar_periodo(ano_letivo, pular_conflitos=False):
+    """
+    Devolve o período arquivado às tabelas vivas, com os ids originais.
+
+    Se alguma nota ou matrícula do período já existe viva de novo
+    (conflitos_restauracao), nada é restaurado e sobe ValueError; com
+    pular_conflitos=True o resto volta e as conflitantes ficam no arquivo
+    (o período continua listado, com o que sobrou). Os retratos do histórico
+    (HistoricoPeriodo) das turmas restauradas são apagados.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        notas_em_conflito, matriculas_em_conflito = conflitos_restauracao(ano_letivo)
+        if (notas_em_conflito or matriculas_em_conflito) and not pular_conflitos:
+            raise ValueError(
+                f"{len(notas_em_conflito)} nota(s) e {len(matriculas_em_conflito)} matrícula(s) de {ano_letivo} "
+                f"já existem de novo nas tabelas vivas. Nada foi restaurado; para restaurar o resto e deixar "
+                f"essas no arquivo, use pular_conflitos (--pular-conflitos)."
+            )
+
+        turma_ids = set(
+            NotaArquivada.objects.filter(ano_letivo=ano_letivo).values_list('turma_id', flat=True).distinct()
+        )
+        # O retrato congelado de quem volta deixa de valer: a nota pode ser
+        # corrigida e o próximo arquivamento grava outro
+        restauradas = NotaArquivada.objects.filter(ano_letivo=ano_letivo).exclude(id__in=notas_em_conflito)
+        HistoricoPeriodo.objects.filter(
+            Exists(restauradas.filter(aluno_id=OuterRef('aluno_id'), turma_id=OuterRef('turma_id'))),
+            ano_letivo=ano_letivo,
+        ).delete()
+        notas = mover_linhas(cursor, NotaArquivada, Nota, COLUNAS_NOTA,
+                             *_exceto('ano_letivo = %s', [ano_letivo], notas_em_conflito),
+                             id_origem='id_original', id_destino='id')
+        # Só as matrículas arquivadas com o período (as deixadas na rematrícula ficam no arquivo)
+        matriculas = mover_linhas(cursor, AlunoTurmaArquivada, AlunoTurma, COLUNAS_MATRICULA,
+                                  *_exceto("ano_letivo = %s AND motivo = 'PERIODO'", [ano_letivo],
+                                           matriculas_em_conflito),
+                                  id_origem='id_original', id_destino='id')
+        EstatisticaNotaTurma.reconstruir(turma_ids=turma_ids)
+        if notas_em_conflito or matriculas_em_conflito:
+            PeriodoArquivado.objects.filter(ano_letivo=ano_letivo).update(
+                notas=len(notas_em_conflito), matriculas=len(matriculas_em_conflito),
+            )
+        else:
+            PeriodoArquivado.objects.filter(ano_letivo=ano_letivo).delete()
+
+    invalidar_versao('Nota')
+    invalidar_versao('AlunoTurma')
+    invalidar_contadores_admin()
+    return notas, matriculas
+
+
+# === Consulta ao arquivo ===
+
+def periodos_arquivados():
+    return list(PeriodoArquivado.objects.values_list('ano_letivo', flat=True))
+
+
+def notas_arquivadas(aluno=None, ano_letivo=None):
+    """Notas de períodos fechados (queryset de NotaArquivada)."""
+    queryset = NotaArquivada.objects.select_related('materia', 'turma__curso')
+    if aluno is not None:
+        queryset = queryset.filter(aluno=aluno)
+    if ano_letivo is not None:
+        queryset = queryset.filter(ano_letivo=ano_letivo)
+    return queryset.order_by('ano_letivo', 'materia__nome')
+
+
+def matriculas_arquivadas(aluno):
+    return AlunoTurmaArquivada.objects.filter(aluno=aluno).select_related('turma__curso').order_by('ano_letivo')
+
+
+def historico_notas(aluno):
+    """
+    Todas as notas do aluno, dos períodos arquivados e dos abertos, em ordem
+    de período: [(ano_letivo, [notas])]. Nota e NotaArquivada têm os mesmos
+    campos de leitura (materia, turma, media_final, status_final...).
+    """
+    por_periodo = {}
+    for nota in notas_arquivadas(aluno=aluno):
+        por_periodo.setdefault(nota.ano_letivo, []).append(nota)
+    vivas = Nota.objects.filter(aluno=aluno).select_related('materia', 'turma__curso').order_by('ano_letivo', 'materia__nome')
+    for nota in vivas:
+        por_periodo.setdefault(nota.ano_letivo, []).append(nota)
+    return sorted(por_periodo.items())
@@ -0,0 +1,43 @@
+"""
+Carimbos de versão por modelo para invalidar caches de template, os
+conjuntos de acesso de core.permissoes e o registro de core.referencias.
+
+Cada modelo versionado tem uma chave no cache com um carimbo (time_ns). Os
+fragmentos em cache incluem esse carimbo na chave: quando o modelo é salvo
+ou apagado o carimbo muda e os fragmentos antigos simplesmente deixam de ser
+lidos (expiram pelo TTL). Se o cache perder a chave, um carimbo novo é criado,
+o que nunca reaproveita um fragmento velho.
+"""
+import time
+
+from django.core.cache import cache
+
+MODELOS_VERSIONADOS = (
+    'Nota', 'DocumentoEstagio', 'Estagio', 'AlunoTurma', 'Turma', 'Curso', 'Materia',
+    'ProfessorMateriaAnoCursoModalidade', 'CustomUser',
+)
+
+PREFIXO_CHAVE = 'versao_modelo'
+
+
+def _chave(nome_modelo):
+    return f"{PREFIXO_CHAVE}:{nome_modelo}"
+
+
+def invalidar_versao(nome_modelo):
+    cache.set(_chave(nome_modelo), time.time_ns(), None)
+
+
+def versoes_modelos(*nomes_modelos):
+    """Retorna {nome_modelo: carimbo} com uma única leitura do cache."""
+    chaves = {_chave(nome): nome for nome in nomes_modelos}
+    encontrados = cache.get_many(chaves.keys())
+
+    versoes = {}
+    for chave, nome in chaves.items():
+        if chave not in encontrados:
+            carimbo = time.time_ns()
+            cache.add(chave, carimbo, None)
+            encontrados[chave] = cache.get(chave, carimbo)
+        versoes[nome] = encontrados[chave]
+    return versoes
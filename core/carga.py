@@ -0,0 +1,57 @@
+"""
+Peças comuns dos testes de carga HTTP (comandos carga_http e carga_perfis):
+subir o projeto em ASGI ou WSGI, esperar o servidor responder e resumir as
+latências.
+"""
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+SERVIDORES = {
+    'asgi': [sys.executable, '-m', 'uvicorn', 'sgde.asgi:application', '--port', '{porta}', '--log-level', 'warning'],
+    'wsgi': [sys.executable, 'manage.py', 'runserver', '{porta}', '--noreload'],
+}
+
+
+def subir_servidor(nome, porta):
+    """Sobe o projeto (SERVIDORES[nome]) na porta, sem saída no terminal. Retorna o processo."""
+    return subprocess.Popen(
+        [parte.format(porta=porta) for parte in SERVIDORES[nome]],
+        cwd=settings.BASE_DIR, env=os.environ.copy(),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def parar_servidor(processo):
+    processo.terminate()
+    processo.wait(timeout=10)
+
+
+def aguardar_servidor(url, caminho='/', limite=20):
+    """Espera `caminho` responder (qualquer status); CommandError depois de `limite` segundos."""
+    partes = urlsplit(url)
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        try:
+            conexao = http.client.HTTPConnection(partes.hostname, partes.port, timeout=1)
+            conexao.request('GET', caminho)
+            conexao.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"Servidor em {url} não respondeu em {limite}s.")
+
+
+def percentis(tempos):
+    """(p50, p95) das latências; com menos de 20 amostras o p95 é a maior."""
+    if not tempos:
+        return 0, 0
+    p95 = statistics.quantiles(tempos, n=20)[-1] if len(tempos) >= 20 else max(tempos)
+    return statistics.median(tempos), p95
@@ -1,7 +1,24 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
 from django.contrib.auth.decorators import user_passes_test
 
 def role_required(*allowed_roles):
-    return user_passes_test(
+    checagem = user_passes_test(
         lambda u: u.is_authenticated and u.tipo in allowed_roles,
         login_url='login',
-    )
\ No newline at end of file
+    )
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            # Views assíncronas: o user_passes_test carrega o usuário com
+            # request.auser(), mas o request.user preguiçoso (usado pelos
+            # templates) ainda consultaria o banco de forma síncrona.
+            @wraps(view_func)
+            async def _com_usuario(request, *args, **kwargs):
+                request.user = await request.auser()
+                return await view_func(request, *args, **kwargs)
+            return checagem(_com_usuario)
+        return checagem(view_func)
+
+    return decorator
@@ -0,0 +1,165 @@
+"""
+Pub/sub de eventos para as telas ao vivo (SSE).
+
+Quem publica é código síncrono (sinais do ORM, views); quem assina são as
+views assíncronas de SSE, cada uma com sua asyncio.Queue. Dois modos,
+escolhidos por settings.EVENTOS_BACKEND:
+
+- 'memoria' (padrão): o evento só chega aos assinantes do mesmo processo.
+  Suficiente para um único worker (runserver, uvicorn com 1 worker).
+- 'broker': cada processo mantém uma conexão TCP com o broker local
+  (python manage.py broker_eventos), que repassa cada evento a todos os
+  processos conectados. Para gunicorn/uvicorn com vários workers, sem
+  Redis nem outro serviço externo.
+
+Nenhum dos modos consulta o banco: o evento já leva os dados para a tela.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import socket
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_FILA_ASSINANTE = 100
+
+
+class Assinatura:
+    """Fila de um assinante (uma conexão SSE) num canal."""
+
+    def __init__(self, barramento, canal, loop):
+        self.barramento = barramento
+        self.canal = canal
+        self.loop = loop
+        self.fila = asyncio.Queue(maxsize=TAMANHO_FILA_ASSINANTE)
+
+    def entregar(self, evento):
+        # Chamado de qualquer thread: a fila só pode ser mexida pelo loop dela
+        self.loop.call_soon_threadsafe(self._colocar, evento)
+
+    def _colocar(self, evento):
+        try:
+            self.fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente lento: descarta o mais antigo; a tela se corrige no próximo reload
+            self.fila.get_nowait()
+            self.fila.put_nowait(evento)
+
+    async def proximo(self, timeout=None):
+        return await asyncio.wait_for(self.fila.get(), timeout)
+
+    def cancelar(self):
+        self.barramento.remover(self)
+
+
+class BarramentoMemoria:
+    def __init__(self):
+        self._assinaturas = {}
+        self._trava = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def assinar(self, canal):
+        assinatura = Assinatura(self, canal, asyncio.get_running_loop())
+        with self._trava:
+            self._assinaturas.setdefault(canal, set()).add(assinatura)
+        return assinatura
+
+    def remover(self, assinatura):
+        with self._trava:
+            assinantes = self._assinaturas.get(assinatura.canal)
+            if assinantes:
+                assinantes.discard(assinatura)
+                if not assinantes:
+                    del self._assinaturas[assinatura.canal]
+
+    def publicar(self, canal, dados):
+        self.entregar_local(canal, {'id': f"{time.time_ns()}-{next(self._ids)}", 'dados': dados})
+
+    def entregar_local(self, canal, evento):
+        with self._trava:
+            assinantes = list(self._assinaturas.get(canal, ()))
+        for assinatura in assinantes:
+            try:
+                assinatura.entregar(evento)
+            except RuntimeError:
+                # Loop já fechado (conexão encerrada no desligamento)
+                self.remover(assinatura)
+
+
+class BarramentoBroker(BarramentoMemoria):
+    """
+    Uma conexão por processo com o broker local: publica por ela e uma thread
+    lê o que o broker repassa (inclusive o que este processo publicou) e
+    entrega aos assinantes daqui.
+    """
+
+    def __init__(self, endereco):
+        super().__init__()
+        self.endereco = tuple(endereco)
+        self._socket = None
+        self._conectado = threading.Event()
+        self._trava_envio = threading.Lock()
+        threading.Thread(target=self._receber, name='eventos-broker', daemon=True).start()
+
+    def publicar(self, canal, dados):
+        linha = json.dumps({
+            'canal': canal, 'evento': {'id': f"{time.time_ns()}-{next(self._ids)}", 'dados': dados},
+        }).encode() + b'\n'
+        # Roda no on_commit das requisições: sem broker, perde o evento na hora
+        # em vez de segurar a resposta esperando a reconexão
+        if self._conectado.is_set():
+            try:
+                with self._trava_envio:
+                    self._socket.sendall(linha)
+                return
+            except (OSError, AttributeError):
+                pass
+        logger.warning("Broker de eventos indisponível em %s:%s; evento de %s perdido", *self.endereco, canal)
+
+    def _receber(self):
+        while True:
+            try:
+                with socket.create_connection(self.endereco, timeout=5) as conexao:
+                    conexao.settimeout(None)
+                    self._socket = conexao
+                    self._conectado.set()
+                    with conexao.makefile('rb') as leitura:
+                        for linha in leitura:
+                            mensagem = json.loads(linha)
+                            self.entregar_local(mensagem['canal'], mensagem['evento'])
+            except (OSError, ValueError):
+                pass
+            finally:
+                self._conectado.clear()
+                self._socket = None
+            time.sleep(1)
+
+
+_barramento = None
+_trava_criacao = threading.Lock()
+
+
+def barramento():
+    global _barramento
+    if _barramento is None:
+        with _trava_criacao:
+            if _barramento is None:
+                if getattr(settings, 'EVENTOS_BACKEND', 'memoria') == 'broker':
+                    _barramento = BarramentoBroker(settings.EVENTOS_BROKER_ENDERECO)
+                else:
+                    _barramento = BarramentoMemoria()
+    return _barramento
+
+
+def publicar(canal, dados):
+    barramento().publicar(canal, dados)
+
+
+def assinar(canal):
+    """Só dentro de código assíncrono (usa o loop em execução)."""
+    return barramento().assinar(canal)
@@ -0,0 +1,70 @@
+"""
+Eventos da fila de assinaturas (orientador e direção) para os dashboards.
+
+Quando um DocumentoEstagio entra ou sai de um status de fila, publicamos um
+delta no canal de quem assina (core.eventos). A view SSE
+fila_assinaturas_eventos repassa o delta ao navegador, que insere/remove o
+item da lista sem recarregar a página nem consultar o banco de novo.
+"""
+from core.eventos import publicar
+
+STATUS_FILA_PROFESSOR = 'AGUARDANDO_ASSINATURA_PROF'
+STATUS_FILA_DIRECAO = 'AGUARDANDO_ASSINATURA_DIR'
+
+CANAL_DIRECAO = 'fila:direcao'
+
+
+def canal_professor(professor_id):
+    return f"fila:professor:{professor_id}"
+
+
+def canal_do_usuario(user):
+    if user.tipo == 'professor':
+        return canal_professor(user.id)
+    if user.tipo == 'direcao':
+        return CANAL_DIRECAO
+    return None
+
+
+def _canal_da_fila(status, documento):
+    if status == STATUS_FILA_PROFESSOR and documento.estagio.orientador_id:
+        return canal_professor(documento.estagio.orientador_id)
+    if status == STATUS_FILA_DIRECAO:
+        return CANAL_DIRECAO
+    return None
+
+
+def _dados_documento(documento):
+    estagio = documento.estagio
+    return {
+        'id': documento.id,
+        'aluno': estagio.aluno.get_full_name(),
+        'tipo': documento.get_tipo_documento_display(),
+        'empresa': estagio.supervisor_empresa,
+        'orientador': estagio.orientador.get_full_name() if estagio.orientador_id else '',
+    }
+
+
+def deltas_da_mudanca(documento, status_anterior, status_atual):
+    """
+    Lista de (canal, delta): 'saiu' na fila do status anterior e 'entrou' na
+    do novo. Montada na hora do sinal, enquanto o estágio ainda existe (numa
+    exclusão em cascata ele some antes do commit).
+    """
+    if status_anterior == status_atual:
+        return []
+
+    deltas = []
+    canal_saida = _canal_da_fila(status_anterior, documento)
+    if canal_saida:
+        deltas.append((canal_saida, {'acao': 'saiu', 'documento': {'id': documento.id}}))
+
+    canal_entrada = _canal_da_fila(status_atual, documento)
+    if canal_entrada:
+        deltas.append((canal_entrada, {'acao': 'entrou', 'documento': _dados_documento(documento)}))
+    return deltas
+
+
+def publicar_deltas(deltas):
+    for canal, delta in deltas:
+        publicar(canal, delta)
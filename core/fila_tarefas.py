@@ -0,0 +1,152 @@
+"""
+Fila de tarefas em segundo plano, guardada no próprio banco (model Tarefa).
+
+As views chamam enfileirar() e respondem na hora; 'python manage.py
+run_workers' reserva as tarefas pendentes (maior prioridade primeiro) e as
+executa num pool de threads ou processos, com novas tentativas em caso de
+erro. Funciona só com SQLite, sem broker externo:
+
+    from core.fila_tarefas import tarefa
+
+    @tarefa(prioridade=5)
+    def gerar_pdf(documento_id):
+        ...
+
+    gerar_pdf.enfileirar(documento.id)
+
+A tarefa é gravada na transação de quem enfileira: se ela for desfeita, a
+tarefa some junto. Os argumentos precisam ser serializáveis em JSON.
+Com settings.TAREFAS_IMEDIATAS a tarefa roda logo após o commit, no próprio
+processo (útil no desenvolvimento, sem worker rodando).
+"""
+import functools
+import logging
+import os
+import traceback
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def tarefa(funcao=None, *, prioridade=0, max_tentativas=3):
+    """Marca a função como tarefa e lhe dá o método .enfileirar(*args, **kwargs)."""
+    def decorar(funcao):
+        funcao.tarefa = {'prioridade': prioridade, 'max_tentativas': max_tentativas}
+        funcao.enfileirar = functools.partial(enfileirar, funcao)
+        return funcao
+
+    return decorar(funcao) if funcao else decorar
+
+
+def enfileirar(funcao, *args, prioridade=None, atraso=None, **kwargs):
+    from core.models import Tarefa
+
+    if not hasattr(funcao, 'tarefa'):
+        raise ValueError(f"{funcao.__qualname__} não está marcada com @tarefa.")
+
+    item = Tarefa.objects.create(
+        funcao=f"{funcao.__module__}.{funcao.__qualname__}",
+        argumentos={'args': list(args), 'kwargs': kwargs},
+        prioridade=funcao.tarefa['prioridade'] if prioridade is None else prioridade,
+        max_tentativas=funcao.tarefa['max_tentativas'],
+        executar_apos=timezone.now() + (atraso or timedelta()),
+    )
+    if getattr(settings, 'TAREFAS_IMEDIATAS', False):
+        transaction.on_commit(lambda: executar(item.pk, 'imediata'))
+    return item
+
+
+def reservar(worker, quantidade=1):
+    """
+    Marca como EXECUTANDO até `quantidade` tarefas prontas e devolve os ids.
+    A troca de status é condicional (UPDATE ... WHERE status='PENDENTE'):
+    se outro worker pegou a mesma tarefa antes, ela é simplesmente pulada.
+    """
+    from core.models import Tarefa
+
+    candidatas = list(
+        Tarefa.objects.filter(status='PENDENTE', executar_apos__lte=timezone.now())
+        .order_by('-prioridade', 'executar_apos', 'id')
+        .values_list('id', flat=True)[:quantidade]
+    )
+    reservadas = []
+    for pk in candidatas:
+        pegou = Tarefa.objects.filter(pk=pk, status='PENDENTE').update(
+            status='EXECUTANDO', worker=worker, iniciada_em=timezone.now(), tentativas=F('tentativas') + 1,
+        )
+        if pegou:
+            reservadas.append(pk)
+    return reservadas
+
+
+def executar(pk, worker):
+    """Executa uma tarefa já reservada e grava o resultado (ou agenda outra tentativa)."""
+    from core.models import Tarefa
+
+    item = Tarefa.objects.get(pk=pk)
+    if item.status == 'PENDENTE':
+        # Modo TAREFAS_IMEDIATAS: não passou por reservar()
+        if not Tarefa.objects.filter(pk=pk, status='PENDENTE').update(
+            status='EXECUTANDO', worker=worker, iniciada_em=timezone.now(), tentativas=F('tentativas') + 1,
+        ):
+            return
+        item.refresh_from_db()
+
+    try:
+        funcao = import_string(item.funcao)
+        if not hasattr(funcao, 'tarefa'):
+            raise ValueError(f"{item.funcao} não está marcada com @tarefa.")
+        funcao(*item.argumentos.get('args', ()), **item.argumentos.get('kwargs', {}))
+    except Exception:
+        erro = traceback.format_exc()
+        if item.tentativas < item.max_tentativas:
+            espera = getattr(settings, 'TAREFAS_ESPERA_BASE', 30) * 2 ** (item.tentativas - 1)
+            logger.warning("Tarefa %s (%s) falhou; nova tentativa em %ss", pk, item.funcao, espera)
+            Tarefa.objects.filter(pk=pk).update(
+                status='PENDENTE', ultimo_erro=erro, executar_apos=timezone.now() + timedelta(seconds=espera),
+            )
+        else:
+            logger.error("Tarefa %s (%s) falhou após %s tentativas", pk, item.funcao, item.tentativas)
+            Tarefa.objects.filter(pk=pk).update(status='FALHOU', ultimo_erro=erro, concluida_em=timezone.now())
+        return False
+
+    Tarefa.objects.filter(pk=pk).update(status='CONCLUIDA', concluida_em=timezone.now())
+    return True
+
+
+def recuperar_abandonadas():
+    """
+    Devolve à fila as tarefas que ficaram EXECUTANDO além de
+    settings.TAREFAS_TEMPO_LIMITE (worker morto no meio da execução).
+    """
+    from core.models import Tarefa
+
+    limite = timezone.now() - timedelta(seconds=getattr(settings, 'TAREFAS_TEMPO_LIMITE', 600))
+    return Tarefa.objects.filter(status='EXECUTANDO', iniciada_em__lt=limite).update(status='PENDENTE')
+
+
+def reenfileirar(queryset):
+    """Volta tarefas (normalmente as que FALHOU) para a fila, zerando as tentativas."""
+    return queryset.update(status='PENDENTE', tentativas=0, executar_apos=timezone.now(), concluida_em=None)
+
+
+def iniciar_processo_django():
+    """Initializer de pools de processos: com 'spawn' (macOS/Windows) o filho começa sem o Django carregado."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sgde.settings')
+    django.setup()
+
+
+def limpar_concluidas(dias=None):
+    from core.models import Tarefa
+
+    dias = getattr(settings, 'TAREFAS_GUARDAR_CONCLUIDAS_DIAS', 7) if dias is None else dias
+    return Tarefa.objects.filter(
+        status='CONCLUIDA', concluida_em__lt=timezone.now() - timedelta(days=dias),
+    ).delete()[0]
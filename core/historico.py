@@ -0,0 +1,144 @@
+"""
+Histórico escolar a partir de retratos congelados por período.
+
+Quando um período fecha (core.arquivo.arquivar_periodo), congelar_periodo()
+grava um HistoricoPeriodo por aluno e turma com as matérias, a carga horária
+(Materia.ch), a média e a situação daquele momento. O histórico escolar é
+montado só com esses retratos (uma consulta), sem juntar Nota, Materia,
+Turma e AlunoTurma ano a ano.
+
+Para uma turma inteira de formandos, gerar_em_lote() renderiza os
+históricos num pool de processos; cada aluno também pode ir para a fila de
+tarefas (gerar_historico.enfileirar).
+"""
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Exists, OuterRef, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core.fila_tarefas import iniciar_processo_django, tarefa
+from core.models import (
+    AlunoTurma, AlunoTurmaArquivada, CustomUser, HistoricoPeriodo, Nota, NotaArquivada,
+)
+
+STATUS_APROVADO = ('Aprovado',)
+
+
+def _retratos(notas):
+    """HistoricoPeriodo (não salvos) a partir de notas (Nota ou NotaArquivada) com select_related."""
+    grupos = defaultdict(list)
+    for nota in notas:
+        grupos[(nota.aluno_id, nota.ano_letivo, nota.turma_id)].append(nota)
+
+    retratos = []
+    for (aluno_id, ano_letivo, turma_id), itens in grupos.items():
+        turma = itens[0].turma
+        disciplinas = [
+            {'materia': n.materia.nome, 'ch': n.materia.ch, 'media': n.media_final, 'status': n.status_final}
+            for n in sorted(itens, key=lambda n: n.materia.nome)
+        ]
+        retratos.append(HistoricoPeriodo(
+            aluno_id=aluno_id,
+            turma_id=turma_id,
+            ano_letivo=ano_letivo,
+            curso=turma.curso.nome,
+            turma_nome=str(turma),
+            ano_modulo=turma.ano_modulo,
+            disciplinas=disciplinas,
+            ch_total=sum(d['ch'] for d in disciplinas),
+            ch_aprovada=sum(d['ch'] for d in disciplinas if d['status'] in STATUS_APROVADO),
+        ))
+    return retratos
+
+
+def congelar_periodo(ano_letivo):
+    """
+    Grava os retratos do período a partir das notas vivas e das arquivadas
+    (a viva vale quando a mesma nota está nos dois lugares). Retratos já
+    existentes não mudam; restaurar_periodo apaga os das turmas que voltam,
+    para que o próximo arquivamento os grave de novo. Retorna quantos foram
+    criados.
+    """
+    vivas = Nota.objects.filter(ano_letivo=ano_letivo).select_related('materia', 'turma__curso')
+    arquivadas = NotaArquivada.objects.filter(ano_letivo=ano_letivo).exclude(Exists(Nota.objects.filter(
+        aluno_id=OuterRef('aluno_id'), materia_id=OuterRef('materia_id'), turma_id=OuterRef('turma_id'),
+    ))).select_related('materia', 'turma__curso')
+    retratos = _retratos([*vivas, *arquivadas])
+    antes = HistoricoPeriodo.objects.filter(ano_letivo=ano_letivo).count()
+    HistoricoPeriodo.objects.bulk_create(retratos, batch_size=500, ignore_conflicts=True)
+    return HistoricoPeriodo.objects.filter(ano_letivo=ano_letivo).count() - antes
+
+
+def montar_historico(aluno, incluir_periodo_aberto=False):
+    """
+    Dados do histórico escolar do aluno: os retratos em ordem de período e os
+    totais de carga horária. Com incluir_periodo_aberto, os períodos ainda
+    abertos entram como retratos provisórios (não gravados).
+    """
+    periodos = list(HistoricoPeriodo.objects.filter(aluno=aluno))
+    if incluir_periodo_aberto:
+        congelados = {(p.ano_letivo, p.turma_id) for p in periodos}
+        notas = Nota.objects.filter(aluno=aluno).select_related('materia', 'turma__curso')
+        periodos += [p for p in _retratos(notas) if (p.ano_letivo, p.turma_id) not in congelados]
+        periodos.sort(key=lambda p: (p.ano_letivo, p.ano_modulo))
+
+    return {
+        'aluno': aluno,
+        'periodos': periodos,
+        'ch_total': sum(p.ch_total for p in periodos),
+        'ch_aprovada': sum(p.ch_aprovada for p in periodos),
+        'gerado_em': timezone.now(),
+    }
+
+
+def renderizar_historico(aluno, incluir_periodo_aberto=False):
+    return render_to_string('historico/historico_escolar.html', montar_historico(aluno, incluir_periodo_aberto))
+
+
+def pasta_historicos():
+    return os.path.join(settings.MEDIA_ROOT, 'historicos')
+
+
+def gravar_historico(aluno_id, pasta=None):
+    """Grava o histórico do aluno em HTML (pronto para imprimir/salvar em PDF) e retorna o caminho."""
+    aluno = CustomUser.objects.get(pk=aluno_id)
+    pasta = pasta or pasta_historicos()
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, f"historico_{aluno.numero_matricula or aluno.pk}.html")
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(renderizar_historico(aluno))
+    return caminho
+
+
+@tarefa
+def gerar_historico(aluno_id):
+    gravar_historico(aluno_id)
+
+
+def alunos_da_turma(turma):
+    """Quem está ou já esteve matriculado na turma (a matrícula pode ter ido para o arquivo)."""
+    return list(CustomUser.objects.filter(
+        Q(pk__in=AlunoTurma.objects.filter(turma=turma).values('aluno_id'))
+        | Q(pk__in=AlunoTurmaArquivada.objects.filter(turma=turma).values('aluno_id'))
+    ).order_by('first_name', 'last_name').values_list('pk', flat=True))
+
+
+def gerar_em_lote(aluno_ids, pasta=None, workers=None):
+    """Gera os históricos em paralelo (um processo por núcleo, por padrão). Retorna os caminhos."""
+    aluno_ids = list(aluno_ids)
+    if not aluno_ids:
+        return []
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [gravar_historico(pk, pasta) for pk in aluno_ids]
+
+    # Conexões abertas não podem ser herdadas pelos processos filhos
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=iniciar_processo_django) as pool:
+        lote = max(1, len(aluno_ids) // (workers * 4))
+        return list(pool.map(gravar_historico, aluno_ids, [pasta] * len(aluno_ids), chunksize=lote))
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import arquivo
+
+
+class Command(BaseCommand):
+    help = (
+        "Move as notas e matrículas de um período letivo fechado (ex.: 2024.2) para as tabelas de "
+        "arquivo, tirando-as das consultas do dia a dia. --restaurar desfaz."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('ano_letivo', nargs='?', help="Período no formato ano.semestre (ex.: 2024.2).")
+        parser.add_argument('--sem-matriculas', action='store_true',
+                            help="Arquiva só as notas; as matrículas do período continuam vivas.")
+        parser.add_argument('--restaurar', action='store_true', help="Devolve o período às tabelas vivas.")
+        parser.add_argument('--pular-conflitos', action='store_true',
+                            help="Com --restaurar: deixa no arquivo as notas/matrículas que já existem de novo "
+                                 "nas tabelas vivas e restaura o resto.")
+        parser.add_argument('--dry-run', action='store_true', help="Só mostra quantas linhas seriam movidas.")
+        parser.add_argument('--listar', action='store_true', help="Lista os períodos já arquivados.")
+
+    def handle(self, *args, **options):
+        if options['listar']:
+            for periodo in arquivo.periodos_arquivados():
+                self.stdout.write(periodo)
+            return
+
+        ano_letivo = options['ano_letivo']
+        if not ano_letivo:
+            raise CommandError("Informe o período (ex.: 2024.2) ou use --listar.")
+
+        if options['dry_run']:
+            notas, matriculas = arquivo.contar_periodo(ano_letivo)
+            if options['sem_matriculas']:
+                matriculas = 0
+            self.stdout.write(self.style.WARNING(
+                f"Dry-run: {notas} nota(s) e {matriculas} matrícula(s) de {ano_letivo} seriam arquivadas."
+            ))
+            return
+
+        inicio = time.perf_counter()
+        try:
+            if options['restaurar']:
+                notas, matriculas = arquivo.restaurar_periodo(ano_letivo, options['pular_conflitos'])
+                acao = "restaurada(s)"
+                notas_em_conflito, matriculas_em_conflito = arquivo.conflitos_restauracao(ano_letivo)
+                if notas_em_conflito or matriculas_em_conflito:
+                    self.stdout.write(self.style.WARNING(
+                        f"{len(notas_em_conflito)} nota(s) e {len(matriculas_em_conflito)} matrícula(s) ficaram "
+                        f"no arquivo: já existem de novo nas tabelas vivas."
+                    ))
+            else:
+                notas, matriculas = arquivo.arquivar_periodo(ano_letivo, not options['sem_matriculas'])
+                acao = "arquivada(s)"
+        except ValueError as erro:
+            raise CommandError(str(erro))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {ano_letivo}: {notas} nota(s) e {matriculas} matrícula(s) {acao} em {time.perf_counter() - inicio:.2f}s"
+        ))
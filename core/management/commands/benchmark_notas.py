@@ -0,0 +1,107 @@
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import motor_notas
+from core.models import CustomUser, Curso, Materia, Nota, Turma
+from core.politicas_notas import politica_da_turma
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara o recálculo linha a linha (Nota.save) com o motor NumPy em dados sintéticos. "
+        "Tudo roda dentro de uma transação desfeita no final: o banco não é alterado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=100_000, help="Quantidade de notas sintéticas.")
+        parser.add_argument('--materias', type=int, default=10)
+        parser.add_argument('--amostra-save', type=int, default=2000,
+                            help="Notas recalculadas com save() (o tempo total é extrapolado).")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._executar(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _executar(self, options):
+        aleatorio = random.Random(options['seed'])
+        linhas, qtd_materias = options['linhas'], options['materias']
+        qtd_alunos = -(-linhas // qtd_materias)
+
+        curso = Curso.objects.create(nome=f"Benchmark {time.time_ns()}")
+        turma = Turma.objects.create(curso=curso, ano_modulo='1º ANO', turno='matutino', turma='BM')
+        materias = Materia.objects.bulk_create([Materia(nome=f"Matéria {i}") for i in range(qtd_materias)])
+        alunos = CustomUser.objects.bulk_create([
+            CustomUser(username=f"benchmark_{curso.pk}_{i}", tipo='aluno', password='!')
+            for i in range(qtd_alunos)
+        ], batch_size=1000)
+
+        politica = politica_da_turma(turma)
+
+        def nota():
+            return None if aleatorio.random() < 0.1 else round(aleatorio.uniform(0, politica.maximo / 2), 1)
+
+        def sintetica(i):
+            item = Nota(aluno=alunos[i // qtd_materias], materia=materias[i % qtd_materias], turma=turma)
+            item.definir_componentes({nome: nota() for nome in politica.componentes})
+            return item
+
+        inicio = time.perf_counter()
+        Nota.objects.bulk_create([sintetica(i) for i in range(linhas)], batch_size=1000)
+        self.stdout.write(f"{linhas} notas sintéticas criadas em {time.perf_counter() - inicio:.2f}s")
+
+        notas_turma = Nota.objects.filter(turma=turma).select_related('turma')
+
+        # Linha a linha: o caminho do Nota.save() usado pelas views
+        amostra = list(notas_turma[:options['amostra_save']])
+        inicio = time.perf_counter()
+        for item in amostra:
+            item.save()
+        tempo_amostra = time.perf_counter() - inicio
+        tempo_save = tempo_amostra / max(len(amostra), 1) * linhas
+        self.stdout.write(
+            f"save() por linha:  {tempo_amostra:.2f}s para {len(amostra)} notas "
+            f"(~{tempo_save:.1f}s estimado para {linhas})"
+        )
+
+        # Motor: só a conta, com os arrays já carregados
+        dados = motor_notas.carregar(notas_turma)[politica]
+        inicio = time.perf_counter()
+        politica.avaliar_lote(dados['colunas'])
+        tempo_conta = time.perf_counter() - inicio
+
+        # Motor completo (ler + calcular + gravar); zera as médias para forçar a escrita de todas
+        notas_turma.update(media_final=None, status_final='')
+        inicio = time.perf_counter()
+        total, alteradas = motor_notas.recalcular(notas_turma)
+        tempo_motor = time.perf_counter() - inicio
+
+        self.stdout.write(f"motor (só a conta): {tempo_conta * 1000:.1f}ms")
+        self.stdout.write(f"motor (ler+gravar): {tempo_motor:.2f}s, {alteradas} de {total} notas gravadas")
+
+        # Confere com a regra do model
+        divergentes = 0
+        for item in notas_turma.order_by('?')[:1000]:
+            media = item.calcular_media()
+            if item.status_final != item.calcular_status() or not np.isclose(
+                media if media is not None else np.nan, item.media_final if item.media_final is not None else np.nan,
+                equal_nan=True,
+            ):
+                divergentes += 1
+
+        estilo = self.style.SUCCESS if not divergentes else self.style.ERROR
+        self.stdout.write(estilo(
+            f"Ganho: {tempo_save / tempo_motor:.0f}x; divergências na conferência: {divergentes}"
+        ))
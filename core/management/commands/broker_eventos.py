@@ -0,0 +1,46 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Broker local de eventos (EVENTOS_BACKEND='broker'): repassa cada linha recebida de um "
+        "worker a todos os workers conectados, para o SSE funcionar com vários processos."
+    )
+
+    def add_arguments(self, parser):
+        host, porta = settings.EVENTOS_BROKER_ENDERECO
+        parser.add_argument('--host', default=host)
+        parser.add_argument('--porta', type=int, default=porta)
+
+    def handle(self, *args, **options):
+        try:
+            asyncio.run(self._servir(options['host'], options['porta']))
+        except KeyboardInterrupt:
+            pass
+
+    async def _servir(self, host, porta):
+        conectados = set()
+
+        async def atender(leitor, escritor):
+            conectados.add(escritor)
+            try:
+                while linha := await leitor.readline():
+                    for destino in list(conectados):
+                        try:
+                            destino.write(linha)
+                            await destino.drain()
+                        except ConnectionError:
+                            conectados.discard(destino)
+            except ConnectionError:
+                pass
+            finally:
+                conectados.discard(escritor)
+                escritor.close()
+
+        servidor = await asyncio.start_server(atender, host, porta)
+        self.stdout.write(self.style.SUCCESS(f"Broker de eventos ouvindo em {host}:{porta}"))
+        async with servidor:
+            await servidor.serve_forever()
@@ -0,0 +1,128 @@
+import http.client
+import threading
+import time
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from core.carga import SERVIDORES, aguardar_servidor, parar_servidor, percentis, subir_servidor
+
+CAMINHOS_PADRAO = ('/autenticacao/aluno/dashboard/', '/autenticacao/aluno/boletim/')
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de carga HTTP: N clientes simultâneos repetindo os caminhos como um usuário logado. "
+        "Com --comparar sobe o projeto em uvicorn (ASGI) e em runserver (WSGI) e compara as vazões."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Servidor já no ar (sem --comparar).")
+        parser.add_argument('--caminho', action='append', dest='caminhos', help="Caminho a requisitar (pode repetir).")
+        parser.add_argument('--usuario', required=True, help="username ou e-mail do usuário da sessão.")
+        parser.add_argument('--clientes', type=int, default=20, help="Clientes simultâneos.")
+        parser.add_argument('--segundos', type=float, default=10.0, help="Duração de cada rodada.")
+        parser.add_argument('--comparar', action='store_true', help="Sobe ASGI e WSGI e mede os dois.")
+        parser.add_argument('--porta', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        caminhos = options['caminhos'] or list(CAMINHOS_PADRAO)
+        cookie = self._sessao(options['usuario'])
+
+        if not options['comparar']:
+            self._relatorio(options['url'], self._rodar(options['url'], caminhos, cookie, options))
+            return
+
+        resultados = {}
+        for nome in SERVIDORES:
+            url = f"http://127.0.0.1:{options['porta']}"
+            processo = subir_servidor(nome, options['porta'])
+            try:
+                aguardar_servidor(url)
+                self._rodar(url, caminhos[:1], cookie, dict(options, segundos=1, clientes=2))  # aquecimento
+                resultados[nome] = self._rodar(url, caminhos, cookie, options)
+            finally:
+                parar_servidor(processo)
+            self._relatorio(f"{nome.upper()} ({url})", resultados[nome])
+
+        vazao_wsgi = resultados['wsgi']['vazao']
+        if vazao_wsgi:
+            self.stdout.write(self.style.SUCCESS(
+                f"\nASGI/WSGI: {resultados['asgi']['vazao'] / vazao_wsgi:.2f}x a vazão"
+            ))
+
+    def _sessao(self, identificador):
+        """Cria uma sessão autenticada direto no SessionStore (sem passar pelo formulário de login)."""
+        User = get_user_model()
+        usuario = User.objects.filter(Q(username=identificador) | Q(email=identificador)).first()
+        if usuario is None:
+            raise CommandError(f"Usuário '{identificador}' não encontrado.")
+
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        store[SESSION_KEY] = str(usuario.pk)
+        store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        store[HASH_SESSION_KEY] = usuario.get_session_auth_hash()
+        store.create()
+        return f"{settings.SESSION_COOKIE_NAME}={store.session_key}"
+
+    def _rodar(self, url, caminhos, cookie, options):
+        partes = urlsplit(url)
+        latencias, erros = [], []
+        trava = threading.Lock()
+        fim = time.monotonic() + options['segundos']
+
+        def cliente(indice):
+            conexao = http.client.HTTPConnection(partes.hostname, partes.port, timeout=30)
+            minhas, meus_erros = [], []
+            passo = indice
+            while time.monotonic() < fim:
+                caminho = caminhos[passo % len(caminhos)]
+                passo += 1
+                inicio = time.perf_counter()
+                try:
+                    conexao.request('GET', caminho, headers={'Cookie': cookie})
+                    resposta = conexao.getresponse()
+                    resposta.read()
+                    if resposta.status >= 400 or resposta.status in (301, 302):
+                        meus_erros.append(f"{resposta.status} {caminho}")
+                    else:
+                        minhas.append(time.perf_counter() - inicio)
+                except (OSError, http.client.HTTPException) as erro:
+                    meus_erros.append(f"{type(erro).__name__} {caminho}")
+                    conexao.close()
+                    conexao = http.client.HTTPConnection(partes.hostname, partes.port, timeout=30)
+            conexao.close()
+            with trava:
+                latencias.extend(minhas)
+                erros.extend(meus_erros)
+
+        threads = [threading.Thread(target=cliente, args=(i,)) for i in range(options['clientes'])]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duracao = time.perf_counter() - inicio
+
+        p50, p95 = percentis(latencias)
+        return {
+            'requisicoes': len(latencias),
+            'erros': erros,
+            'vazao': len(latencias) / duracao if duracao else 0,
+            'p50': p50,
+            'p95': p95,
+        }
+
+    def _relatorio(self, titulo, resultado):
+        self.stdout.write(f"\n{titulo}")
+        self.stdout.write(
+            f"  {resultado['requisicoes']} respostas OK, {len(resultado['erros'])} erros, "
+            f"{resultado['vazao']:.1f} req/s, p50 {resultado['p50'] * 1000:.0f}ms, p95 {resultado['p95'] * 1000:.0f}ms"
+        )
+        if resultado['erros']:
+            amostra = sorted(set(resultado['erros']))[:5]
+            self.stdout.write(self.style.WARNING(f"  exemplos de erro: {', '.join(amostra)}"))
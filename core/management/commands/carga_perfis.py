@@ -0,0 +1,380 @@
+import http.client
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+
+from core.carga import SERVIDORES, aguardar_servidor, parar_servidor, percentis, subir_servidor
+from core.models import CustomUser, DocumentoEstagio, ProfessorMateriaAnoCursoModalidade, Turma
+from core.politicas_notas import politica_por_codigo
+
+PERFIS = ('aluno', 'professor', 'orientador', 'direcao')
+USUARIOS_PADRAO = "aluno=20,professor=8,orientador=3,direcao=1"
+
+CSRF_FORMULARIO = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+LINK_FILA = re.compile(r'data-documento="(\d+)"')
+# Passos que terminam na tela de login sem que isso seja erro
+PASSOS_NO_LOGIN = {'login (abrir)', 'logout'}
+
+TERMO_PREENCHIDO = {
+    'concedente_nome': "Empresa de Teste Ltda", 'concedente_cnpj': "00.000.000/0001-00",
+    'concedente_rua': "Rua A", 'concedente_numero': "10", 'concedente_bairro': "Centro",
+    'concedente_cidade_uf': "Guanambi-BA", 'concedente_cep': "46430-000",
+    'concedente_representante': "Representante de Teste", 'supervisor_nome': "Supervisor de Teste",
+    'carga_horaria_diaria': "6", 'carga_horaria_semanal': "30",
+    'apolice_numero': "123456", 'apolice_empresa': "Seguradora de Teste",
+}
+
+
+class FalhaPasso(Exception):
+    pass
+
+
+class Navegador:
+    """
+    Um usuário virtual: uma conexão keep-alive, os cookies da sessão e o
+    token CSRF, seguindo redirecionamentos como o navegador. Cada passo
+    registra o tempo total (com os redirecionamentos) ou o erro.
+    """
+
+    def __init__(self, url, perfil, registrar):
+        partes = urlsplit(url)
+        self.host, self.porta = partes.hostname, partes.port
+        self.perfil, self.registrar = perfil, registrar
+        self.cookies = {}
+        self.conexao = http.client.HTTPConnection(self.host, self.porta, timeout=30)
+
+    def _requisitar(self, metodo, caminho, corpo=None, cabecalhos=None):
+        cabecalhos = dict(cabecalhos or {})
+        if self.cookies:
+            cabecalhos['Cookie'] = '; '.join(f"{nome}={valor}" for nome, valor in self.cookies.items())
+        try:
+            self.conexao.request(metodo, caminho, body=corpo, headers=cabecalhos)
+            resposta = self.conexao.getresponse()
+            conteudo = resposta.read()
+        except (OSError, http.client.HTTPException):
+            self.conexao.close()
+            self.conexao = http.client.HTTPConnection(self.host, self.porta, timeout=30)
+            raise
+        for cabecalho in resposta.headers.get_all('Set-Cookie') or []:
+            for nome, morsel in SimpleCookie(cabecalho).items():
+                self.cookies[nome] = morsel.value
+        return resposta, conteudo
+
+    def abrir(self, passo, caminho, dados=None, json_esperado=False):
+        """GET (ou POST com `dados`) seguindo redirecionamentos. Retorna (caminho final, corpo)."""
+        inicio = time.perf_counter()
+        try:
+            if dados is None:
+                resposta, conteudo = self._requisitar('GET', caminho)
+            else:
+                resposta, conteudo = self._requisitar('POST', caminho, urlencode(dados), {
+                    'Content-Type': 'application/x-www-form-urlencoded',
+                    'X-CSRFToken': self.cookies.get(settings.CSRF_COOKIE_NAME, ''),
+                })
+            for _ in range(5):
+                if resposta.status not in (301, 302, 303):
+                    break
+                caminho = urlsplit(resposta.getheader('Location')).path
+                resposta, conteudo = self._requisitar('GET', caminho)
+            if resposta.status >= 400:
+                raise FalhaPasso(f"HTTP {resposta.status}")
+            if caminho.endswith('/login/') and passo not in PASSOS_NO_LOGIN:
+                raise FalhaPasso("login recusado" if passo == 'login (enviar)' else "caiu no login")
+            if json_esperado and b'"error"' in conteudo[:200]:
+                raise FalhaPasso("erro no JSON")
+        except FalhaPasso as erro:
+            self.registrar(self.perfil, passo, None, str(erro))
+            raise
+        except (OSError, http.client.HTTPException) as erro:
+            self.registrar(self.perfil, passo, None, type(erro).__name__)
+            raise FalhaPasso(type(erro).__name__)
+        self.registrar(self.perfil, passo, time.perf_counter() - inicio, None)
+        return caminho, conteudo.decode('utf-8', 'replace')
+
+    def entrar(self, login, senha):
+        _, pagina = self.abrir('login (abrir)', '/autenticacao/login/')
+        token = CSRF_FORMULARIO.search(pagina)
+        _, pagina = self.abrir('login (enviar)', '/autenticacao/login/', {
+            'csrfmiddlewaretoken': token.group(1) if token else '', 'username': login, 'password': senha,
+        })
+        return pagina
+
+    def sair(self):
+        self.abrir('logout', '/autenticacao/logout/')
+        self.cookies.clear()
+
+    def fechar(self):
+        self.conexao.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de carga com os fluxos reais de cada perfil: aluno (login, boletim, preencher e assinar o termo), "
+        "professor (turma, planilha, inserir_nota), orientador e direção (assinar a fila). "
+        "Cada usuário virtual entra pelo formulário de login. Relata vazão, taxa de erro e p95 por passo. "
+        "Altera o banco (notas, documentos): use uma cópia ou o banco do generate_school."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Servidor já no ar.")
+        parser.add_argument('--subir', choices=sorted(SERVIDORES), help="Sobe o servidor (asgi ou wsgi) só para o teste.")
+        parser.add_argument('--porta', type=int, default=8765)
+        parser.add_argument('--usuarios', default=USUARIOS_PADRAO,
+                            help="Usuários virtuais simultâneos por perfil, ex.: aluno=50,professor=10.")
+        parser.add_argument('--segundos', type=float, default=30.0, help="Duração do teste.")
+        parser.add_argument('--pausa', type=float, default=0.0,
+                            help="Tempo médio de leitura entre os cliques, em segundos.")
+        parser.add_argument('--notas', type=int, default=5, help="Notas lançadas por visita do professor à turma.")
+        parser.add_argument('--assinaturas', type=int, default=3, help="Documentos assinados por visita à fila.")
+        parser.add_argument('--senha', default='Senha123#', help="Senha comum das contas de teste.")
+        parser.add_argument('--contas', type=int, default=2000, help="Máximo de contas sorteadas por perfil.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        quantidades = self._quantidades(options['usuarios'])
+        self.aleatorio = random.Random(options['seed'])
+        self.options = options
+        contas = self._contas(quantidades)
+
+        url, processo = options['url'], None
+        if options['subir']:
+            url = f"http://127.0.0.1:{options['porta']}"
+            processo = subir_servidor(options['subir'], options['porta'])
+        try:
+            aguardar_servidor(url, '/autenticacao/login/')
+            resultado = self._rodar(url, quantidades, contas)
+        finally:
+            if processo:
+                parar_servidor(processo)
+        self._relatorio(resultado)
+
+    def _quantidades(self, texto):
+        quantidades = {}
+        for item in texto.split(','):
+            perfil, _, quantidade = item.strip().partition('=')
+            if perfil not in PERFIS:
+                raise CommandError(f"Perfil inválido: {perfil}. Opções: {', '.join(PERFIS)}")
+            try:
+                quantidades[perfil] = int(quantidade)
+            except ValueError:
+                raise CommandError(f"Quantidade inválida em {item!r}.")
+        return {perfil: quantidade for perfil, quantidade in quantidades.items() if quantidade > 0}
+
+    # === Contas de teste e o que cada uma vai fazer ===
+
+    def _amostra(self, itens):
+        itens = list(itens)
+        return self.aleatorio.sample(itens, min(len(itens), self.options['contas']))
+
+    def _contas(self, quantidades):
+        """{perfil: [conta]}, cada conta com o login e os alvos do seu fluxo."""
+        contas = {}
+        professores = list(CustomUser.objects.filter(tipo='professor').values_list('id', flat=True))
+
+        if 'aluno' in quantidades:
+            termos = dict(DocumentoEstagio.objects.filter(
+                tipo_documento='TERMO_COMPROMISSO', status='RASCUNHO',
+            ).values_list('estagio__aluno_id', 'id'))
+            orientadores = dict(CustomUser.objects.filter(tipo='aluno', estagio__isnull=False)
+                                .values_list('id', 'estagio__orientador_id'))
+            alunos = CustomUser.objects.filter(tipo='aluno', alunoturma__isnull=False).distinct()
+            # Primeiro quem ainda tem o termo em rascunho: o fluxo completo
+            com_termo = self._amostra(alunos.filter(id__in=termos).values_list('id', 'numero_matricula'))
+            sem_termo = self._amostra(alunos.exclude(id__in=termos).values_list('id', 'numero_matricula'))
+            contas['aluno'] = [
+                {'login': matricula, 'termo': termos.get(pk),
+                 'orientador': orientadores.get(pk) or (self.aleatorio.choice(professores) if professores else None)}
+                for pk, matricula in (com_termo + sem_termo)[:self.options['contas']]
+            ]
+
+        if 'professor' in quantidades:
+            turmas = defaultdict(list)
+            for pk, curso_id, ano_modulo, modalidade in Turma.objects.values_list('id', 'curso_id', 'ano_modulo', 'modalidade'):
+                turmas[(curso_id, ano_modulo, modalidade)].append(pk)
+            por_professor = defaultdict(list)
+            for vinculo in ProfessorMateriaAnoCursoModalidade.objects.select_related('professor'):
+                for turma_id in turmas[(vinculo.curso_id, vinculo.ano_modulo, vinculo.modalidade)]:
+                    por_professor[vinculo.professor.numero_matricula].append((vinculo.pk, vinculo.materia_id, turma_id))
+            contas['professor'] = [{'login': login, 'turmas': alvos} for login, alvos in self._amostra(por_professor.items())]
+
+        if 'orientador' in quantidades:
+            contas['orientador'] = [{'login': login} for login in self._amostra(
+                CustomUser.objects.filter(tipo='professor').annotate(
+                    fila=Count('estagios_orientados__documentos',
+                               filter=Q(estagios_orientados__documentos__status='AGUARDANDO_ASSINATURA_PROF')),
+                ).filter(fila__gt=0).values_list('numero_matricula', flat=True)
+            )]
+
+        if 'direcao' in quantidades:
+            contas['direcao'] = [{'login': login} for login in self._amostra(
+                CustomUser.objects.filter(tipo='direcao').values_list('numero_matricula', flat=True)
+            )]
+
+        for perfil in list(quantidades):
+            if not contas.get(perfil):
+                self.stdout.write(self.style.WARNING(f"Sem contas de teste para '{perfil}': perfil ignorado."))
+                del quantidades[perfil]
+        if not quantidades:
+            raise CommandError("Nenhum perfil com contas de teste. Gere dados com 'python manage.py generate_school'.")
+        return contas
+
+    # === Fluxos ===
+
+    def _pausar(self):
+        if self.options['pausa']:
+            time.sleep(self.aleatorio.uniform(0, 2 * self.options['pausa']))
+
+    def _fluxo_aluno(self, navegador, conta, aleatorio):
+        navegador.entrar(conta['login'], self.options['senha'])
+        self._pausar()
+        navegador.abrir('boletim', '/autenticacao/aluno/boletim/')
+        self._pausar()
+        navegador.abrir('estágio', '/autenticacao/aluno/estagio/')
+        termo = conta['termo']
+        if termo and conta['orientador']:
+            self._pausar()
+            caminho = f'/autenticacao/aluno/estagio/documento/{termo}/preencher/'
+            _, pagina = navegador.abrir('termo (abrir)', caminho)
+            token = CSRF_FORMULARIO.search(pagina)
+            hoje = time.strftime('%Y-%m-%d')
+            self._pausar()
+            navegador.abrir('termo (salvar)', caminho, dict(
+                TERMO_PREENCHIDO, csrfmiddlewaretoken=token.group(1) if token else '',
+                orientador=conta['orientador'], data_inicio=hoje, data_fim=hoje,
+            ))
+            self._pausar()
+            navegador.abrir('termo (assinar)', f'/autenticacao/aluno/estagio/documento/{termo}/assinar/')
+            # Assinado, o termo sai do rascunho: a próxima sessão desta conta só consulta
+            conta['termo'] = None
+
+    def _fluxo_professor(self, navegador, conta, aleatorio):
+        navegador.entrar(conta['login'], self.options['senha'])
+        vinculo_id, materia_id, turma_id = aleatorio.choice(conta['turmas'])
+        self._pausar()
+        navegador.abrir('turmas do vínculo', f'/autenticacao/professor/vinculo/{vinculo_id}/turmas/')
+        base = f'/autenticacao/professor/materia/{materia_id}/turma/{turma_id}/'
+        self._pausar()
+        navegador.abrir('planilha (página)', base)
+        _, dados = navegador.abrir('planilha (notas.json)', base + 'notas.json', json_esperado=True)
+        dados = json.loads(dados)
+        alunos = dados['colunas']['id']
+        teto = politica_por_codigo(dados['politica']).maximo / 2
+        for aluno_id in aleatorio.sample(alunos, min(len(alunos), self.options['notas'])):
+            self._pausar()
+            valores = {nome: f"{aleatorio.uniform(0, teto):.1f}" for nome in dados['componentes']}
+            navegador.abrir('inserir_nota', '/autenticacao/professor/inserir-nota/', dict(
+                valores, aluno_id=aluno_id, materia_id=materia_id, turma_id=turma_id,
+            ), json_esperado=True)
+
+    def _assinar_fila(self, navegador, conta, aleatorio, visualizar, assinar):
+        painel = navegador.entrar(conta['login'], self.options['senha'])
+        pendentes = list(dict.fromkeys(LINK_FILA.findall(painel)))
+        for documento_id in pendentes[:self.options['assinaturas']]:
+            self._pausar()
+            navegador.abrir('documento', visualizar.format(documento_id))
+            self._pausar()
+            navegador.abrir('assinar', assinar.format(documento_id))
+
+    def _fluxo_orientador(self, navegador, conta, aleatorio):
+        self._assinar_fila(navegador, conta, aleatorio,
+                           '/autenticacao/professor/estagio/documento/{}/visualizar/',
+                           '/autenticacao/professor/estagio/documento/{}/assinar/')
+
+    def _fluxo_direcao(self, navegador, conta, aleatorio):
+        self._assinar_fila(navegador, conta, aleatorio,
+                           '/autenticacao/direcao/documento/{}/visualizar/',
+                           '/autenticacao/direcao/documento/{}/assinar/')
+
+    # === Execução ===
+
+    def _rodar(self, url, quantidades, contas):
+        latencias, erros, sessoes = defaultdict(list), defaultdict(list), defaultdict(int)
+        passos = {}
+        trava = threading.Lock()
+        fim = time.monotonic() + self.options['segundos']
+        # Cada conta é usada por um usuário virtual de cada vez (sessões não se misturam)
+        filas = {perfil: list(contas[perfil]) for perfil in quantidades}
+
+        def registrar(perfil, passo, segundos, erro):
+            with trava:
+                passos.setdefault((perfil, passo), None)
+                if erro is None:
+                    latencias[(perfil, passo)].append(segundos)
+                else:
+                    erros[(perfil, passo)].append(erro)
+
+        def usuario_virtual(perfil, indice):
+            aleatorio = random.Random(f"{self.options['seed']}:{perfil}:{indice}")
+            fluxo = getattr(self, f'_fluxo_{perfil}')
+            navegador = Navegador(url, perfil, registrar)
+            while time.monotonic() < fim:
+                with trava:
+                    conta = filas[perfil].pop(0) if filas[perfil] else None
+                if conta is None:
+                    time.sleep(0.05)
+                    continue
+                try:
+                    fluxo(navegador, conta, aleatorio)
+                    navegador.sair()
+                    with trava:
+                        sessoes[perfil] += 1
+                except FalhaPasso:
+                    navegador.cookies.clear()
+                finally:
+                    with trava:
+                        filas[perfil].append(conta)
+            navegador.fechar()
+
+        threads = [
+            threading.Thread(target=usuario_virtual, args=(perfil, i), daemon=True)
+            for perfil, quantidade in quantidades.items() for i in range(quantidade)
+        ]
+        self.stdout.write(f"{len(threads)} usuários virtuais por {self.options['segundos']:.0f}s em {url}...")
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {
+            'latencias': latencias, 'erros': erros, 'sessoes': sessoes, 'passos': list(passos),
+            'duracao': time.perf_counter() - inicio, 'quantidades': quantidades,
+        }
+
+    def _relatorio(self, resultado):
+        latencias, erros, duracao = resultado['latencias'], resultado['erros'], resultado['duracao']
+        self.stdout.write(
+            f"\n{'perfil':<11}{'passo':<24}{'ok':>7}{'erros':>7}{'%erro':>7}{'req/s':>8}{'p50 ms':>8}{'p95 ms':>8}"
+        )
+        total_ok = total_erros = 0
+        # Na ordem do fluxo: a primeira vez em que cada passo apareceu
+        for perfil, passo in sorted(resultado['passos'], key=lambda item: PERFIS.index(item[0])):
+            tempos, falhas = latencias.get((perfil, passo), []), erros.get((perfil, passo), [])
+            total_ok += len(tempos)
+            total_erros += len(falhas)
+            p50, p95 = percentis(tempos)
+            taxa = len(falhas) / (len(tempos) + len(falhas)) * 100
+            self.stdout.write(
+                f"{perfil:<11}{passo:<24}{len(tempos):>7}{len(falhas):>7}{taxa:>6.1f}%"
+                f"{len(tempos) / duracao:>8.1f}{p50 * 1000:>8.0f}{p95 * 1000:>8.0f}"
+            )
+
+        sessoes = ', '.join(f"{perfil} {resultado['sessoes'][perfil]}" for perfil in resultado['quantidades'])
+        self.stdout.write(f"\nSessões completas: {sessoes}")
+        taxa = total_erros / max(total_ok + total_erros, 1) * 100
+        estilo = self.style.SUCCESS if not total_erros else self.style.WARNING
+        self.stdout.write(estilo(
+            f"✅ {total_ok} requisições OK, {total_erros} com erro ({taxa:.1f}%), "
+            f"{total_ok / duracao:.1f} passos/s em {duracao:.1f}s"
+        ))
+        exemplos = sorted({f"{perfil}/{passo}: {erro}" for (perfil, passo), lista in erros.items() for erro in lista})
+        if exemplos:
+            self.stdout.write(self.style.WARNING(f"  exemplos de erro: {'; '.join(exemplos[:5])}"))
@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Carrega cursos, turmas, matérias e a grade de cada turma a partir de cursos.txt e matérias.txt. "
+        "Idempotente: só grava o que mudou, em lote."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cursos', default=settings.BASE_DIR / 'cursos.txt', help="Arquivo de cursos e turmas.")
+        parser.add_argument('--materias', default=settings.BASE_DIR / 'matérias.txt',
+                            help="Arquivo com as matérias de cada turma.")
+        parser.add_argument('--dry-run', action='store_true', help="Só mostra o que seria feito.")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            cursos, turmas = seed.ler_cursos(options['cursos'])
+            grade = seed.ler_materias(options['materias'])
+        except OSError as erro:
+            raise CommandError(f"Não foi possível ler o arquivo: {erro}")
+        lido = time.perf_counter()
+
+        resultado = seed.carregar(cursos, turmas, grade=grade, dry_run=options['dry_run'])
+
+        for linha in seed.resumo(resultado):
+            self.stdout.write(f"   - {linha}")
+        fim = time.perf_counter()
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Dry-run em {fim - inicio:.2f}s: nada foi alterado."))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Seed aplicado em {fim - inicio:.2f}s (leitura {lido - inicio:.2f}s, banco {fim - lido:.2f}s)"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.notificacoes import enviar_resumos
+
+
+class Command(BaseCommand):
+    help = (
+        "Envia agora os resumos da outbox de notificações (um e-mail por destinatário), sem "
+        "esperar o intervalo. Normalmente quem faz isso é o run_workers."
+    )
+
+    def handle(self, *args, **options):
+        enviados = enviar_resumos()
+        self.stdout.write(self.style.SUCCESS(f"✅ {enviados} resumo(s) enviado(s)"))
@@ -0,0 +1,354 @@
+import datetime
+import json
+import random
+import time
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core import seed
+from core.cache_versoes import invalidar_versao
+from core.models import (
+    AlunoTurma, AtribuicaoProfessor, CustomUser, DocumentoEstagio, EstatisticaNotaTurma, Estagio, Materia, Nota,
+    ProfessorMateriaAnoCursoModalidade, Turma, ano_letivo_atual,
+)
+from core.orientadores import invalidar_diretorio
+from core.painel_admin import invalidar_contadores_admin
+from core.politicas_notas import politica_da_turma
+
+NOMES = (
+    "Ana", "Beatriz", "Bruna", "Camila", "Carla", "Daniela", "Eduarda", "Fernanda", "Gabriela", "Isabela",
+    "Juliana", "Larissa", "Letícia", "Mariana", "Natália", "Patrícia", "Rafaela", "Sofia", "Tatiane", "Vitória",
+    "André", "Bruno", "Caio", "Daniel", "Diego", "Eduardo", "Felipe", "Gabriel", "Gustavo", "Henrique",
+    "João", "Lucas", "Marcos", "Mateus", "Paulo", "Pedro", "Rafael", "Rodrigo", "Thiago", "Vinícius",
+)
+SOBRENOMES = (
+    "Alves", "Barbosa", "Cardoso", "Carvalho", "Costa", "Dias", "Fernandes", "Ferreira", "Gomes", "Lima",
+    "Lopes", "Martins", "Melo", "Moreira", "Nascimento", "Oliveira", "Pereira", "Ribeiro", "Rocha", "Santos",
+    "Silva", "Souza", "Teixeira", "Vieira",
+)
+CIDADES = ("Guanambi", "Caetité", "Candiba", "Pindaí", "Palmas de Monte Alto", "Sebastião Laranjeiras", "Urandi")
+EMPRESAS = ("Hospital Regional", "Laboratório Central", "Prefeitura Municipal", "Supermercado Bom Preço",
+            "Construtora Alvorada", "Escritório Moura & Filhos", "Cooperativa Agrícola", "Padaria Pão de Ouro")
+
+STATUS_DOCUMENTOS_PADRAO = (
+    "RASCUNHO:40,AGUARDANDO_ASSINATURA_PROF:25,AGUARDANDO_ASSINATURA_DIR:15,CONCLUIDO:15,REPROVADO:5"
+)
+# Assinaturas que cada status implica (aluno, orientador, direção)
+ASSINATURAS = {
+    'RASCUNHO': (False, False, False),
+    'REPROVADO': (False, False, False),
+    'AGUARDANDO_ASSINATURA_PROF': (True, False, False),
+    'AGUARDANDO_ASSINATURA_DIR': (True, True, False),
+    'CONCLUIDO': (True, True, True),
+}
+
+
+def digitos_cpf(base):
+    """Os 9 dígitos da base mais os 2 verificadores: um CPF válido."""
+    digitos = [int(d) for d in f"{base:09d}"]
+    for tamanho in (9, 10):
+        soma = sum(d * (tamanho + 1 - i) for i, d in enumerate(digitos[:tamanho]))
+        digitos.append(soma * 10 % 11 % 10)
+    return ''.join(map(str, digitos))
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera uma escola sintética (alunos, matrículas, notas, professores, dossiês de estágio e documentos) "
+        "com semente fixa, para testes de carga. Grava de verdade: use um banco separado, "
+        "ex.: SGDE_DB_NAME=/tmp/escola.sqlite3 python manage.py migrate && "
+        "SGDE_DB_NAME=/tmp/escola.sqlite3 python manage.py generate_school --alunos-por-turma 750"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alunos-por-turma', type=int, default=30)
+        parser.add_argument('--turmas', type=int, help="Usa só as N primeiras turmas (padrão: todas).")
+        parser.add_argument('--materias-por-turma', type=int, default=10,
+                            help="Matérias com nota em cada turma (cria matérias sintéticas se faltar).")
+        parser.add_argument('--preenchimento', type=float, default=0.8,
+                            help="Fração dos componentes de nota lançados (0 a 1).")
+        parser.add_argument('--professores', type=int, default=40)
+        parser.add_argument('--direcao', type=int, default=2, help="Contas da direção (assinam a fila final).")
+        parser.add_argument('--dossies', type=float, default=0.3,
+                            help="Fração dos alunos com dossiê de estágio (0 a 1).")
+        parser.add_argument('--status-documentos', default=STATUS_DOCUMENTOS_PADRAO,
+                            help="Distribuição dos status dos documentos, STATUS:peso separados por vírgula.")
+        parser.add_argument('--prefixo', default='sint', help="Prefixo dos usernames gerados.")
+        parser.add_argument('--senha', default='Senha123#', help="Senha de todos os usuários gerados.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if not 0 <= options['preenchimento'] <= 1 or not 0 <= options['dossies'] <= 1:
+            raise CommandError("--preenchimento e --dossies vão de 0 a 1.")
+        self.status_documentos = self._distribuicao(options['status_documentos'])
+
+        self.aleatorio = random.Random(options['seed'])
+        self.numeros = np.random.default_rng(options['seed'])
+        self.opcoes = options
+        self.ano_letivo = ano_letivo_atual()
+        self.tempos = []
+
+        inicio = time.perf_counter()
+        with transaction.atomic():
+            turmas = self._turmas()
+            self._etapa("senha", lambda: setattr(self, 'senha', make_password(options['senha'])))
+            professores = self._etapa("professores", lambda: self._usuarios('professor', options['professores']))
+            self._usuarios('direcao', options['direcao'])
+            alunos_por_turma = self._etapa("alunos e matrículas", lambda: self._alunos(turmas))
+            materias = self._etapa("matérias e vínculos", lambda: self._materias(turmas, professores))
+            notas = self._etapa("notas", lambda: self._notas(turmas, alunos_por_turma, materias))
+            documentos = self._etapa("dossiês e documentos", lambda: self._dossies(alunos_por_turma, professores))
+
+        # Tudo foi gravado em lote: os sinais não rodaram
+        for modelo in ('Nota', 'AlunoTurma', 'Estagio', 'DocumentoEstagio', 'Materia', 'ProfessorMateriaAnoCursoModalidade',
+                       'CustomUser'):
+            invalidar_versao(modelo)
+        invalidar_contadores_admin()
+        invalidar_diretorio()
+
+        for nome, segundos in self.tempos:
+            self.stdout.write(f"   - {nome}: {segundos:.2f}s")
+        total_alunos = sum(len(alunos) for alunos in alunos_por_turma.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(turmas)} turmas, {total_alunos} alunos, {len(professores)} professores, {notas} notas e "
+            f"{documentos} documentos gerados em {time.perf_counter() - inicio:.2f}s"
+        ))
+
+    def _etapa(self, nome, funcao):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        self.tempos.append((nome, time.perf_counter() - inicio))
+        return resultado
+
+    def _distribuicao(self, texto):
+        validos = dict(DocumentoEstagio.STATUS_CHOICES)
+        pesos = {}
+        for item in texto.split(','):
+            status, _, peso = item.strip().partition(':')
+            if status not in validos:
+                raise CommandError(f"Status de documento inválido: {status}. Opções: {', '.join(validos)}")
+            try:
+                pesos[status] = float(peso or 1)
+            except ValueError:
+                raise CommandError(f"Peso inválido em {item!r}.")
+        if not sum(pesos.values()):
+            raise CommandError("--status-documentos precisa de algum peso maior que zero.")
+        return pesos
+
+    # === Estrutura ===
+
+    def _turmas(self):
+        turmas = list(Turma.objects.select_related('curso').order_by('id'))
+        if not turmas:
+            # Banco vazio: carrega cursos e turmas do cursos.txt, como o carregar_seed
+            cursos, linhas = seed.ler_cursos(settings.BASE_DIR / 'cursos.txt')
+            seed.carregar(cursos, linhas, grade=seed.ler_materias(settings.BASE_DIR / 'matérias.txt'))
+            turmas = list(Turma.objects.select_related('curso').order_by('id'))
+        if self.opcoes['turmas']:
+            turmas = turmas[:self.opcoes['turmas']]
+        return turmas
+
+    def _materias(self, turmas, professores):
+        """{turma_id: [Materia]}: as da grade da turma, completadas até --materias-por-turma."""
+        quantidade = self.opcoes['materias_por_turma']
+        todas = list(Materia.objects.order_by('id'))
+        if len(todas) < quantidade:
+            todas += Materia.objects.bulk_create([
+                Materia(nome=f"Matéria Sintética {i + 1}") for i in range(len(todas), quantidade)
+            ])
+        por_id = {materia.pk: materia for materia in todas}
+
+        grade = {}
+        for materia_id, turma_id in Materia.turmas.through.objects.values_list('materia_id', 'turma_id'):
+            grade.setdefault(turma_id, []).append(por_id[materia_id])
+
+        materias, vinculos = {}, set()
+        for turma in turmas:
+            escolhidas = grade.get(turma.pk, [])[:quantidade]
+            restantes = [m for m in todas if m not in escolhidas]
+            escolhidas += self.aleatorio.sample(restantes, quantidade - len(escolhidas))
+            materias[turma.pk] = escolhidas
+            for materia in escolhidas:
+                vinculos.add((materia.pk, turma.curso_id, turma.ano_modulo, turma.modalidade))
+
+        if professores:
+            ProfessorMateriaAnoCursoModalidade.objects.bulk_create([
+                ProfessorMateriaAnoCursoModalidade(
+                    professor=self.aleatorio.choice(professores), materia_id=materia_id, curso_id=curso_id,
+                    ano_modulo=ano_modulo, modalidade=modalidade,
+                )
+                for materia_id, curso_id, ano_modulo, modalidade in sorted(vinculos)
+            ], batch_size=1000, ignore_conflicts=True)
+            AtribuicaoProfessor.reconstruir()
+        return materias
+
+    # === Pessoas ===
+
+    def _identificadores(self, quantidade):
+        """(username, matrícula, cpf, rg) novos, sem colidir com o que já está no banco."""
+        usados = {
+            campo: set(CustomUser.objects.exclude(**{f"{campo}__isnull": True}).values_list(campo, flat=True))
+            for campo in ('username', 'numero_matricula', 'cpf', 'rg')
+        }
+        ano = datetime.date.today().year
+        resultado = []
+        sequencia = base_cpf = 0
+        while len(resultado) < quantidade:
+            sequencia += 1
+            username = f"{self.opcoes['prefixo']}{sequencia:06d}"
+            matricula = f"{ano}9{sequencia:07d}"
+            rg = f"9{sequencia:09d}"
+            if username in usados['username'] or matricula in usados['numero_matricula'] or rg in usados['rg']:
+                continue
+            base_cpf += 1
+            cpf = digitos_cpf(900_000_000 + base_cpf)
+            while cpf in usados['cpf']:
+                base_cpf += 1
+                cpf = digitos_cpf(900_000_000 + base_cpf)
+            usados['username'].add(username)
+            usados['cpf'].add(cpf)
+            resultado.append((username, matricula, cpf, rg))
+        return resultado
+
+    def _usuarios(self, tipo, quantidade):
+        escolher = self.aleatorio.choice
+        hoje = datetime.date.today()
+        usuarios = []
+        for username, matricula, cpf, rg in self._identificadores(quantidade):
+            nascimento = hoje - datetime.timedelta(days=self.aleatorio.randint(15 * 365, 40 * 365))
+            usuarios.append(CustomUser(
+                username=username, password=self.senha, tipo=tipo,
+                first_name=escolher(NOMES), last_name=f"{escolher(SOBRENOMES)} {escolher(SOBRENOMES)}",
+                email=f"{username}@sintetico.invalid", numero_matricula=matricula, cpf=cpf, rg=rg, orgao='SSP/BA',
+                data_nascimento=nascimento, cidade_nascimento=escolher(CIDADES),
+                nome_mae=f"{escolher(NOMES[:20])} {escolher(SOBRENOMES)}",
+                endereco_cidade=escolher(CIDADES), telefone=f"77 9{self.aleatorio.randint(8000_0000, 9999_9999)}",
+            ))
+        return CustomUser.objects.bulk_create(usuarios, batch_size=1000)
+
+    def _alunos(self, turmas):
+        """Cria os alunos e as matrículas. Retorna {turma_id: [aluno_id]}."""
+        por_turma = self.opcoes['alunos_por_turma']
+        alunos = self._usuarios('aluno', por_turma * len(turmas))
+        distribuicao = {
+            turma.pk: [aluno.pk for aluno in alunos[i * por_turma:(i + 1) * por_turma]]
+            for i, turma in enumerate(turmas)
+        }
+        AlunoTurma.objects.bulk_create([
+            AlunoTurma(aluno_id=aluno_id, turma_id=turma_id, ano_letivo=self.ano_letivo)
+            for turma_id, aluno_ids in distribuicao.items() for aluno_id in aluno_ids
+        ], batch_size=1000)
+        return distribuicao
+
+    # === Notas ===
+
+    def _notas(self, turmas, alunos_por_turma, materias):
+        """
+        Gera os componentes por turma em arrays, calcula média e situação com o
+        avaliador NumPy da política (como core.motor_notas) e insere tudo com
+        executemany. A estatística por turma/matéria é reconstruída uma vez no fim.
+        """
+        colunas = ('aluno_id', 'materia_id', 'turma_id', 'ano_letivo', *Nota.COLUNAS_COMPONENTES,
+                   'componentes', 'media_final', 'status_final')
+        tabela = connection.ops.quote_name(Nota._meta.db_table)
+        sql = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join(['%s'] * len(colunas))})"
+        preenchimento = self.opcoes['preenchimento']
+
+        total = 0
+        with connection.cursor() as cursor:
+            for turma in turmas:
+                aluno_ids, materia_ids = alunos_por_turma[turma.pk], [m.pk for m in materias[turma.pk]]
+                if not aluno_ids or not materia_ids:
+                    continue
+                politica = politica_da_turma(turma)
+                linhas = len(aluno_ids) * len(materia_ids)
+                teto = politica.maximo / 2
+
+                # Cada aluno tem um desempenho próprio, que puxa todas as notas dele
+                desempenho = np.repeat(self.numeros.beta(5, 2.5, len(aluno_ids)), len(materia_ids))
+                valores = {}
+                for nome in politica.componentes:
+                    nota = np.clip(self.numeros.normal(desempenho * teto, teto * 0.15), 0, teto).round(1)
+                    nota[self.numeros.random(linhas) >= preenchimento] = np.nan
+                    valores[nome] = nota
+                medias, status = politica.avaliar_lote(valores)
+
+                def valor(array, i):
+                    return None if np.isnan(array[i]) else float(array[i])
+
+                extras = [nome for nome in politica.componentes if nome not in Nota.COLUNAS_COMPONENTES]
+                vazio = np.full(linhas, np.nan)
+                fixas = [valores.get(nome, vazio) for nome in Nota.COLUNAS_COMPONENTES]
+                parametros = [
+                    (
+                        aluno_ids[i // len(materia_ids)], materia_ids[i % len(materia_ids)], turma.pk, self.ano_letivo,
+                        *(valor(coluna, i) for coluna in fixas),
+                        json.dumps({nome: valor(valores[nome], i) for nome in extras}),
+                        valor(medias, i), status[i],
+                    )
+                    for i in range(linhas)
+                ]
+                cursor.executemany(sql, parametros)
+                total += linhas
+
+        EstatisticaNotaTurma.reconstruir(turma_ids=[turma.pk for turma in turmas])
+        return total
+
+    # === Estágio ===
+
+    def _dossies(self, alunos_por_turma, professores):
+        alunos = [aluno_id for aluno_ids in alunos_por_turma.values() for aluno_id in aluno_ids]
+        com_estagio = [aluno_id for aluno_id in alunos if self.aleatorio.random() < self.opcoes['dossies']]
+        if not com_estagio:
+            return 0
+
+        tipos = [tipo for tipo, _ in DocumentoEstagio.TIPO_DOCUMENTO_CHOICES]
+        opcoes, pesos = zip(*self.status_documentos.items())
+        status_sorteados = self.aleatorio.choices(opcoes, pesos, k=len(com_estagio) * len(tipos))
+
+        hoje = datetime.date.today()
+        estagios = []
+        for e, aluno_id in enumerate(com_estagio):
+            inicio = hoje - datetime.timedelta(days=self.aleatorio.randint(0, 180))
+            estagios.append(Estagio(
+                aluno_id=aluno_id,
+                orientador=self.aleatorio.choice(professores) if professores else None,
+                supervisor_nome=f"{self.aleatorio.choice(NOMES)} {self.aleatorio.choice(SOBRENOMES)}",
+                supervisor_empresa=self.aleatorio.choice(EMPRESAS),
+                supervisor_cargo="Supervisor(a)",
+                data_inicio=inicio,
+                data_fim=inicio + datetime.timedelta(days=180),
+                status_geral=self._status_geral(status_sorteados[e * len(tipos):(e + 1) * len(tipos)]),
+            ))
+        estagios = Estagio.objects.bulk_create(estagios, batch_size=1000)
+
+        agora = timezone.now()
+        documentos = []
+        for e, estagio in enumerate(estagios):
+            status_do_dossie = status_sorteados[e * len(tipos):(e + 1) * len(tipos)]
+            for tipo, status in zip(tipos, status_do_dossie):
+                aluno, orientador, direcao = ASSINATURAS[status]
+                documentos.append(DocumentoEstagio(
+                    estagio=estagio, tipo_documento=tipo, status=status,
+                    assinado_aluno_em=agora if aluno else None,
+                    assinado_orientador_em=agora if orientador else None,
+                    assinado_diretor_em=agora if direcao else None,
+                    publico=status != 'RASCUNHO',
+                ))
+        DocumentoEstagio.objects.bulk_create(documentos, batch_size=1000)
+        return len(documentos)
+
+    @staticmethod
+    def _status_geral(status_documentos):
+        if 'REPROVADO' in status_documentos:
+            return 'PENDENTE_CORRECAO'
+        if all(status == 'CONCLUIDO' for status in status_documentos):
+            return 'APROVADO'
+        if all(status == 'RASCUNHO' for status in status_documentos):
+            return 'RASCUNHO_ALUNO'
+        return 'EM_ANDAMENTO'
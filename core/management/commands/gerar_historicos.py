@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import historico
+from core.models import Turma
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera os históricos escolares (HTML para imprimir) a partir dos retratos por período. "
+        "Use --turma para os formandos de uma turma inteira."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--turma', type=int, help="Todos os alunos (atuais e arquivados) desta turma.")
+        parser.add_argument('--aluno', type=int, action='append', default=[], help="Id do aluno (pode repetir).")
+        parser.add_argument('--workers', type=int, help="Processos em paralelo (padrão: um por núcleo).")
+        parser.add_argument('--saida', help="Pasta dos arquivos (padrão: MEDIA_ROOT/historicos).")
+        parser.add_argument('--enfileirar', action='store_true',
+                            help="Manda cada aluno para a fila de tarefas em vez de gerar agora.")
+        parser.add_argument('--congelar', metavar='ANO_LETIVO',
+                            help="Antes, grava os retratos que faltam deste período (ex.: 2024.2).")
+
+    def handle(self, *args, **options):
+        if options['congelar']:
+            criados = historico.congelar_periodo(options['congelar'])
+            self.stdout.write(f"{criados} retrato(s) de {options['congelar']} gravados.")
+
+        aluno_ids = list(options['aluno'])
+        if options['turma']:
+            try:
+                turma = Turma.objects.get(pk=options['turma'])
+            except Turma.DoesNotExist:
+                raise CommandError(f"Turma {options['turma']} não encontrada.")
+            aluno_ids += historico.alunos_da_turma(turma)
+        aluno_ids = list(dict.fromkeys(aluno_ids))
+
+        if not aluno_ids:
+            if not options['congelar']:
+                raise CommandError("Informe --turma ou --aluno.")
+            return
+
+        if options['enfileirar']:
+            for pk in aluno_ids:
+                historico.gerar_historico.enfileirar(pk)
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(aluno_ids)} histórico(s) enviados para a fila"))
+            return
+
+        inicio = time.perf_counter()
+        caminhos = historico.gerar_em_lote(aluno_ids, options['saida'], options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(caminhos)} histórico(s) gerados em {time.perf_counter() - inicio:.2f}s"
+        ))
@@ -0,0 +1,42 @@
+import copy
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.backends.django import DjangoTemplates
+
+from core.aquecimento_templates import precompilar_templates
+
+
+class Command(BaseCommand):
+    help = (
+        "Compila todos os templates num engine novo e mostra, por template, o custo "
+        "da primeira carga (worker frio) contra a carga já em cache."
+    )
+
+    def handle(self, *args, **options):
+        # Engine novo e isolado para medir o cenário de um worker recém-criado
+        config = copy.deepcopy(settings.TEMPLATES[0])
+        config.pop('BACKEND')
+        config.setdefault('NAME', 'medicao')
+        config.setdefault('APP_DIRS', False)
+        engine = DjangoTemplates(config).engine
+
+        frios = precompilar_templates(engine)
+
+        total_frio, total_quente = 0.0, 0.0
+        self.stdout.write(f"{'Template':<66} {'1ª carga':>10} {'em cache':>10}")
+        for nome, frio in frios:
+            inicio = time.perf_counter()
+            engine.get_template(nome)
+            quente = time.perf_counter() - inicio
+
+            total_frio += frio
+            total_quente += quente
+            self.stdout.write(f"{nome:<66} {frio * 1000:>8.2f}ms {quente * 1000:>8.3f}ms")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\n{len(frios)} templates: {total_frio * 1000:.1f} ms na primeira carga, "
+            f"{total_quente * 1000:.2f} ms em cache. O aquecimento tira "
+            f"~{(total_frio - total_quente) * 1000:.1f} ms das primeiras requisições de cada worker."
+        ))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import EstatisticaNotaTurma
+
+
+class Command(BaseCommand):
+    help = "Reconstrói a tabela EstatisticaNotaTurma a partir das notas, com SQL de conjunto."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--turma', type=int, action='append', dest='turmas', help="Só esta turma (pode repetir).")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        EstatisticaNotaTurma.reconstruir(turma_ids=options['turmas'])
+        total = EstatisticaNotaTurma.objects.count()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Estatísticas reconstruídas: {total} linhas (turma/matéria) "
+            f"em {time.perf_counter() - inicio:.2f}s"
+        ))
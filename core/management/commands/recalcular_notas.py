@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import motor_notas
+from core.models import Nota
+
+
+class Command(BaseCommand):
+    help = "Recalcula média e situação das notas em lote (turma ou escola inteira) com o motor NumPy e a política de cada modalidade."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--turma', type=int, action='append', dest='turmas', help="Só esta turma (pode repetir).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        queryset = Nota.objects.all()
+        if options['turmas']:
+            queryset = queryset.filter(turma_id__in=options['turmas'])
+
+        inicio = time.perf_counter()
+        total, alteradas = motor_notas.recalcular(queryset, options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} notas verificadas, {alteradas} atualizadas em {time.perf_counter() - inicio:.2f}s"
+        ))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import AtribuicaoProfessor
+
+
+class Command(BaseCommand):
+    help = "Reconstrói a tabela AtribuicaoProfessor (professor -> matéria/turma) a partir dos vínculos."
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        AtribuicaoProfessor.reconstruir()
+        total = AtribuicaoProfessor.objects.count()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Atribuições reconstruídas: {total} linhas (professor/matéria/turma) "
+            f"em {time.perf_counter() - inicio:.2f}s"
+        ))
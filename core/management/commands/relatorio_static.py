@@ -0,0 +1,99 @@
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+
+STATIC_TAG_RE = re.compile(r"""\{%\s*static\s+['"]([^'"]+)['"]\s*%\}""")
+EXTENDS_RE = re.compile(r"""\{%\s*(?:extends|include)\s+['"]([^'"]+)['"]""")
+
+
+class Command(BaseCommand):
+    help = (
+        "Mostra o total de bytes estáticos por página antes (arquivos originais) "
+        "e depois do pipeline (melhor variante .br/.gz/.webp gerada pelo collectstatic)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--detalhes', action='store_true', help="Lista cada arquivo de cada página.")
+
+    def handle(self, *args, **options):
+        pasta_templates = os.path.join(settings.BASE_DIR, 'templates')
+        manifesto = getattr(staticfiles_storage, 'hashed_files', None)
+
+        if not manifesto:
+            raise CommandError(
+                "Manifesto de estáticos vazio. Rode com SGDE_DEBUG=0 "
+                "'python manage.py collectstatic' antes do relatório."
+            )
+
+        referencias = {}
+        for raiz, _, arquivos in os.walk(pasta_templates):
+            for nome in arquivos:
+                if nome.endswith('.html'):
+                    caminho = os.path.join(raiz, nome)
+                    relativo = os.path.relpath(caminho, pasta_templates).replace(os.sep, '/')
+                    with open(caminho, encoding='utf-8') as arquivo:
+                        conteudo = arquivo.read()
+                    referencias[relativo] = (
+                        set(STATIC_TAG_RE.findall(conteudo)),
+                        EXTENDS_RE.findall(conteudo),
+                    )
+
+        total_antes, total_depois = 0, 0
+        self.stdout.write(f"{'Página':<70} {'Antes':>12} {'Depois':>12} {'Economia':>9}")
+
+        for pagina in sorted(referencias):
+            estaticos = self._estaticos_da_pagina(pagina, referencias)
+            if not estaticos:
+                continue
+
+            antes, depois = 0, 0
+            for nome in sorted(estaticos):
+                original, melhor = self._tamanhos(nome, manifesto)
+                antes += original
+                depois += melhor
+                if options['detalhes']:
+                    self.stdout.write(f"    {nome:<66} {original:>12} {melhor:>12}")
+
+            total_antes += antes
+            total_depois += depois
+            self.stdout.write(f"{pagina:<70} {antes:>12} {depois:>12} {self._economia(antes, depois):>9}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\nTotal: {total_antes} -> {total_depois} bytes ({self._economia(total_antes, total_depois)})"
+        ))
+
+    def _estaticos_da_pagina(self, pagina, referencias, visitados=None):
+        """Junta os {% static %} da página e dos templates que ela estende/inclui."""
+        visitados = visitados if visitados is not None else set()
+        if pagina in visitados or pagina not in referencias:
+            return set()
+        visitados.add(pagina)
+
+        estaticos, pais = referencias[pagina]
+        estaticos = set(estaticos)
+        for pai in pais:
+            estaticos |= self._estaticos_da_pagina(pai, referencias, visitados)
+        return estaticos
+
+    def _tamanhos(self, nome, manifesto):
+        original = finders.find(nome)
+        tamanho_original = os.path.getsize(original) if original else 0
+
+        nome_hash = manifesto.get(nome)
+        if not nome_hash:
+            return tamanho_original, tamanho_original
+
+        caminho = staticfiles_storage.path(nome_hash)
+        candidatos = [caminho] + [caminho + sufixo for sufixo in ('.br', '.gz', '.webp')]
+        tamanhos = [os.path.getsize(c) for c in candidatos if os.path.exists(c)]
+        return tamanho_original, min(tamanhos) if tamanhos else tamanho_original
+
+    @staticmethod
+    def _economia(antes, depois):
+        if not antes:
+            return '-'
+        return f"{100 * (antes - depois) / antes:.0f}%"
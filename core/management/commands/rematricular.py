@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import rematricula
+from core.models import Turma
+
+
+class Command(BaseCommand):
+    help = (
+        "Rematrícula da virada do ano: move cada turma para a do ano/módulo seguinte "
+        "(1º ANO → 2º ANO, I MÓDULO → II MÓDULO...). Use --dry-run para ver o diff antes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mapear', action='append', default=[], metavar='ORIGEM:DESTINO',
+                            help="Troca o destino sugerido de uma turma (ids). DESTINO vazio mantém a turma onde está.")
+        parser.add_argument('--so', type=int, action='append', dest='somente', metavar='TURMA',
+                            help="Só esta turma de origem (pode repetir).")
+        parser.add_argument('--ano-letivo', help="Carimbo das novas matrículas (padrão: ano.semestre atual).")
+        parser.add_argument('--criar-turmas', action='store_true',
+                            help="Cria a turma seguinte quando ela ainda não existe.")
+        parser.add_argument('--dry-run', action='store_true', help="Só mostra o que seria feito.")
+
+    def handle(self, *args, **options):
+        mapeamento = rematricula.sugerir_mapeamento()
+        turmas = Turma.objects.select_related('curso').in_bulk()
+
+        for item in options['mapear']:
+            origem, _, destino = item.partition(':')
+            try:
+                origem = turmas[int(origem)]
+                destino = turmas[int(destino)] if destino else None
+            except (KeyError, ValueError):
+                raise CommandError(f"Mapeamento inválido: {item}")
+            mapeamento[origem] = destino
+
+        if options['somente']:
+            mapeamento = {o: d for o, d in mapeamento.items() if o.pk in options['somente']}
+
+        total = 0
+        for linha in rematricula.planejar(mapeamento):
+            origem, destino = linha['origem'], linha['destino']
+            if destino is not None:
+                alvo = str(destino)
+                total += linha['alunos']
+            elif options['criar_turmas'] and rematricula.turma_seguinte_a_criar(origem):
+                alvo = f"{rematricula.turma_seguinte_a_criar(origem)} (nova)"
+                total += linha['alunos']
+            else:
+                alvo = "— (permanece)"
+            extra = f", {linha['ja_matriculados']} já no destino" if linha['ja_matriculados'] else ""
+            self.stdout.write(f"  [{origem.pk}] {origem}  →  {alvo}: {linha['alunos']} aluno(s){extra}")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Dry-run: {total} aluno(s) seriam movidos. Nada foi alterado."))
+            return
+
+        inicio = time.perf_counter()
+        movidos, criadas = rematricula.aplicar(mapeamento, options['ano_letivo'], options['criar_turmas'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {movidos} aluno(s) rematriculados, {criadas} turma(s) criadas em {time.perf_counter() - inicio:.2f}s"
+        ))
@@ -0,0 +1,97 @@
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from core import fila_tarefas
+
+
+def _executar(pk, worker):
+    close_old_connections()
+    try:
+        return fila_tarefas.executar(pk, worker)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        "Executa as tarefas em segundo plano (model Tarefa) num pool de threads ou processos. "
+        "A fila é o próprio banco: não precisa de broker externo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'TAREFAS_WORKERS', 2),
+                            help="Tarefas executadas ao mesmo tempo.")
+        parser.add_argument('--processos', action='store_true',
+                            help="Pool de processos em vez de threads (para tarefas que usam muita CPU).")
+        parser.add_argument('--intervalo', type=float, default=1.0,
+                            help="Segundos entre consultas quando a fila está vazia.")
+        parser.add_argument('--uma-vez', action='store_true',
+                            help="Executa o que estiver pronto e termina (para cron).")
+
+    def handle(self, *args, **options):
+        nome = f"{socket.gethostname()}:{os.getpid()}"
+        quantidade = max(options['workers'], 1)
+
+        if options['processos']:
+            # Conexões abertas não podem ser herdadas pelos processos filhos
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=quantidade, initializer=fila_tarefas.iniciar_processo_django)
+        else:
+            pool = ThreadPoolExecutor(max_workers=quantidade, thread_name_prefix='tarefa')
+
+        parar = []
+        signal.signal(signal.SIGTERM, lambda *_: parar.append(True))
+
+        recuperadas = fila_tarefas.recuperar_abandonadas()
+        removidas = fila_tarefas.limpar_concluidas()
+        self.stdout.write(self.style.SUCCESS(
+            f"Worker {nome}: {quantidade} {'processos' if options['processos'] else 'threads'} "
+            f"({recuperadas} tarefas abandonadas devolvidas à fila, {removidas} concluídas antigas removidas)"
+        ))
+
+        em_andamento = {}
+        concluidas = falhas = 0
+        ultima_recuperacao = time.monotonic()
+        try:
+            while not parar:
+                livres = quantidade - len(em_andamento)
+                reservadas = fila_tarefas.reservar(nome, livres) if livres else []
+                for pk in reservadas:
+                    em_andamento[pool.submit(_executar, pk, nome)] = pk
+
+                if not em_andamento:
+                    if options['uma_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                else:
+                    prontas, _ = wait(em_andamento, timeout=options['intervalo'], return_when=FIRST_COMPLETED)
+                    for futuro in prontas:
+                        pk = em_andamento.pop(futuro)
+                        try:
+                            ok = futuro.result()
+                        except Exception as erro:
+                            # Erro fora da tarefa (processo filho morto, banco travado...): ela volta à
+                            # fila por recuperar_abandonadas() quando passar do tempo limite
+                            self.stderr.write(f"Tarefa {pk}: {erro!r}")
+                            ok = False
+                        concluidas += bool(ok)
+                        falhas += not ok
+
+                if time.monotonic() - ultima_recuperacao > 60:
+                    fila_tarefas.recuperar_abandonadas()
+                    ultima_recuperacao = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # Termina o que já começou antes de sair
+            wait(em_andamento)
+            pool.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {concluidas} tarefas concluídas, {falhas} com erro"))
@@ -1,11 +1,18 @@
+import time
+
 from django.core.management.base import BaseCommand
-from core.models import Materia
+
+from core import seed
 
 class Command(BaseCommand):
     help = "Popula o banco de dados com as matérias básicas e técnicas do CEEP"
 
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Só mostra o que seria feito.")
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.NOTICE("🚀 Iniciando o seed de matérias..."))
+        inicio = time.perf_counter()
 
         # Matérias da base comum
         materias_base = [
@@ -23,20 +30,9 @@ class Command(BaseCommand):
         # Juntamos as duas listas
         todas_as_materias = materias_base + materias_tecnicas
         
-        materias_criadas = 0
-        materias_existentes = 0
-
-        for nome_materia in todas_as_materias:
-            # Usamos get_or_create para evitar duplicatas.
-            # Ele procura uma matéria com aquele nome. Se não achar, cria uma nova.
-            obj, criado = Materia.objects.get_or_create(nome=nome_materia)
-
-            if criado:
-                materias_criadas += 1
-                self.stdout.write(f"   - Matéria '{obj.nome}' criada.")
-            else:
-                materias_existentes += 1
-        
-        self.stdout.write(self.style.SUCCESS(f"\n✅ Seed finalizado!"))
+        # Compara sem diferenciar maiúsculas e cria só as que faltam, num único INSERT
+        _, materias_criadas = seed.aplicar_materias(todas_as_materias, dry_run=options['dry_run'])
+
+        self.stdout.write(self.style.SUCCESS(f"\n✅ Seed finalizado em {time.perf_counter() - inicio:.2f}s!"))
         self.stdout.write(f"   - Novas matérias criadas: {materias_criadas}")
-        self.stdout.write(f"   - Matérias que já existiam: {materias_existentes}")
\ No newline at end of file
+        self.stdout.write(f"   - Matérias que já existiam: {len(todas_as_materias) - materias_criadas}")
@@ -1,13 +1,18 @@
 # Em core/management/commands/seed_turmas.py
 
+import time
+
 from django.core.management.base import BaseCommand
-from core.models import Curso, Turma
-from django.db import IntegrityError
+
+from core import seed
 
 class Command(BaseCommand):
     help = "Popula o banco com a estrutura completa de cursos e turmas do CEEP Guanambi."
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Só mostra o que seria feito.")
+
+    def handle(self, *args, **options):
         cursos_dados = {
             # Eixo da Saúde
             "Análises Clínicas": {
@@ -80,34 +85,19 @@ class Command(BaseCommand):
         }
 
         self.stdout.write(self.style.NOTICE("🚀 Iniciando o seed de cursos e turmas..."))
-        
-        cursos_criados, cursos_atualizados, turmas_criadas, turmas_atualizadas = 0, 0, 0, 0
+        inicio = time.perf_counter()
 
+        cursos = {nome: dados["eixo"] for nome, dados in cursos_dados.items()}
+        turmas = []
         for nome_curso, dados_curso in cursos_dados.items():
-            curso, criado = Curso.objects.update_or_create(nome=nome_curso, defaults={'eixo': dados_curso["eixo"]})
-            if criado: cursos_criados += 1
-            else: cursos_atualizados += 1
-            
             for dados_turma in dados_curso["turmas"]:
-                if len(dados_turma) == 5:
-                    ano_modulo, turno, turma_nome, sala, modalidade = dados_turma
-                else:
-                    ano_modulo, turno, turma_nome, sala = dados_turma
-                    modalidade = None
-                
-                try:
-                    _, criado = Turma.objects.update_or_create(
-                        curso=curso, ano_modulo=ano_modulo, turno=turno,
-                        turma=turma_nome, modalidade=modalidade,
-                        defaults={'sala': sala} 
-                    )
-                    if criado: turmas_criadas += 1
-                    else: turmas_atualizadas += 1
-                except IntegrityError as e:
-                    self.stdout.write(self.style.WARNING(f"⚠️ Erro de integridade ao processar {curso}-{ano_modulo}: {e}"))
-        
-        self.stdout.write(self.style.SUCCESS(f"✅ Seed finalizado!"))
-        self.stdout.write(f"   - Cursos criados: {cursos_criados}")
-        self.stdout.write(f"   - Cursos atualizados: {cursos_atualizados}")
-        self.stdout.write(f"   - Turmas criadas: {turmas_criadas}")
-        self.stdout.write(f"   - Turmas atualizadas: {turmas_atualizadas}")
\ No newline at end of file
+                ano_modulo, turno, turma_nome, sala, modalidade = (*dados_turma, None)[:5]
+                turmas.append((nome_curso, ano_modulo, turno, turma_nome, modalidade, sala))
+
+        resultado = seed.carregar(cursos, turmas, dry_run=options['dry_run'])
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Seed finalizado em {time.perf_counter() - inicio:.2f}s!"))
+        for linha in seed.resumo(resultado):
+            self.stdout.write(f"   - {linha}")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("Dry-run: nada foi alterado."))
@@ -0,0 +1,160 @@
+"""
+Entrega autorizada dos arquivos de media (PDFs e anexos do estágio).
+
+Os arquivos ficam fora de qualquer rota pública: a view verifica se o usuário
+pode ver o documento e, em produção, delega o envio dos bytes ao servidor web
+(X-Accel-Redirect no Nginx, X-Sendfile no Apache/Lighttpd). Sem servidor na
+frente, o próprio Django responde com suporte a Range e GET condicional.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from core.permissoes import acesso
+
+CAMPOS_ARQUIVO = ('pdf_supervisor_assinado', 'arquivo_anexo')
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCO_LEITURA = 64 * 1024
+
+
+def usuario_pode_acessar_documento(user, documento):
+    """
+    Regra de acesso aos arquivos de um DocumentoEstagio (core.permissoes):
+    - o aluno dono do estágio;
+    - o professor orientador do estágio;
+    - o servidor administrativo do mesmo eixo do curso do aluno;
+    - a direção.
+    """
+    return acesso(user).pode_ver_documento(documento)
+
+
+def _etag_arquivo(stat):
+    return quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+
+
+def _nao_modificado(request, etag, mtime):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+def _intervalo_solicitado(request, tamanho, etag, mtime):
+    """
+    Retorna (inicio, fim) do cabeçalho Range (apenas um intervalo),
+    None para enviar o arquivo inteiro ou False se o intervalo for inválido.
+    """
+    cabecalho = request.headers.get('Range')
+    if not cabecalho or request.method != 'GET':
+        return None
+
+    # If-Range: se o arquivo mudou, ignora o Range e manda tudo
+    if_range = request.headers.get('If-Range')
+    if if_range:
+        if if_range.startswith(('"', 'W/')):
+            if if_range != etag:
+                return None
+        elif parse_http_date_safe(if_range) != int(mtime):
+            return None
+
+    match = RANGE_RE.match(cabecalho.strip())
+    if not match:
+        return None
+
+    inicio, fim = match.groups()
+    if inicio == '' and fim == '':
+        return False
+    if inicio == '':
+        # "bytes=-500" -> últimos 500 bytes
+        sufixo = int(fim)
+        if sufixo == 0:
+            return False
+        return max(tamanho - sufixo, 0), tamanho - 1
+
+    inicio = int(inicio)
+    fim = int(fim) if fim else tamanho - 1
+    if inicio >= tamanho or fim < inicio:
+        return False
+    return inicio, min(fim, tamanho - 1)
+
+
+def _ler_intervalo(caminho, inicio, tamanho):
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        restante = tamanho
+        while restante > 0:
+            bloco = arquivo.read(min(BLOCO_LEITURA, restante))
+            if not bloco:
+                break
+            restante -= len(bloco)
+            yield bloco
+
+
+def _resposta_python(request, caminho, content_type, stat, etag):
+    intervalo = _intervalo_solicitado(request, stat.st_size, etag, stat.st_mtime)
+
+    if intervalo is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f"bytes */{stat.st_size}"
+        return response
+
+    if intervalo is None:
+        response = FileResponse(open(caminho, 'rb'), content_type=content_type)
+    else:
+        inicio, fim = intervalo
+        tamanho = fim - inicio + 1
+        response = StreamingHttpResponse(
+            _ler_intervalo(caminho, inicio, tamanho), status=206, content_type=content_type
+        )
+        response['Content-Length'] = str(tamanho)
+        response['Content-Range'] = f"bytes {inicio}-{fim}/{stat.st_size}"
+
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def servir_arquivo(request, arquivo):
+    """
+    Monta a resposta para um FieldFile já autorizado.
+
+    settings.MEDIA_SERVE_BACKEND escolhe quem envia os bytes:
+    'nginx' (X-Accel-Redirect), 'apache' (X-Sendfile) ou 'python' (padrão).
+    """
+    caminho = arquivo.path
+    stat = os.stat(caminho)
+    etag = _etag_arquivo(stat)
+    nome_download = os.path.basename(arquivo.name)
+    content_type = mimetypes.guess_type(nome_download)[0] or 'application/octet-stream'
+
+    if _nao_modificado(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        return response
+
+    backend = getattr(settings, 'MEDIA_SERVE_BACKEND', 'python')
+
+    if backend == 'nginx':
+        # O Nginx cuida de Range/If-Range; o Django só autoriza.
+        prefixo = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/')
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(f"{prefixo}/{arquivo.name}")
+    elif backend == 'apache':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = caminho
+    else:
+        response = _resposta_python(request, caminho, content_type, stat, etag)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = 'private, no-cache'
+    response['Content-Disposition'] = f"inline; filename*=UTF-8''{quote(nome_download)}"
+    return response
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.2 on 2026-10-19 15:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def popular_estatisticas(apps, schema_editor):
+    Nota = apps.get_model('core', 'Nota')
+    EstatisticaNotaTurma = apps.get_model('core', 'EstatisticaNotaTurma')
+
+    reprovado = Q(status_final__in=['Reprovado', 'Reprovado na Final'])
+    linhas = (
+        Nota.objects.values('turma_id', 'materia_id')
+        .annotate(
+            total_notas=Count('id'),
+            notas_com_media=Count('media_final'),
+            soma_medias=Sum('media_final'),
+            aprovados=Count('id', filter=Q(status_final='Aprovado')),
+            reprovados=Count('id', filter=reprovado),
+        )
+        .order_by()
+    )
+    EstatisticaNotaTurma.objects.bulk_create([
+        EstatisticaNotaTurma(
+            pendentes=linha['total_notas'] - linha['aprovados'] - linha['reprovados'],
+            **{**linha, 'soma_medias': linha['soma_medias'] or 0},
+        )
+        for linha in linhas
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_alter_customuser_tipo_alter_documentoestagio_status_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstatisticaNotaTurma',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_notas', models.IntegerField(default=0)),
+                ('notas_com_media', models.IntegerField(default=0)),
+                ('soma_medias', models.FloatField(default=0)),
+                ('aprovados', models.IntegerField(default=0)),
+                ('reprovados', models.IntegerField(default=0)),
+                ('pendentes', models.IntegerField(default=0)),
+                ('materia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estatisticas_notas', to='core.materia')),
+                ('turma', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estatisticas_notas', to='core.turma')),
+            ],
+            options={
+                'verbose_name': 'Estatística de Notas',
+                'verbose_name_plural': 'Estatísticas de Notas',
+                'unique_together': {('turma', 'materia')},
+            },
+        ),
+        migrations.RunPython(popular_estatisticas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-19 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_estatisticanotaturma'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nota',
+            name='componentes',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.2 on 2026-10-19 15:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_tarefa'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notificacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fila', models.CharField(choices=[('RASCUNHO', 'Rascunho (Pelo Aluno)'), ('AGUARDANDO_ASSINATURA_PROF', 'Aguardando Assinatura (Professor)'), ('AGUARDANDO_ASSINATURA_DIR', 'Aguardando Assinatura (Direção)'), ('CONCLUIDO', 'Concluído'), ('REPROVADO', 'Reprovado (Pendente de Correção)')], max_length=30)),
+                ('criada_em', models.DateTimeField(auto_now_add=True)),
+                ('lote', models.CharField(blank=True, max_length=32)),
+                ('enviada_em', models.DateTimeField(blank=True, null=True)),
+                ('destinatario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificacoes', to=settings.AUTH_USER_MODEL)),
+                ('documento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificacoes', to='core.documentoestagio')),
+            ],
+            options={
+                'verbose_name': 'Notificação',
+                'verbose_name_plural': 'Notificações',
+                'indexes': [models.Index(fields=['enviada_em', 'destinatario'], name='notificacao_pendente_idx')],
+            },
+        ),
+    ]
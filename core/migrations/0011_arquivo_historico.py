@@ -0,0 +1,94 @@
+# Generated by Django 5.2.2 on 2026-10-19 15:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def carimbar_notas_existentes(apps, schema_editor):
+    """Período das notas já lançadas: o da matrícula do aluno na turma, ou o atual."""
+    import datetime
+
+    Nota = apps.get_model('core', 'Nota')
+    AlunoTurma = apps.get_model('core', 'AlunoTurma')
+
+    hoje = datetime.date.today()
+    atual = f"{hoje.year}.{1 if hoje.month <= 6 else 2}"
+    periodos = {
+        (aluno_id, turma_id): ano_letivo
+        for aluno_id, turma_id, ano_letivo in AlunoTurma.objects.values_list('aluno_id', 'turma_id', 'ano_letivo')
+    }
+    notas = list(Nota.objects.only('id', 'aluno_id', 'turma_id'))
+    for nota in notas:
+        nota.ano_letivo = periodos.get((nota.aluno_id, nota.turma_id)) or atual
+    Nota.objects.bulk_update(notas, ['ano_letivo'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_notificacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodoArquivado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano_letivo', models.CharField(max_length=10, unique=True)),
+                ('arquivado_em', models.DateTimeField(auto_now=True)),
+                ('notas', models.IntegerField(default=0)),
+                ('matriculas', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Período Arquivado',
+                'verbose_name_plural': 'Períodos Arquivados',
+                'ordering': ['-ano_letivo'],
+            },
+        ),
+        migrations.AddField(
+            model_name='nota',
+            name='ano_letivo',
+            field=models.CharField(blank=True, db_index=True, max_length=10),
+        ),
+        migrations.CreateModel(
+            name='AlunoTurmaArquivada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('id_original', models.BigIntegerField(unique=True)),
+                ('data_matricula', models.DateField()),
+                ('ano_letivo', models.CharField(blank=True, db_index=True, max_length=10, null=True)),
+                ('motivo', models.CharField(choices=[('PERIODO', 'Período arquivado'), ('REMATRICULA', 'Rematrícula')], max_length=12)),
+                ('aluno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matriculas_arquivadas', to=settings.AUTH_USER_MODEL)),
+                ('turma', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matriculas_arquivadas', to='core.turma')),
+            ],
+            options={
+                'verbose_name': 'Matrícula Arquivada',
+                'verbose_name_plural': 'Matrículas Arquivadas',
+            },
+        ),
+        migrations.CreateModel(
+            name='NotaArquivada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('id_original', models.BigIntegerField(unique=True)),
+                ('ano_letivo', models.CharField(db_index=True, max_length=10)),
+                ('nota_1', models.FloatField(blank=True, null=True)),
+                ('nota_2', models.FloatField(blank=True, null=True)),
+                ('nota_3', models.FloatField(blank=True, null=True)),
+                ('nota_recuperacao', models.FloatField(blank=True, null=True)),
+                ('componentes', models.JSONField(blank=True, default=dict)),
+                ('media_final', models.FloatField(blank=True, null=True)),
+                ('status_final', models.CharField(blank=True, max_length=30)),
+                ('aluno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notas_arquivadas', to=settings.AUTH_USER_MODEL)),
+                ('materia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notas_arquivadas', to='core.materia')),
+                ('turma', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notas_arquivadas', to='core.turma')),
+            ],
+            options={
+                'verbose_name': 'Nota Arquivada',
+                'verbose_name_plural': 'Notas Arquivadas',
+                'indexes': [models.Index(fields=['aluno', 'ano_letivo'], name='nota_arquivada_aluno_idx')],
+            },
+        ),
+        migrations.RunPython(carimbar_notas_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.2 on 2026-10-19 15:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_arquivo_historico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricoPeriodo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano_letivo', models.CharField(max_length=10)),
+                ('curso', models.CharField(max_length=100)),
+                ('turma_nome', models.CharField(max_length=200)),
+                ('ano_modulo', models.CharField(max_length=20)),
+                ('disciplinas', models.JSONField(default=list)),
+                ('ch_total', models.IntegerField(default=0)),
+                ('ch_aprovada', models.IntegerField(default=0)),
+                ('congelado_em', models.DateTimeField(auto_now_add=True)),
+                ('aluno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historicos', to=settings.AUTH_USER_MODEL)),
+                ('turma', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historicos', to='core.turma')),
+            ],
+            options={
+                'verbose_name': 'Histórico do Período',
+                'verbose_name_plural': 'Históricos dos Períodos',
+                'ordering': ['ano_letivo', 'ano_modulo'],
+                'constraints': [models.UniqueConstraint(fields=('aluno', 'ano_letivo', 'turma'), name='historico_periodo_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.2 on 2026-10-19 15:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def popular_atribuicoes(apps, schema_editor):
+    Vinculo = apps.get_model('core', 'ProfessorMateriaAnoCursoModalidade')
+    Turma = apps.get_model('core', 'Turma')
+    AtribuicaoProfessor = apps.get_model('core', 'AtribuicaoProfessor')
+
+    turmas = {}
+    for turma_id, *chave in Turma.objects.values_list('id', 'curso_id', 'ano_modulo', 'modalidade'):
+        turmas.setdefault(tuple(chave), []).append(turma_id)
+    AtribuicaoProfessor.objects.bulk_create([
+        AtribuicaoProfessor(vinculo_id=vinculo_id, professor_id=professor_id, materia_id=materia_id, turma_id=turma_id)
+        for vinculo_id, professor_id, materia_id, *chave in Vinculo.objects.values_list(
+            'id', 'professor_id', 'materia_id', 'curso_id', 'ano_modulo', 'modalidade'
+        )
+        for turma_id in turmas.get(tuple(chave), ())
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_historicoperiodo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AtribuicaoProfessor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('materia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='atribuicoes', to='core.materia')),
+                ('professor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='atribuicoes', to=settings.AUTH_USER_MODEL)),
+                ('turma', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='atribuicoes', to='core.turma')),
+                ('vinculo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='atribuicoes', to='core.professormateriaanocursomodalidade')),
+            ],
+            options={
+                'verbose_name': 'Atribuição de Professor',
+                'verbose_name_plural': 'Atribuições de Professores',
+                'unique_together': {('professor', 'materia', 'turma')},
+            },
+        ),
+        migrations.RunPython(popular_atribuicoes, migrations.RunPython.noop),
+    ]
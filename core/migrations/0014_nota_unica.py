@@ -0,0 +1,70 @@
+# Generated by Django 5.2.2 on 2026-10-19 16:20
+
+from django.db import migrations
+from django.db.models import Count, Max, Q, Sum
+
+
+def remover_duplicadas(apps, schema_editor):
+    """
+    Antes da chave única: fica só a nota mais recente (maior id) de cada
+    aluno/matéria/turma, que é a que a planilha de notas já mostrava.
+    """
+    Nota = apps.get_model('core', 'Nota')
+    EstatisticaNotaTurma = apps.get_model('core', 'EstatisticaNotaTurma')
+
+    turma_ids = set(
+        Nota.objects.values('aluno_id', 'materia_id', 'turma_id')
+        .annotate(quantidade=Count('id'))
+        .filter(quantidade__gt=1)
+        .order_by()
+        .values_list('turma_id', flat=True)
+    )
+    if not turma_ids:
+        return
+
+    # Um DELETE só: tudo o que não é o maior id do seu grupo
+    mais_recentes = (
+        Nota.objects.values('aluno_id', 'materia_id', 'turma_id')
+        .annotate(manter=Max('id'))
+        .order_by()
+        .values('manter')
+    )
+    Nota.objects.exclude(id__in=mais_recentes).delete()
+
+    # Mesma conta do EstatisticaNotaTurma.reconstruir(), só para as turmas afetadas
+    EstatisticaNotaTurma.objects.filter(turma_id__in=turma_ids).delete()
+    reprovado = Q(status_final__in=['Reprovado', 'Reprovado na Final'])
+    linhas = (
+        Nota.objects.filter(turma_id__in=turma_ids)
+        .values('turma_id', 'materia_id')
+        .annotate(
+            total_notas=Count('id'),
+            notas_com_media=Count('media_final'),
+            soma_medias=Sum('media_final'),
+            aprovados=Count('id', filter=Q(status_final='Aprovado')),
+            reprovados=Count('id', filter=reprovado),
+        )
+        .order_by()
+    )
+    EstatisticaNotaTurma.objects.bulk_create([
+        EstatisticaNotaTurma(
+            pendentes=linha['total_notas'] - linha['aprovados'] - linha['reprovados'],
+            **{**linha, 'soma_medias': linha['soma_medias'] or 0},
+        )
+        for linha in linhas
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_atribuicaoprofessor'),
+    ]
+
+    operations = [
+        migrations.RunPython(remover_duplicadas, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='nota',
+            unique_together={('aluno', 'materia', 'turma')},
+        ),
+    ]
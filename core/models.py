@@ -1,10 +1,19 @@
-from django.db import models
+from django.db import models, transaction, connection, IntegrityError
+from django.db.models import F
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 import datetime
 import random
-from django.db.models.signals import pre_delete, pre_save
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
 from django.dispatch import receiver
-import os
+
+from core.cache_versoes import invalidar_versao
+from core.politicas_notas import politica_da_turma
+from core.fila_assinaturas import deltas_da_mudanca, publicar_deltas
+from core.painel_admin import invalidar_contadores_admin
+from core.tarefas import apagar_arquivos, definir_senha_inicial
+from core.notificacoes import registrar_notificacoes
+from core.orientadores import invalidar_diretorio
 
 
 class CustomUser(AbstractUser):
@@ -158,6 +167,78 @@ class ProfessorMateriaAnoCursoModalidade(models.Model):
         return f"{self.professor.get_full_name()} - {self.materia.nome} ({self.curso.nome} - {self.ano_modulo} {self.modalidade})"
 
 
+class AtribuicaoProfessor(models.Model):
+    """
+    Cada (matéria, turma) concreta que um professor leciona: o vínculo
+    (curso, ano/módulo, modalidade) já resolvido para as turmas. Mantida
+    pelos receivers de ProfessorMateriaAnoCursoModalidade e Turma (apagar
+    um ou outro apaga as linhas em cascata); as cargas em lote chamam
+    reconstruir().
+    Reconstrução completa: python manage.py reconstruir_atribuicoes
+    """
+    vinculo = models.ForeignKey(ProfessorMateriaAnoCursoModalidade, on_delete=models.CASCADE, related_name='atribuicoes')
+    professor = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='atribuicoes')
+    materia = models.ForeignKey(Materia, on_delete=models.CASCADE, related_name='atribuicoes')
+    turma = models.ForeignKey(Turma, on_delete=models.CASCADE, related_name='atribuicoes')
+
+    class Meta:
+        unique_together = ('professor', 'materia', 'turma')
+        verbose_name = "Atribuição de Professor"
+        verbose_name_plural = "Atribuições de Professores"
+
+    def __str__(self):
+        return f"{self.professor.get_full_name()} - {self.materia.nome} ({self.turma})"
+
+    @classmethod
+    def reconstruir(cls, vinculo_ids=None, turma_ids=None, professor_ids=None):
+        """
+        Refaz as atribuições com SQL de conjunto (DELETE + INSERT ... SELECT
+        com JOIN vínculo x turma): todas, ou só as dos vínculos/turmas/
+        professores informados.
+        """
+        filtros, filtros_select, parametros = [], [], []
+        for coluna, coluna_select, ids in (
+            ('vinculo_id', 'v.id', vinculo_ids),
+            ('turma_id', 't.id', turma_ids),
+            ('professor_id', 'v.professor_id', professor_ids),
+        ):
+            if ids is None:
+                continue
+            ids = [i for i in ids if i is not None]
+            if not ids:
+                return
+            marcadores = ', '.join(['%s'] * len(ids))
+            filtros.append(f"{coluna} IN ({marcadores})")
+            filtros_select.append(f"{coluna_select} IN ({marcadores})")
+            parametros += ids
+        filtro = f"WHERE {' AND '.join(filtros)}" if filtros else ''
+        filtro_select = f"WHERE {' AND '.join(filtros_select)}" if filtros else ''
+
+        tabela = cls._meta.db_table
+        tabela_vinculo = ProfessorMateriaAnoCursoModalidade._meta.db_table
+        tabela_turma = Turma._meta.db_table
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {tabela} {filtro}", parametros)
+            cursor.execute(
+                f"""
+                INSERT INTO {tabela} (vinculo_id, professor_id, materia_id, turma_id)
+                SELECT v.id, v.professor_id, v.materia_id, t.id
+                FROM {tabela_vinculo} AS v
+                JOIN {tabela_turma} AS t
+                  ON t.curso_id = v.curso_id AND t.ano_modulo = v.ano_modulo AND t.modalidade = v.modalidade
+                {filtro_select}
+                """,
+                parametros,
+            )
+
+
+def ano_letivo_atual():
+    """Período letivo de hoje no formato 'ano.semestre' (ex.: '2025.1')."""
+    hoje = datetime.date.today()
+    return f"{hoje.year}.{1 if hoje.month <= 6 else 2}"
+
+
 class AlunoTurma(models.Model):
     aluno = models.ForeignKey(CustomUser, on_delete=models.CASCADE, limit_choices_to={'tipo': 'aluno'})
     turma = models.ForeignKey(Turma, on_delete=models.CASCADE)
@@ -169,15 +250,63 @@ class AlunoTurma(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.pk:
-            hoje = datetime.date.today()
-            semestre = 1 if hoje.month <= 6 else 2
-            self.ano_letivo = f"{hoje.year}.{semestre}"
+            self.ano_letivo = ano_letivo_atual()
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.aluno.get_full_name()} - {self.turma}"
 
 
+class NotaQuerySet(models.QuerySet):
+    """
+    As operações em lote não passam pelo Nota.save(): recalculamos a
+    EstatisticaNotaTurma das turmas afetadas na mesma transação e trocamos
+    o carimbo de versão de Nota (fragmentos e ETag da planilha de notas).
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        Nota.carimbar_periodo(objs)
+        with transaction.atomic(using=self.db):
+            criadas = super().bulk_create(objs, *args, **kwargs)
+            EstatisticaNotaTurma.reconstruir(turma_ids={obj.turma_id for obj in objs})
+        invalidar_versao('Nota')
+        return criadas
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            linhas = super().bulk_update(objs, fields, batch_size=batch_size)
+            EstatisticaNotaTurma.reconstruir(turma_ids={obj.turma_id for obj in objs})
+        invalidar_versao('Nota')
+        return linhas
+
+    def gravar(self, aluno_id, materia_id, turma, dados):
+        """
+        Lança ou corrige a nota do aluno na matéria/turma com um só
+        INSERT ... ON CONFLICT DO UPDATE (chave única aluno/matéria/turma),
+        já com media_final e status_final calculados. Não há leitura antes da
+        escrita, então dois lançamentos simultâneos nunca criam duas linhas:
+        o último vence. Retorna a Nota gravada (com pk).
+        """
+        nota = Nota(aluno_id=aluno_id, materia_id=materia_id, turma=turma)
+        nota.definir_componentes(dados)
+        Nota.carimbar_periodo([nota])
+        nota.media_final, nota.status_final = nota.politica().avaliar(nota.valores_componentes())
+        with transaction.atomic(using=self.db):
+            super().bulk_create(
+                [nota],
+                update_conflicts=True,
+                unique_fields=['aluno', 'materia', 'turma'],
+                update_fields=[*Nota.COLUNAS_COMPONENTES, 'componentes', 'media_final', 'status_final'],
+            )
+            # Sem o valor anterior não dá para aplicar a diferença: refaz só o par turma/matéria
+            EstatisticaNotaTurma.reconstruir(turma_ids=[turma.pk], materia_ids=[materia_id])
+        invalidar_versao('Nota')
+        nota._contribuicao_salva = nota._contribuicao()
+        return nota
+
+
 class Nota(models.Model):
     aluno = models.ForeignKey(CustomUser, on_delete=models.CASCADE, limit_choices_to={'tipo': 'aluno'})
     materia = models.ForeignKey(Materia, on_delete=models.CASCADE)
@@ -187,37 +316,226 @@ class Nota(models.Model):
     nota_2 = models.FloatField(null=True, blank=True)
     nota_3 = models.FloatField(null=True, blank=True)
     nota_recuperacao = models.FloatField(null=True, blank=True)
+    # Componentes da política da modalidade sem coluna própria (ex.: nota_1_semestre1, paralela_1)
+    componentes = models.JSONField(default=dict, blank=True)
     media_final = models.FloatField(null=True, blank=True)
     status_final = models.CharField(max_length=30, blank=True)
+    # Período letivo da nota (o da matrícula na turma). Períodos fechados vão
+    # para NotaArquivada (core.arquivo) e saem desta tabela.
+    ano_letivo = models.CharField(max_length=10, blank=True, db_index=True)
+
+    COLUNAS_COMPONENTES = ('nota_1', 'nota_2', 'nota_3', 'nota_recuperacao')
+
+    objects = NotaQuerySet.as_manager()
+
+    class Meta:
+        # Uma nota por aluno/matéria/turma: é a chave do upsert de NotaQuerySet.gravar()
+        unique_together = ('aluno', 'materia', 'turma')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda o que a nota já contava na estatística, para o save() só aplicar a diferença
+        instance._contribuicao_salva = instance._contribuicao()
+        return instance
+
+    def _contribuicao(self):
+        return (self.turma_id, self.materia_id, self.media_final, self.status_final)
+
+    def politica(self):
+        """Política de avaliação da modalidade da turma (core.politicas_notas)."""
+        return politica_da_turma(self.turma)
+
+    def valores_componentes(self):
+        """Todos os componentes lançados: as colunas fixas mais o JSON `componentes`."""
+        valores = {campo: getattr(self, campo) for campo in self.COLUNAS_COMPONENTES}
+        valores.update(self.componentes or {})
+        return valores
+
+    def definir_componentes(self, dados):
+        """
+        Grava os componentes da política a partir de um dict (ex.: o POST do
+        professor): os que têm coluna própria vão para ela, o resto para o JSON.
+        """
+        componentes = {}
+        for nome in self.politica().componentes:
+            valor = dados.get(nome)
+            if nome in self.COLUNAS_COMPONENTES:
+                setattr(self, nome, valor)
+            else:
+                componentes[nome] = valor
+        self.componentes = componentes
 
     def calcular_media(self):
-        notas = [self.nota_1, self.nota_2, self.nota_3]
-        notas_validas = [n for n in notas if n is not None]
-        if not notas_validas:
-            return None
-        return sum(notas_validas) / len(notas_validas)
+        return self.politica().avaliar(self.valores_componentes())[0]
 
     def calcular_status(self):
-        media = self.calcular_media()
-        if media is None:
-            return "Pendente"
-        if media >= 5:
-            return "Aprovado"
-        elif self.nota_recuperacao is not None:
-            final = (media + self.nota_recuperacao) / 2
-            return "Aprovado" if final >= 5 else "Reprovado na Final"
-        else:
-            return "Reprovado"
+        return self.politica().avaliar(self.valores_componentes())[1]
+
+    @classmethod
+    def carimbar_periodo(cls, notas):
+        """Preenche ano_letivo das notas sem período com o da matrícula do aluno na turma."""
+        sem_periodo = [nota for nota in notas if not nota.ano_letivo]
+        if not sem_periodo:
+            return
+        periodos = dict(
+            ((aluno_id, turma_id), ano_letivo)
+            for aluno_id, turma_id, ano_letivo in AlunoTurma.objects.filter(
+                turma_id__in={nota.turma_id for nota in sem_periodo},
+            ).values_list('aluno_id', 'turma_id', 'ano_letivo')
+        )
+        atual = ano_letivo_atual()
+        for nota in sem_periodo:
+            nota.ano_letivo = periodos.get((nota.aluno_id, nota.turma_id)) or atual
 
     def save(self, *args, **kwargs):
-        self.media_final = self.calcular_media()
-        self.status_final = self.calcular_status()
-        super().save(*args, **kwargs)
+        if not self.ano_letivo:
+            Nota.carimbar_periodo([self])
+        # (core.motor_notas faz a mesma conta em lote com o avaliador NumPy da política)
+        self.media_final, self.status_final = self.politica().avaliar(self.valores_componentes())
+        anterior = getattr(self, '_contribuicao_salva', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            EstatisticaNotaTurma.aplicar_diferenca(anterior, self._contribuicao())
+        self._contribuicao_salva = self._contribuicao()
 
     def __str__(self):
         return f"{self.aluno.get_full_name()} - {self.materia.nome} - {self.status_final}"
 
 
+class EstatisticaNotaTurma(models.Model):
+    """
+    Resumo das notas de cada turma/matéria, mantido pelo Nota.save() (diferença
+    incremental) e pelas operações em lote do NotaQuerySet. Os relatórios leem
+    daqui e nunca agregam a tabela de notas na hora da requisição.
+    Reconstrução completa: python manage.py rebuild_grade_stats
+    """
+    turma = models.ForeignKey(Turma, on_delete=models.CASCADE, related_name='estatisticas_notas')
+    materia = models.ForeignKey(Materia, on_delete=models.CASCADE, related_name='estatisticas_notas')
+
+    total_notas = models.IntegerField(default=0)
+    notas_com_media = models.IntegerField(default=0)
+    soma_medias = models.FloatField(default=0)
+    aprovados = models.IntegerField(default=0)
+    reprovados = models.IntegerField(default=0)
+    pendentes = models.IntegerField(default=0)
+
+    STATUS_APROVADO = ('Aprovado',)
+    STATUS_REPROVADO = ('Reprovado', 'Reprovado na Final')
+
+    class Meta:
+        unique_together = ('turma', 'materia')
+        verbose_name = "Estatística de Notas"
+        verbose_name_plural = "Estatísticas de Notas"
+
+    def __str__(self):
+        return f"{self.turma} - {self.materia.nome}"
+
+    @property
+    def media(self):
+        if not self.notas_com_media:
+            return None
+        return self.soma_medias / self.notas_com_media
+
+    @property
+    def taxa_aprovacao(self):
+        """Percentual de aprovados entre as notas já fechadas (sem as pendentes)."""
+        avaliados = self.aprovados + self.reprovados
+        if not avaliados:
+            return None
+        return 100 * self.aprovados / avaliados
+
+    @classmethod
+    def _campo_status(cls, status):
+        if status in cls.STATUS_APROVADO:
+            return 'aprovados'
+        if status in cls.STATUS_REPROVADO:
+            return 'reprovados'
+        return 'pendentes'
+
+    @classmethod
+    def aplicar_diferenca(cls, anterior, atual):
+        """
+        Tira a contribuição 'anterior' e soma a 'atual' de uma nota.
+        Cada uma é (turma_id, materia_id, media_final, status_final) ou None.
+        """
+        if anterior == atual:
+            return
+
+        deltas = {}
+        for contribuicao, sinal in ((anterior, -1), (atual, 1)):
+            if contribuicao is None:
+                continue
+            turma_id, materia_id, media, status = contribuicao
+            delta = deltas.setdefault((turma_id, materia_id), {})
+            delta['total_notas'] = delta.get('total_notas', 0) + sinal
+            if media is not None:
+                delta['notas_com_media'] = delta.get('notas_com_media', 0) + sinal
+                delta['soma_medias'] = delta.get('soma_medias', 0) + sinal * media
+            campo = cls._campo_status(status)
+            delta[campo] = delta.get(campo, 0) + sinal
+
+        for (turma_id, materia_id), delta in deltas.items():
+            delta = {campo: valor for campo, valor in delta.items() if valor}
+            if not delta:
+                continue
+            atualizacao = {campo: F(campo) + valor for campo, valor in delta.items()}
+            if cls.objects.filter(turma_id=turma_id, materia_id=materia_id).update(**atualizacao):
+                continue
+            if delta.get('total_notas', 0) <= 0:
+                # Sem linha para descontar (ex.: a turma inteira foi apagada em cascata)
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(turma_id=turma_id, materia_id=materia_id, **delta)
+            except IntegrityError:
+                # Outra requisição criou a linha no meio do caminho
+                cls.objects.filter(turma_id=turma_id, materia_id=materia_id).update(**atualizacao)
+
+    @classmethod
+    def reconstruir(cls, turma_ids=None, materia_ids=None):
+        """
+        Recalcula o resumo com SQL de conjunto (DELETE + INSERT ... SELECT
+        ... GROUP BY), para todas as turmas ou só para as informadas (e, se
+        materia_ids vier, só para essas matérias delas).
+        """
+        condicoes, parametros = [], []
+        for coluna, ids in (('turma_id', turma_ids), ('materia_id', materia_ids)):
+            if ids is None:
+                continue
+            ids = [i for i in ids if i is not None]
+            if not ids:
+                return
+            condicoes.append(f"{coluna} IN ({', '.join(['%s'] * len(ids))})")
+            parametros.extend(ids)
+
+        tabela = cls._meta.db_table
+        tabela_nota = Nota._meta.db_table
+        filtro = f"WHERE {' AND '.join(condicoes)}" if condicoes else ''
+
+        aprovados = ', '.join(['%s'] * len(cls.STATUS_APROVADO))
+        reprovados = ', '.join(['%s'] * len(cls.STATUS_REPROVADO))
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {tabela} {filtro}", parametros)
+            cursor.execute(
+                f"""
+                INSERT INTO {tabela}
+                    (turma_id, materia_id, total_notas, notas_com_media, soma_medias,
+                     aprovados, reprovados, pendentes)
+                SELECT turma_id, materia_id, COUNT(*), COUNT(media_final), COALESCE(SUM(media_final), 0),
+                       SUM(CASE WHEN status_final IN ({aprovados}) THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN status_final IN ({reprovados}) THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN status_final IN ({aprovados}, {reprovados}) THEN 0 ELSE 1 END)
+                FROM {tabela_nota}
+                {filtro}
+                GROUP BY turma_id, materia_id
+                """,
+                list(cls.STATUS_APROVADO) + list(cls.STATUS_REPROVADO)
+                + list(cls.STATUS_APROVADO) + list(cls.STATUS_REPROVADO) + parametros,
+            )
+
+
 class Estagio(models.Model):
     # ==========================================================
     # 🎯 CORREÇÃO 1: Simplificar os status do Dossiê
@@ -302,8 +620,184 @@ class DocumentoEstagio(models.Model):
     class Meta:
         unique_together = ('estagio', 'tipo_documento')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Status gravado, para saber se o save() tirou/colocou o documento numa fila
+        instance._status_salvo = instance.status if 'status' in field_names else None
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Numa transação só com os receivers de post_save: a notificação da
+        # fila (Notificacao) é gravada junto com a mudança de status
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.get_tipo_documento_display()} - {self.estagio.aluno.get_full_name()}"
+
+
+class Notificacao(models.Model):
+    """
+    Caixa de saída (outbox) das notificações por e-mail. Gravada na mesma
+    transação da mudança de status do documento e enviada depois, em um
+    resumo por destinatário (core.notificacoes.enviar_resumos).
+    """
+    destinatario = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='notificacoes')
+    documento = models.ForeignKey(DocumentoEstagio, on_delete=models.CASCADE, related_name='notificacoes')
+    fila = models.CharField(max_length=30, choices=DocumentoEstagio.STATUS_CHOICES)
+
+    criada_em = models.DateTimeField(auto_now_add=True)
+    # Marca de quem está enviando (evita que dois workers mandem o mesmo resumo)
+    lote = models.CharField(max_length=32, blank=True)
+    enviada_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['enviada_em', 'destinatario'], name='notificacao_pendente_idx')]
+        verbose_name = "Notificação"
+        verbose_name_plural = "Notificações"
+
+    def __str__(self):
+        return f"{self.destinatario} - {self.documento_id} ({self.get_fila_display()})"
+
+
+# ==========================================================
+# Arquivo histórico (core.arquivo): períodos letivos fechados saem das
+# tabelas vivas (Nota, AlunoTurma) e ficam nestas, só para consulta.
+# ==========================================================
+class PeriodoArquivado(models.Model):
+    ano_letivo = models.CharField(max_length=10, unique=True)
+    arquivado_em = models.DateTimeField(auto_now=True)
+    notas = models.IntegerField(default=0)
+    matriculas = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-ano_letivo']
+        verbose_name = "Período Arquivado"
+        verbose_name_plural = "Períodos Arquivados"
+
+    def __str__(self):
+        return self.ano_letivo
+
+
+class NotaArquivada(models.Model):
+    """Cópia imutável de uma Nota de período fechado (mesmas colunas, mais o id original)."""
+    id_original = models.BigIntegerField(unique=True)
+    aluno = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='notas_arquivadas')
+    materia = models.ForeignKey(Materia, on_delete=models.CASCADE, related_name='notas_arquivadas')
+    turma = models.ForeignKey(Turma, on_delete=models.CASCADE, related_name='notas_arquivadas')
+    ano_letivo = models.CharField(max_length=10, db_index=True)
+
+    nota_1 = models.FloatField(null=True, blank=True)
+    nota_2 = models.FloatField(null=True, blank=True)
+    nota_3 = models.FloatField(null=True, blank=True)
+    nota_recuperacao = models.FloatField(null=True, blank=True)
+    componentes = models.JSONField(default=dict, blank=True)
+    media_final = models.FloatField(null=True, blank=True)
+    status_final = models.CharField(max_length=30, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['aluno', 'ano_letivo'], name='nota_arquivada_aluno_idx')]
+        verbose_name = "Nota Arquivada"
+        verbose_name_plural = "Notas Arquivadas"
+
+    def __str__(self):
+        return f"{self.aluno.get_full_name()} - {self.materia.nome} ({self.ano_letivo})"
+
+
+class AlunoTurmaArquivada(models.Model):
+    """Matrícula encerrada: período arquivado ou turma deixada na rematrícula."""
+    id_original = models.BigIntegerField(unique=True)
+    aluno = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='matriculas_arquivadas')
+    turma = models.ForeignKey(Turma, on_delete=models.CASCADE, related_name='matriculas_arquivadas')
+    data_matricula = models.DateField()
+    ano_letivo = models.CharField(max_length=10, blank=True, null=True, db_index=True)
+    motivo = models.CharField(max_length=12, choices=[
+        ('PERIODO', 'Período arquivado'),
+        ('REMATRICULA', 'Rematrícula'),
+    ])
+
+    class Meta:
+        verbose_name = "Matrícula Arquivada"
+        verbose_name_plural = "Matrículas Arquivadas"
+
+    def __str__(self):
+        return f"{self.aluno.get_full_name()} - {self.turma} ({self.ano_letivo})"
+
+
+class HistoricoPeriodo(models.Model):
+    """
+    Retrato congelado de um período do aluno numa turma, para o histórico
+    escolar (core.historico): nomes, carga horária, médias e situação como
+    estavam quando o período fechou. Não é alterado depois de criado; se o
+    período é restaurado, o retrato é apagado e gravado de novo no próximo
+    arquivamento.
+    """
+    aluno = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='historicos')
+    turma = models.ForeignKey(Turma, on_delete=models.SET_NULL, null=True, related_name='historicos')
+    ano_letivo = models.CharField(max_length=10)
+
+    curso = models.CharField(max_length=100)
+    turma_nome = models.CharField(max_length=200)
+    ano_modulo = models.CharField(max_length=20)
+    # [{'materia', 'ch', 'media', 'status'}], em ordem de matéria
+    disciplinas = models.JSONField(default=list)
+    ch_total = models.IntegerField(default=0)
+    ch_aprovada = models.IntegerField(default=0)
+    congelado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['ano_letivo', 'ano_modulo']
+        constraints = [
+            models.UniqueConstraint(fields=['aluno', 'ano_letivo', 'turma'], name='historico_periodo_unico'),
+        ]
+        verbose_name = "Histórico do Período"
+        verbose_name_plural = "Históricos dos Períodos"
+
+    def __str__(self):
+        return f"{self.aluno.get_full_name()} - {self.turma_nome} ({self.ano_letivo})"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("O histórico de um período fechado não pode ser alterado.")
+        super().save(*args, **kwargs)
+
+
+class Tarefa(models.Model):
+    """
+    Trabalho lento tirado da requisição (hash de senha, remoção de arquivos,
+    geração de PDF...). Enfileirado por core.fila_tarefas.enfileirar e
+    executado por 'python manage.py run_workers'; o próprio banco é a fila.
+    """
+    STATUS_CHOICES = [
+        ('PENDENTE', 'Pendente'),
+        ('EXECUTANDO', 'Executando'),
+        ('CONCLUIDA', 'Concluída'),
+        ('FALHOU', 'Falhou'),
+    ]
+
+    funcao = models.CharField(max_length=200, help_text="Caminho da função marcada com @tarefa.")
+    argumentos = models.JSONField(default=dict, blank=True)
+    prioridade = models.SmallIntegerField(default=0, help_text="Maior roda primeiro.")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDENTE')
+
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    max_tentativas = models.PositiveSmallIntegerField(default=3)
+    executar_apos = models.DateTimeField(default=timezone.now)
+    ultimo_erro = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+
+    criada_em = models.DateTimeField(auto_now_add=True)
+    iniciada_em = models.DateTimeField(null=True, blank=True)
+    concluida_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', '-prioridade', 'executar_apos'], name='tarefa_fila_idx')]
+        verbose_name = "Tarefa"
+        verbose_name_plural = "Tarefas"
+
+    def __str__(self):
+        return f"{self.funcao} ({self.get_status_display()})"
     
     
 # ==========================================================
@@ -311,18 +805,15 @@ class DocumentoEstagio(models.Model):
 # ==========================================================
 @receiver(pre_delete, sender=DocumentoEstagio)
 def apagar_pdf_ao_excluir_documento(sender, instance, **kwargs):
-    """Remove o arquivo físico quando o DocumentoEstagio é deletado."""
-    if instance.pdf_supervisor_assinado:
-        if os.path.isfile(instance.pdf_supervisor_assinado.path):
-            os.remove(instance.pdf_supervisor_assinado.path)
-    if instance.arquivo_anexo:
-        if os.path.isfile(instance.arquivo_anexo.path):
-            os.remove(instance.arquivo_anexo.path)
+    """Agenda a remoção dos arquivos físicos quando o DocumentoEstagio é deletado."""
+    nomes = [arquivo.name for arquivo in (instance.pdf_supervisor_assinado, instance.arquivo_anexo) if arquivo]
+    if nomes:
+        apagar_arquivos.enfileirar(nomes)
 
 @receiver(pre_save, sender=DocumentoEstagio)
 def substituir_pdf_antigo(sender, instance, **kwargs):
     """
-    Quando um novo PDF é enviado, apaga o antigo automaticamente do disco
+    Quando um novo PDF é enviado, agenda a remoção do antigo do disco
     para não acumular arquivos.
     """
     if not instance.pk:
@@ -333,16 +824,104 @@ def substituir_pdf_antigo(sender, instance, **kwargs):
     except DocumentoEstagio.DoesNotExist:
         return
 
-    # Compara o pdf_supervisor_assinado
-    old_file_supervisor = old_instance.pdf_supervisor_assinado
-    new_file_supervisor = instance.pdf_supervisor_assinado
-    if old_file_supervisor and old_file_supervisor != new_file_supervisor:
-        if os.path.isfile(old_file_supervisor.path):
-            os.remove(old_file_supervisor.path)
-            
-    # Compara o arquivo_anexo
-    old_file_anexo = old_instance.arquivo_anexo
-    new_file_anexo = instance.arquivo_anexo
-    if old_file_anexo and old_file_anexo != new_file_anexo:
-        if os.path.isfile(old_file_anexo.path):
-            os.remove(old_file_anexo.path)
\ No newline at end of file
+    nomes = []
+    for campo in ('pdf_supervisor_assinado', 'arquivo_anexo'):
+        antigo, novo = getattr(old_instance, campo), getattr(instance, campo)
+        if antigo and antigo != novo:
+            nomes.append(antigo.name)
+    if nomes:
+        apagar_arquivos.enfileirar(nomes)
+
+
+@receiver(post_save, sender=ProfessorMateriaAnoCursoModalidade)
+def atualizar_atribuicoes_do_vinculo(sender, instance, **kwargs):
+    AtribuicaoProfessor.reconstruir(vinculo_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Turma)
+def atualizar_atribuicoes_da_turma(sender, instance, **kwargs):
+    AtribuicaoProfessor.reconstruir(turma_ids=[instance.pk])
+
+
+@receiver(post_save, sender=CustomUser)
+def agendar_senha_inicial(sender, instance, created, **kwargs):
+    """Os formulários de cadastro deixam o hash da senha inicial para o worker."""
+    if created and getattr(instance, '_senha_inicial_pendente', False):
+        instance._senha_inicial_pendente = False
+        definir_senha_inicial.enfileirar(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Nota)
+@receiver([post_save, post_delete], sender=AlunoTurma)
+@receiver([post_save, post_delete], sender=Estagio)
+@receiver([post_save, post_delete], sender=DocumentoEstagio)
+@receiver([post_save, post_delete], sender=Turma)
+@receiver([post_save, post_delete], sender=Curso)
+@receiver([post_save, post_delete], sender=Materia)
+@receiver([post_save, post_delete], sender=ProfessorMateriaAnoCursoModalidade)
+@receiver([post_save, post_delete], sender=CustomUser)
+def invalidar_fragmentos_do_modelo(sender, update_fields=None, **kwargs):
+    """
+    Troca o carimbo de versão do modelo para que os fragmentos de template
+    que dependem dele ({% fragmento %}) sejam renderizados de novo e os
+    conjuntos de acesso (core.permissoes) e o registro de referências
+    (core.referencias) sejam recarregados.
+    (update()/bulk_update() não disparam sinais: chame invalidar_versao.)
+    """
+    # O login só atualiza 'last_login': nenhum fragmento mostra isso
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidar_versao(sender.__name__)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+@receiver([post_save, post_delete], sender=Curso)
+@receiver([post_save, post_delete], sender=Turma)
+@receiver([post_save, post_delete], sender=AlunoTurma)
+@receiver([post_save, post_delete], sender=Estagio)
+@receiver([post_save, post_delete], sender=DocumentoEstagio)
+def invalidar_contadores_do_painel(sender, update_fields=None, **kwargs):
+    """Apaga os contadores do painel do admin (core.painel_admin) em cache."""
+    # O login só atualiza 'last_login': não muda nenhum contador
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidar_contadores_admin()
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+@receiver([post_save, post_delete], sender=ProfessorMateriaAnoCursoModalidade)
+@receiver([post_save, post_delete], sender=Materia)
+@receiver([post_save, post_delete], sender=Curso)
+def invalidar_diretorio_de_orientadores(sender, update_fields=None, **kwargs):
+    """Apaga os rótulos dos orientadores (core.orientadores) em cache."""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidar_diretorio()
+
+
+@receiver(post_save, sender=DocumentoEstagio)
+def publicar_mudanca_na_fila(sender, instance, **kwargs):
+    """
+    Quando o documento entra/sai de uma fila de assinatura: grava as
+    notificações por e-mail (outbox, nesta transação) e avisa os dashboards
+    ao vivo (SSE) depois do commit.
+    """
+    anterior, atual = getattr(instance, '_status_salvo', None), instance.status
+    instance._status_salvo = atual
+    registrar_notificacoes(instance, anterior, atual)
+    deltas = deltas_da_mudanca(instance, anterior, atual)
+    if deltas:
+        transaction.on_commit(lambda: publicar_deltas(deltas))
+
+
+@receiver(post_delete, sender=DocumentoEstagio)
+def publicar_saida_da_fila(sender, instance, **kwargs):
+    deltas = deltas_da_mudanca(instance, getattr(instance, '_status_salvo', instance.status), None)
+    if deltas:
+        transaction.on_commit(lambda: publicar_deltas(deltas))
+
+
+@receiver(post_delete, sender=Nota)
+def descontar_nota_da_estatistica(sender, instance, **kwargs):
+    """Tira da EstatisticaNotaTurma a nota apagada (inclusive em cascata)."""
+    EstatisticaNotaTurma.aplicar_diferenca(instance._contribuicao(), None)
@@ -0,0 +1,93 @@
+"""
+Motor de cálculo de notas em lote (NumPy).
+
+Faz a mesma conta do Nota.save(), mas com os componentes de uma turma (ou da
+escola inteira) carregados em arrays e avaliados pelo avaliador NumPy da
+política de cada modalidade (core.politicas_notas). Grava de volta só as
+linhas que mudaram com um UPDATE parametrizado (executemany), bem mais
+barato que o CASE WHEN gerado pelo bulk_update do Django. Útil quando a
+regra de aprovação (settings.NOTA_MINIMA_APROVACAO, settings.NOTA_POLITICAS)
+ou a fórmula muda.
+"""
+from collections import defaultdict
+
+import numpy as np
+from django.db import connection, transaction
+
+from core.cache_versoes import invalidar_versao
+from core.models import EstatisticaNotaTurma, Nota
+from core.politicas_notas import politica_por_codigo
+
+
+def carregar(queryset):
+    """
+    Lê as notas do queryset agrupadas por política. Retorna
+    {politica: dados}, onde dados tem 'ids', 'turma_ids', 'colunas'
+    ({componente: array com NaN nos ausentes}), 'media_atual' e 'status_atual'.
+    """
+    linhas_por_politica = defaultdict(list)
+    for linha in queryset.order_by().values_list(
+        'id', 'turma_id', 'turma__modalidade', *Nota.COLUNAS_COMPONENTES, 'componentes', 'media_final', 'status_final'
+    ):
+        linhas_por_politica[politica_por_codigo(linha[2])].append(linha)
+
+    quantidade_colunas = len(Nota.COLUNAS_COMPONENTES)
+    resultado = {}
+    for politica, linhas in linhas_por_politica.items():
+        valores = []
+        for linha in linhas:
+            fixos = dict(zip(Nota.COLUNAS_COMPONENTES, linha[3:3 + quantidade_colunas]))
+            fixos.update(linha[3 + quantidade_colunas] or {})
+            valores.append([fixos.get(nome) for nome in politica.componentes])
+
+        matriz = np.array(valores, dtype=float).reshape(len(linhas), len(politica.componentes))
+        resultado[politica] = {
+            'ids': np.array([linha[0] for linha in linhas], dtype=np.int64),
+            'turma_ids': np.array([linha[1] for linha in linhas], dtype=np.int64),
+            'colunas': {nome: matriz[:, i] for i, nome in enumerate(politica.componentes)},
+            'media_atual': np.array([linha[-2] for linha in linhas], dtype=float),
+            'status_atual': np.array([linha[-1] for linha in linhas], dtype=object),
+        }
+    return resultado
+
+
+def recalcular(queryset=None, batch_size=1000):
+    """
+    Recalcula media_final/status_final das notas do queryset (padrão: todas)
+    e grava só as que mudaram. Retorna (total de notas, notas alteradas).
+    """
+    queryset = Nota.objects.all() if queryset is None else queryset
+
+    total = 0
+    alteradas = []
+    turmas_afetadas = set()
+    for politica, dados in carregar(queryset).items():
+        medias, status = politica.avaliar_lote(dados['colunas'])
+
+        mesma_media = (medias == dados['media_atual']) | (np.isnan(medias) & np.isnan(dados['media_atual']))
+        indices = np.flatnonzero(~mesma_media | (status != dados['status_atual']))
+
+        alteradas.extend(
+            (None if np.isnan(medias[i]) else float(medias[i]), status[i], int(dados['ids'][i]))
+            for i in indices
+        )
+        turmas_afetadas.update(dados['turma_ids'][indices].tolist())
+        total += len(dados['ids'])
+
+    if alteradas:
+        _gravar(alteradas, turmas_afetadas, batch_size)
+
+    return total, len(alteradas)
+
+
+def _gravar(linhas, turma_ids, batch_size):
+    tabela = connection.ops.quote_name(Nota._meta.db_table)
+    sql = f"UPDATE {tabela} SET media_final = %s, status_final = %s WHERE id = %s"
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for inicio in range(0, len(linhas), batch_size):
+                cursor.executemany(sql, linhas[inicio:inicio + batch_size])
+        # Como no NotaQuerySet.bulk_update: o UPDATE direto não passa pelo Nota.save()
+        EstatisticaNotaTurma.reconstruir(turma_ids=turma_ids)
+    invalidar_versao('Nota')
@@ -0,0 +1,121 @@
+"""
+Notificações por e-mail das filas de assinatura (outbox + resumo).
+
+Quando um DocumentoEstagio entra na fila do orientador ou da direção, o
+receiver em core/models.py chama registrar_notificacoes(), que grava uma
+Notificacao por destinatário na mesma transação da mudança de status (se o
+save for desfeito, a notificação some junto) e agenda enviar_resumos na fila
+de tarefas (core.fila_tarefas) para daqui a settings.NOTIFICACOES_INTERVALO.
+
+Tudo o que acumulou nesse intervalo vira um único e-mail por destinatário,
+e todos os e-mails do lote saem pela mesma conexão SMTP.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from core.fila_assinaturas import STATUS_FILA_DIRECAO, STATUS_FILA_PROFESSOR
+from core.fila_tarefas import tarefa
+
+# Página onde cada fila assina o documento
+URL_DOCUMENTO_POR_FILA = {
+    STATUS_FILA_PROFESSOR: 'professor_visualizar_documento',
+    STATUS_FILA_DIRECAO: 'direcao_visualizar_documento',
+}
+
+
+def _destinatarios(documento, fila):
+    from core.models import CustomUser
+
+    if fila == STATUS_FILA_PROFESSOR:
+        return [documento.estagio.orientador_id] if documento.estagio.orientador_id else []
+    return list(CustomUser.objects.filter(tipo='direcao', is_active=True).values_list('id', flat=True))
+
+
+def registrar_notificacoes(documento, status_anterior, status_atual):
+    """Grava na outbox os avisos de 'documento entrou na sua fila' (dentro da transação do save)."""
+    from core.models import Notificacao
+
+    if status_anterior == status_atual or status_atual not in URL_DOCUMENTO_POR_FILA:
+        return
+    destinatarios = _destinatarios(documento, status_atual)
+    if not destinatarios:
+        return
+
+    Notificacao.objects.bulk_create([
+        Notificacao(destinatario_id=pk, documento=documento, fila=status_atual) for pk in destinatarios
+    ])
+    agendar_envio()
+
+
+def agendar_envio():
+    """Enfileira enviar_resumos para o fim do intervalo, se ainda não houver um agendado."""
+    from core.models import Tarefa
+
+    nome = f"{enviar_resumos.__module__}.{enviar_resumos.__qualname__}"
+    if not Tarefa.objects.filter(funcao=nome, status='PENDENTE').exists():
+        enviar_resumos.enfileirar(atraso=timedelta(seconds=getattr(settings, 'NOTIFICACOES_INTERVALO', 900)))
+
+
+@tarefa(prioridade=-5)
+def enviar_resumos():
+    """
+    Envia um resumo por destinatário com tudo o que está na outbox.
+    Retorna a quantidade de e-mails enviados.
+    """
+    from core.models import Notificacao
+
+    # Reserva o que está pendente agora; o que chegar durante o envio fica para o próximo resumo
+    lote = uuid.uuid4().hex
+    if not Notificacao.objects.filter(enviada_em=None, lote='').update(lote=lote):
+        return 0
+    reservadas = Notificacao.objects.filter(lote=lote)
+
+    try:
+        mensagens = []
+        por_destinatario = {}
+        for notificacao in reservadas.select_related('destinatario', 'documento__estagio__aluno').order_by('criada_em'):
+            por_destinatario.setdefault(notificacao.destinatario, {})[notificacao.documento_id] = notificacao
+        for destinatario, notificacoes in por_destinatario.items():
+            mensagem = _montar_resumo(destinatario, notificacoes.values())
+            if mensagem:
+                mensagens.append(mensagem)
+
+        if mensagens:
+            with get_connection() as conexao:
+                conexao.send_messages(mensagens)
+    except Exception:
+        # Devolve à outbox; a fila de tarefas tenta de novo
+        reservadas.update(lote='')
+        raise
+
+    reservadas.update(enviada_em=timezone.now())
+    return len(mensagens)
+
+
+def _montar_resumo(destinatario, notificacoes):
+    # Documentos que já saíram da fila (assinados nesse meio tempo) não entram no resumo
+    pendentes = [n for n in notificacoes if n.documento.status == n.fila]
+    if not pendentes or not destinatario.email:
+        return None
+
+    base = getattr(settings, 'SGDE_URL_BASE', '').rstrip('/')
+    itens = [
+        {
+            'documento': n.documento,
+            'url': base + reverse(URL_DOCUMENTO_POR_FILA[n.fila], args=[n.documento_id]),
+        }
+        for n in pendentes
+    ]
+    quantidade = len(itens)
+    assunto = (
+        f"[SGDE] {quantidade} documento{'s' if quantidade > 1 else ''} "
+        f"aguardando sua assinatura"
+    )
+    corpo = render_to_string('email/resumo_assinaturas.txt', {'destinatario': destinatario, 'itens': itens})
+    return EmailMessage(assunto, corpo, to=[destinatario.email])
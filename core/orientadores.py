@@ -0,0 +1,76 @@
+"""
+Diretório dos professores que podem ser escolhidos como orientador de
+estágio (campo 'orientador' do TermoCompromissoForm).
+
+Os rótulos ("Nome - Matéria (Curso)") saem de uma consulta só, com o
+primeiro vínculo de cada professor anotado por subconsulta, e ficam em cache
+até um professor, vínculo, matéria ou curso mudar (receivers em
+core/models.py). Para listas grandes, buscar() pagina e filtra o diretório
+em memória e alimenta a view api_orientadores (static/js/busca_orientador.js).
+"""
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+
+CHAVE_CACHE = 'orientadores:diretorio'
+
+
+def invalidar_diretorio():
+    cache.delete(CHAVE_CACHE)
+
+
+def _normalizar(texto):
+    """Minúsculas e sem acentos, para a busca ('jose' acha 'José')."""
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode().lower()
+
+
+def _calcular_diretorio():
+    from core.models import CustomUser, ProfessorMateriaAnoCursoModalidade
+
+    primeiro_vinculo = ProfessorMateriaAnoCursoModalidade.objects.filter(professor=OuterRef('pk')).order_by('id')
+    professores = (
+        CustomUser.objects.filter(tipo='professor')
+        .annotate(
+            vinculo_materia=Subquery(primeiro_vinculo.values('materia__nome')[:1]),
+            vinculo_curso=Subquery(primeiro_vinculo.values('curso__nome')[:1]),
+        )
+        .order_by('first_name', 'last_name')
+        .values_list('id', 'first_name', 'last_name', 'vinculo_materia', 'vinculo_curso')
+    )
+
+    diretorio = []
+    for pk, primeiro_nome, sobrenome, materia, curso in professores:
+        nome = f"{primeiro_nome} {sobrenome}".strip()
+        detalhe = f"{materia} ({curso})" if materia else "(Sem vínculos cadastrados)"
+        rotulo = f"{nome} - {detalhe}"
+        diretorio.append({'id': pk, 'nome': nome, 'rotulo': rotulo, 'busca': _normalizar(rotulo)})
+    return diretorio
+
+
+def diretorio():
+    """[{'id', 'nome', 'rotulo', 'busca'}] em ordem alfabética, do cache sempre que possível."""
+    return cache.get_or_set(
+        CHAVE_CACHE,
+        _calcular_diretorio,
+        getattr(settings, 'ORIENTADORES_CACHE_TIMEOUT', 3600),
+    )
+
+
+def rotulos():
+    """{id do professor: rótulo}."""
+    return {professor['id']: professor['rotulo'] for professor in diretorio()}
+
+
+def buscar(termo='', pagina=1, por_pagina=20):
+    """Uma página dos professores cujo rótulo contém todas as palavras de `termo`."""
+    palavras = _normalizar(termo).split()
+    encontrados = [p for p in diretorio() if all(palavra in p['busca'] for palavra in palavras)]
+    inicio = (pagina - 1) * por_pagina
+    return {
+        'resultados': [{'id': p['id'], 'texto': p['rotulo']} for p in encontrados[inicio:inicio + por_pagina]],
+        'pagina': pagina,
+        'total': len(encontrados),
+        'tem_mais': inicio + por_pagina < len(encontrados),
+    }
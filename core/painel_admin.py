@@ -0,0 +1,95 @@
+"""
+Contadores do painel do administrador.
+
+Todos os números saem de uma consulta com agregação condicional por modelo
+(Count(..., filter=Q(...))), e o resultado fica em cache por um TTL curto.
+Os receivers em core/models.py apagam o cache quando algo relevante muda,
+então com o cache quente o painel não faz nenhuma consulta de contagem.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+CHAVE_CACHE = 'painel_admin:contadores'
+
+
+def invalidar_contadores_admin():
+    cache.delete(CHAVE_CACHE)
+
+
+def _calcular_contadores():
+    from core.models import AlunoTurma, CustomUser, Curso, DocumentoEstagio, Estagio, Turma
+
+    usuarios = CustomUser.objects.aggregate(
+        alunos=Count('id', filter=Q(tipo='aluno')),
+        professores=Count('id', filter=Q(tipo='professor')),
+        servidores=Count('id', filter=Q(tipo='servidor')),
+        direcao=Count('id', filter=Q(tipo='direcao')),
+    )
+
+    turmas = Turma.objects.aggregate(
+        total=Count('id'),
+        **{
+            f"turno_{valor}": Count('id', filter=Q(turno=valor))
+            for valor, _ in Turma.TURNO_CHOICES
+        },
+    )
+
+    # Uma passada só em AlunoTurma: um Count distinto por curso e um por eixo.
+    # O eixo tem contagem própria: somar os cursos contaria duas vezes o aluno
+    # matriculado em dois cursos do mesmo eixo
+    cursos = list(Curso.objects.order_by('nome').values_list('id', 'nome', 'eixo'))
+    nomes_eixo = dict(Curso.EIXO_CHOICES)
+    matriculas = AlunoTurma.objects.aggregate(
+        **{
+            f"curso_{pk}": Count('aluno', distinct=True, filter=Q(turma__curso_id=pk))
+            for pk, _, _ in cursos
+        },
+        **{
+            f"eixo_{valor}": Count('aluno', distinct=True, filter=Q(turma__curso__eixo=valor))
+            for valor in nomes_eixo
+        },
+    )
+
+    estagios = Estagio.objects.aggregate(
+        total=Count('id'),
+        **{
+            valor: Count('id', filter=Q(status_geral=valor))
+            for valor, _ in Estagio.STATUS_GERAL_CHOICES
+        },
+    )
+
+    assinaturas = DocumentoEstagio.objects.aggregate(
+        professor=Count('id', filter=Q(status='AGUARDANDO_ASSINATURA_PROF')),
+        direcao=Count('id', filter=Q(status='AGUARDANDO_ASSINATURA_DIR')),
+    )
+
+    return {
+        'usuarios': usuarios,
+        'turmas': turmas,
+        'alunos_por_curso': [
+            {'curso': nome, 'eixo': eixo, 'total': matriculas[f"curso_{pk}"]}
+            for pk, nome, eixo in cursos
+            if matriculas[f"curso_{pk}"]
+        ],
+        'alunos_por_eixo': {nome: matriculas[f"eixo_{valor}"] for valor, nome in nomes_eixo.items()},
+        'estagios_total': estagios.pop('total'),
+        'estagios_por_status': [
+            {'status': valor, 'nome': nome, 'total': estagios[valor]}
+            for valor, nome in Estagio.STATUS_GERAL_CHOICES
+        ],
+        'assinaturas_pendentes': {
+            'professor': assinaturas['professor'],
+            'direcao': assinaturas['direcao'],
+            'total': assinaturas['professor'] + assinaturas['direcao'],
+        },
+    }
+
+
+def contadores_admin():
+    """Contadores do painel, vindos do cache sempre que possível."""
+    return cache.get_or_set(
+        CHAVE_CACHE,
+        _calcular_contadores,
+        getattr(settings, 'ADMIN_CONTADORES_TTL', 60),
+    )
@@ -0,0 +1,158 @@
+"""
+Acesso por linha: quais turmas, alunos e estágios (e, pelos estágios, quais
+documentos) cada usuário pode ver.
+
+As regras ficam aqui, uma vez só, em dois formatos:
+- subconsultas, para filtrar querysets no próprio banco (filtrar_*), sem
+  trazer ids para o Python (servem também nas views assíncronas);
+- conjuntos de ids, para checar um objeto em O(1) (pode_ver_*, leciona).
+  Cada conjunto é calculado na primeira vez que é pedido, fica no cache com
+  os carimbos de core.cache_versoes na chave e é memorizado no request.user,
+  então uma requisição faz no máximo uma consulta por conjunto (nenhuma com
+  o cache quente).
+
+    from core.permissoes import acesso
+
+    if not acesso(request.user).pode_ver_documento(documento):
+        ...
+    documentos = acesso(request.user).filtrar_documentos(DocumentoEstagio.objects.all())
+
+Direção e admin veem tudo: os filtros devolvem o queryset como veio e as
+checagens não consultam nada.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+
+from core.cache_versoes import versoes_modelos
+from core.models import AlunoTurma, AtribuicaoProfessor, CustomUser, Estagio, Turma
+
+PREFIXO_CHAVE = 'permissoes'
+
+# Qualquer mudança nestes modelos pode mudar o que alguém enxerga
+MODELOS_DAS_REGRAS = ('AlunoTurma', 'Turma', 'Curso', 'Estagio', 'ProfessorMateriaAnoCursoModalidade')
+
+TIPOS_SEM_RESTRICAO = ('direcao', 'admin')
+
+
+def _pk(objeto):
+    return getattr(objeto, 'pk', objeto)
+
+
+class Acesso:
+    def __init__(self, user):
+        self.user = user
+        self.tipo = user.tipo if user.is_authenticated else None
+        self.tudo = self.tipo in TIPOS_SEM_RESTRICAO
+        self._conjuntos = {}
+        self._assinatura = None
+
+    # --- Regras (subconsultas) ---
+
+    def _atribuicoes(self):
+        return AtribuicaoProfessor.objects.filter(professor_id=self.user.pk)
+
+    def _turmas(self):
+        if self.tipo == 'aluno':
+            return Turma.objects.filter(alunoturma__aluno_id=self.user.pk)
+        if self.tipo == 'professor':
+            return Turma.objects.filter(pk__in=self._atribuicoes().values('turma_id'))
+        if self.tipo == 'servidor' and self.user.eixo:
+            return Turma.objects.filter(curso__eixo=self.user.eixo)
+        return Turma.objects.none()
+
+    def _alunos(self):
+        if self.tipo == 'aluno':
+            return CustomUser.objects.filter(pk=self.user.pk)
+        if self.tipo == 'professor':
+            # Alunos das turmas em que leciona e os orientandos de estágio
+            nas_turmas = Exists(AlunoTurma.objects.filter(aluno=OuterRef('pk'), turma__in=self._turmas()))
+            return CustomUser.objects.filter(Q(nas_turmas) | Q(estagio__orientador_id=self.user.pk), tipo='aluno')
+        if self.tipo == 'servidor' and self.user.eixo:
+            return CustomUser.objects.filter(
+                Exists(AlunoTurma.objects.filter(aluno=OuterRef('pk'), turma__curso__eixo=self.user.eixo)),
+                tipo='aluno',
+            )
+        return CustomUser.objects.none()
+
+    def _estagios(self):
+        if self.tipo == 'aluno':
+            return Estagio.objects.filter(aluno_id=self.user.pk)
+        if self.tipo == 'professor':
+            return Estagio.objects.filter(orientador_id=self.user.pk)
+        if self.tipo == 'servidor':
+            return Estagio.objects.filter(aluno__in=self._alunos())
+        return Estagio.objects.none()
+
+    def _pares(self):
+        """{(materia_id, turma_id)} que o professor leciona (core.models.AtribuicaoProfessor)."""
+        if self.tipo != 'professor':
+            return set()
+        return set(self._atribuicoes().values_list('materia_id', 'turma_id'))
+
+    # --- Conjuntos de ids (cache) ---
+
+    def _chave(self, nome):
+        if self._assinatura is None:
+            versoes = versoes_modelos(*MODELOS_DAS_REGRAS)
+            self._assinatura = hashlib.sha256(
+                ':'.join(str(versoes[m]) for m in MODELOS_DAS_REGRAS).encode()
+            ).hexdigest()[:16]
+        return f"{PREFIXO_CHAVE}:{self.user.pk}:{self.tipo}:{self.user.eixo}:{nome}:{self._assinatura}"
+
+    def _conjunto(self, nome):
+        if self.tipo is None:
+            return frozenset()
+        if nome not in self._conjuntos:
+            chave = self._chave(nome)
+            ids = cache.get(chave)
+            if ids is None:
+                if nome == 'pares':
+                    ids = frozenset(self._pares())
+                else:
+                    ids = frozenset(getattr(self, f"_{nome}")().values_list('pk', flat=True))
+                cache.set(chave, ids, getattr(settings, 'PERMISSOES_CACHE_TIMEOUT', 600))
+            self._conjuntos[nome] = ids
+        return self._conjuntos[nome]
+
+    # --- Checagens O(1) (aceitam o objeto ou o id) ---
+
+    def pode_ver_turma(self, turma):
+        return self.tudo or _pk(turma) in self._conjunto('turmas')
+
+    def pode_ver_aluno(self, aluno):
+        return self.tudo or _pk(aluno) in self._conjunto('alunos')
+
+    def pode_ver_estagio(self, estagio):
+        return self.tudo or _pk(estagio) in self._conjunto('estagios')
+
+    def pode_ver_documento(self, documento):
+        return self.tudo or documento.estagio_id in self._conjunto('estagios')
+
+    def leciona(self, materia, turma):
+        return (_pk(materia), _pk(turma)) in self._conjunto('pares')
+
+    # --- Filtros de queryset (no banco, sem consulta extra) ---
+
+    def filtrar_turmas(self, queryset):
+        return queryset if self.tudo else queryset.filter(pk__in=self._turmas().values('pk'))
+
+    def filtrar_alunos(self, queryset):
+        return queryset if self.tudo else queryset.filter(pk__in=self._alunos().values('pk'))
+
+    def filtrar_estagios(self, queryset):
+        return queryset if self.tudo else queryset.filter(pk__in=self._estagios().values('pk'))
+
+    def filtrar_documentos(self, queryset):
+        return queryset if self.tudo else queryset.filter(estagio__in=self._estagios().values('pk'))
+
+
+def acesso(user):
+    """O Acesso do usuário, criado uma vez e guardado nele (o request.user vive uma requisição)."""
+    atual = getattr(user, '_acesso', None)
+    if atual is None:
+        atual = Acesso(user)
+        user._acesso = atual
+    return atual
@@ -0,0 +1,419 @@
+"""
+Políticas de avaliação por modalidade (EPI, PROEJA, SUBSEQUENTE).
+
+Cada política declara os componentes lançados pelo professor e a fórmula da
+média e da situação numa pequena linguagem de expressões (sintaxe de Python,
+só com aritmética, comparações, and/or/not, `x if c else y` e as funções
+abaixo). A definição é analisada uma única vez e compilada para três alvos
+que fazem exatamente a mesma conta:
+
+- um avaliador Python escalar (Nota.save, views);
+- um avaliador NumPy em lote (core.motor_notas);
+- um avaliador JavaScript gerado, servido em /professor/politicas-notas.js
+  e usado pelo static/js/nota.js, para o navegador e o servidor concordarem.
+
+Valor ausente é NaN nos três alvos: propaga na aritmética e toda comparação
+com ele é falsa. Funções disponíveis:
+    maior(a, b, ...)   maior valor preenchido (ignora ausentes)
+    menor(a, b, ...)   menor valor preenchido (ignora ausentes)
+    media(a, b, ...)   média dos valores preenchidos
+    preenchido(a)      verdadeiro se o valor foi lançado
+
+settings.NOTA_POLITICAS pode sobrescrever ou acrescentar políticas.
+"""
+import ast
+import hashlib
+import json
+import math
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+STATUS_PENDENTE = "Pendente"
+
+POLITICA_PADRAO = 'PADRAO'
+
+POLITICAS = {
+    # Turmas sem modalidade conhecida: as três notas e a recuperação antigas.
+    'PADRAO': {
+        'descricao': "Média aritmética das notas lançadas",
+        'componentes': [
+            ('nota_1', "Nota 1"),
+            ('nota_2', "Nota 2"),
+            ('nota_3', "Nota 3"),
+            ('nota_recuperacao', "Recuperação"),
+        ],
+        'maximo': 10,
+        'constantes': {'minima': 'NOTA_MINIMA_APROVACAO'},
+        'variaveis': [
+            ('media', "media(nota_1, nota_2, nota_3)"),
+        ],
+        'media': "media",
+        'situacao': [
+            ("media >= minima", "Aprovado"),
+            ("(media + nota_recuperacao) / 2 >= minima", "Aprovado"),
+            ("preenchido(nota_recuperacao)", "Reprovado na Final"),
+        ],
+        'senao': "Reprovado",
+    },
+    # Ensino médio integrado: dois semestres (N1 + N2, com paralela) somando 200.
+    'EPI': {
+        'descricao': "Dois semestres de 100 pontos com paralela; aprovação com 120",
+        'componentes': [
+            ('nota_1_semestre1', "N1 - 1º semestre"),
+            ('nota_2_semestre1', "N2 - 1º semestre"),
+            ('paralela_1', "Paralela - 1º semestre"),
+            ('nota_1_semestre2', "N1 - 2º semestre"),
+            ('nota_2_semestre2', "N2 - 2º semestre"),
+            ('paralela_2', "Paralela - 2º semestre"),
+            ('nota_recuperacao', "Final"),
+        ],
+        'maximo': 100,
+        'constantes': {'aprovacao': 120, 'aprovacao_final': 180, 'minimo_semestre': 60},
+        'variaveis': [
+            ('semestre_1', "maior(nota_1_semestre1 + nota_2_semestre1, paralela_1)"),
+            ('semestre_2', "maior(nota_1_semestre2 + nota_2_semestre2, paralela_2)"),
+            ('total', "semestre_1 + semestre_2"),
+            ('total_final', "maior(semestre_1, minimo_semestre) + maior(semestre_2, minimo_semestre) + nota_recuperacao"),
+        ],
+        'media': "total",
+        'situacao': [
+            ("total >= aprovacao", "Aprovado"),
+            ("total_final >= aprovacao_final", "Aprovado"),
+            ("preenchido(nota_recuperacao)", "Reprovado na Final"),
+        ],
+        'senao': "Requer Final",
+    },
+    # Módulos noturnos: um período de 100 pontos (N1 + N2, com paralela).
+    'PROEJA': {
+        'descricao': "Módulo de 100 pontos com paralela; aprovação com 60",
+        'componentes': [
+            ('nota_1', "N1"),
+            ('nota_2', "N2"),
+            ('paralela_1', "Paralela"),
+            ('nota_recuperacao', "Final"),
+        ],
+        'maximo': 100,
+        'constantes': {'aprovacao': 60},
+        'variaveis': [
+            ('total', "maior(nota_1 + nota_2, paralela_1)"),
+        ],
+        'media': "total",
+        'situacao': [
+            ("total >= aprovacao", "Aprovado"),
+            ("nota_recuperacao >= aprovacao", "Aprovado"),
+            ("preenchido(nota_recuperacao)", "Reprovado na Final"),
+        ],
+        'senao': "Requer Final",
+    },
+}
+POLITICAS['SUBSEQUENTE'] = dict(POLITICAS['PROEJA'])
+
+
+class PoliticaInvalida(ImproperlyConfigured):
+    pass
+
+
+# --- Funções auxiliares de cada alvo (NaN = ausente) -------------------------
+
+def _maior(*valores):
+    preenchidos = [v for v in valores if not math.isnan(v)]
+    return max(preenchidos) if preenchidos else math.nan
+
+
+def _menor(*valores):
+    preenchidos = [v for v in valores if not math.isnan(v)]
+    return min(preenchidos) if preenchidos else math.nan
+
+
+def _media(*valores):
+    preenchidos = [v for v in valores if not math.isnan(v)]
+    return sum(preenchidos) / len(preenchidos) if preenchidos else math.nan
+
+
+def _div(a, b):
+    return a / b if b else math.nan
+
+
+def _preenchido(valor):
+    return not math.isnan(valor)
+
+
+def _np_media(*valores):
+    pilha = np.array(np.broadcast_arrays(*valores), dtype=float)
+    validos = ~np.isnan(pilha)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(validos, pilha, 0.0).sum(axis=0) / validos.sum(axis=0)
+
+
+def _np_maior(*valores):
+    return np.fmax.reduce(np.array(np.broadcast_arrays(*valores), dtype=float), axis=0)
+
+
+def _np_menor(*valores):
+    return np.fmin.reduce(np.array(np.broadcast_arrays(*valores), dtype=float), axis=0)
+
+
+def _np_div(a, b):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(b == 0, np.nan, np.divide(a, b))
+
+
+AMBIENTE_PYTHON = {
+    'maior': _maior, 'menor': _menor, 'media': _media, 'preenchido': _preenchido, '_div': _div, 'nan': math.nan,
+}
+AMBIENTE_NUMPY = {
+    'maior': _np_maior, 'menor': _np_menor, 'media': _np_media, 'preenchido': lambda v: ~np.isnan(v),
+    '_div': _np_div, 'np': np, 'nan': np.nan,
+}
+AUXILIARES_JS = """
+  const vals = (a) => a.filter((v) => !Number.isNaN(v));
+  const maior = (...a) => { const v = vals(a); return v.length ? Math.max(...v) : NaN; };
+  const menor = (...a) => { const v = vals(a); return v.length ? Math.min(...v) : NaN; };
+  const media = (...a) => { const v = vals(a); return v.length ? v.reduce((s, x) => s + x, 0) / v.length : NaN; };
+  const preenchido = (v) => !Number.isNaN(v);
+  const div = (a, b) => (b ? a / b : NaN);
+  const num = (v) => (v === null || v === undefined || v === '' ? NaN : Number(v));
+"""
+
+FUNCOES = ('maior', 'menor', 'media', 'preenchido')
+
+OPERADORES = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*'}
+COMPARACOES = {ast.Gt: '>', ast.GtE: '>=', ast.Lt: '<', ast.LtE: '<=', ast.Eq: '==', ast.NotEq: '!='}
+
+
+# --- Compilação ---------------------------------------------------------------
+
+class _Emissor:
+    """Gera o código de uma expressão já validada para 'python', 'numpy' ou 'js'."""
+
+    def __init__(self, alvo, nomes):
+        self.alvo = alvo
+        self.nomes = nomes
+
+    def __call__(self, no):
+        metodo = getattr(self, f"_{type(no).__name__}", None)
+        if metodo is None:
+            raise PoliticaInvalida(f"Construção não permitida: {ast.unparse(no)}")
+        return metodo(no)
+
+    def _Constant(self, no):
+        if isinstance(no.value, bool) or not isinstance(no.value, (int, float)):
+            raise PoliticaInvalida(f"Só constantes numéricas são permitidas: {no.value!r}")
+        return repr(float(no.value))
+
+    def _Name(self, no):
+        if no.id not in self.nomes:
+            raise PoliticaInvalida(f"Nome desconhecido na fórmula: {no.id}")
+        # Prefixo evita colisão com as funções (ex.: variável `media` x media())
+        return f"v_{no.id}"
+
+    def _BinOp(self, no):
+        esquerda, direita = self(no.left), self(no.right)
+        if isinstance(no.op, ast.Div):
+            return f"{'div' if self.alvo == 'js' else '_div'}({esquerda}, {direita})"
+        if type(no.op) not in OPERADORES:
+            raise PoliticaInvalida(f"Operador não permitido: {ast.unparse(no)}")
+        return f"({esquerda} {OPERADORES[type(no.op)]} {direita})"
+
+    def _UnaryOp(self, no):
+        operando = self(no.operand)
+        if isinstance(no.op, ast.USub):
+            return f"(-{operando})"
+        if isinstance(no.op, ast.Not):
+            return {'python': f"(not {operando})", 'numpy': f"(~{operando})", 'js': f"(!{operando})"}[self.alvo]
+        raise PoliticaInvalida(f"Operador não permitido: {ast.unparse(no)}")
+
+    def _BoolOp(self, no):
+        operador = {
+            'python': {ast.And: ' and ', ast.Or: ' or '},
+            'numpy': {ast.And: ' & ', ast.Or: ' | '},
+            'js': {ast.And: ' && ', ast.Or: ' || '},
+        }[self.alvo][type(no.op)]
+        return '(' + operador.join(self(valor) for valor in no.values) + ')'
+
+    def _Compare(self, no):
+        if len(no.ops) != 1 or type(no.ops[0]) not in COMPARACOES:
+            raise PoliticaInvalida(f"Use uma comparação por vez: {ast.unparse(no)}")
+        operador = COMPARACOES[type(no.ops[0])]
+        if self.alvo == 'js' and operador in ('==', '!='):
+            operador += '='
+        return f"({self(no.left)} {operador} {self(no.comparators[0])})"
+
+    def _IfExp(self, no):
+        condicao, sim, nao = self(no.test), self(no.body), self(no.orelse)
+        if self.alvo == 'python':
+            return f"({sim} if {condicao} else {nao})"
+        if self.alvo == 'numpy':
+            return f"np.where({condicao}, {sim}, {nao})"
+        return f"({condicao} ? {sim} : {nao})"
+
+    def _Call(self, no):
+        if not isinstance(no.func, ast.Name) or no.func.id not in FUNCOES or no.keywords or not no.args:
+            raise PoliticaInvalida(f"Função não permitida: {ast.unparse(no)}")
+        if no.func.id == 'preenchido' and len(no.args) != 1:
+            raise PoliticaInvalida("preenchido() recebe um único valor")
+        return f"{no.func.id}({', '.join(self(arg) for arg in no.args)})"
+
+
+def _analisar(expressao):
+    try:
+        return ast.parse(expressao, mode='eval').body
+    except SyntaxError as erro:
+        raise PoliticaInvalida(f"Fórmula inválida {expressao!r}: {erro.msg}") from erro
+
+
+class Politica:
+    """
+    Uma política compilada. Use politica_por_codigo()/politica_da_turma(),
+    que guardam a instância: a fórmula só é analisada uma vez por processo.
+    """
+
+    def __init__(self, codigo, definicao):
+        self.codigo = codigo
+        self.descricao = definicao.get('descricao', '')
+        self.maximo = definicao.get('maximo', 100)
+        self.componentes = [nome for nome, _ in definicao['componentes']]
+        self.rotulos = dict(definicao['componentes'])
+        self.constantes = {
+            nome: float(getattr(settings, valor) if isinstance(valor, str) else valor)
+            for nome, valor in definicao.get('constantes', {}).items()
+        }
+        self.senao = definicao['senao']
+        self.status_possiveis = [STATUS_PENDENTE] + [s for _, s in definicao['situacao']] + [self.senao]
+
+        conhecidos = set(self.componentes) | set(self.constantes)
+        variaveis = []
+        for nome, expressao in definicao.get('variaveis', []):
+            variaveis.append((nome, _analisar(expressao), conhecidos.copy()))
+            conhecidos.add(nome)
+        media = (_analisar(definicao['media']), conhecidos.copy())
+        situacao = [(_analisar(condicao), status) for condicao, status in definicao['situacao']]
+
+        self._variaveis, self._media, self._situacao, self._conhecidos = variaveis, media, situacao, conhecidos
+
+        self._avaliar = self._compilar_python()
+        self._avaliar_lote = self._compilar_numpy()
+        self.codigo_js = self._gerar_js()
+
+    def _emitir(self, alvo):
+        linhas = [(nome, _Emissor(alvo, nomes)(no)) for nome, no, nomes in self._variaveis]
+        media = _Emissor(alvo, self._media[1])(self._media[0])
+        condicoes = [(_Emissor(alvo, self._conhecidos)(no), status) for no, status in self._situacao]
+        return linhas, media, condicoes
+
+    def _constantes_python(self):
+        return [f"    v_{nome} = {valor!r}" for nome, valor in self.constantes.items()]
+
+    def _compilar_python(self):
+        linhas, media, condicoes = self._emitir('python')
+        corpo = ["def avaliar(valores):"] + self._constantes_python()
+        corpo += [f"    v_{nome} = valores[{nome!r}]" for nome in self.componentes]
+        corpo += [f"    v_{nome} = {codigo}" for nome, codigo in linhas]
+        corpo += [f"    _media = {media}", f"    if _media != _media:", f"        return nan, {STATUS_PENDENTE!r}"]
+        corpo += [f"    if {codigo}:\n        return _media, {status!r}" for codigo, status in condicoes]
+        corpo += [f"    return _media, {self.senao!r}"]
+        return self._executar("\n".join(corpo), AMBIENTE_PYTHON)
+
+    def _compilar_numpy(self):
+        linhas, media, condicoes = self._emitir('numpy')
+        corpo = ["def avaliar_lote(valores):"] + self._constantes_python()
+        corpo += [f"    v_{nome} = valores[{nome!r}]" for nome in self.componentes]
+        corpo += [f"    v_{nome} = {codigo}" for nome, codigo in linhas]
+        corpo += [f"    _media = np.broadcast_to(np.asarray({media}, dtype=float), _tamanho(valores))"]
+        corpo += ["    _condicoes = [np.isnan(_media)]"]
+        corpo += [f"    _condicoes.append(np.broadcast_to({codigo}, _media.shape))" for codigo, _ in condicoes]
+        escolhas = [STATUS_PENDENTE] + [status for _, status in condicoes]
+        corpo += [f"    return _media, np.select(_condicoes, {escolhas!r}, {self.senao!r}).astype(object)"]
+        ambiente = dict(AMBIENTE_NUMPY, _tamanho=lambda valores: (len(next(iter(valores.values()))),))
+        return self._executar("\n".join(corpo), ambiente)
+
+    def _executar(self, fonte, ambiente):
+        namespace = dict(ambiente)
+        exec(compile(fonte, f"<politica {self.codigo}>", 'exec'), namespace)
+        return next(v for k, v in namespace.items() if k.startswith('avaliar'))
+
+    def _gerar_js(self):
+        linhas, media, condicoes = self._emitir('js')
+        corpo = [f"    const v_{nome} = {json.dumps(valor)};" for nome, valor in self.constantes.items()]
+        corpo += [f"    const v_{nome} = num(v[{json.dumps(nome)}]);" for nome in self.componentes]
+        corpo += [f"    const v_{nome} = {codigo};" for nome, codigo in linhas]
+        corpo += [f"    const _media = {media};",
+                  f"    if (Number.isNaN(_media)) return {{ media: null, status: {json.dumps(STATUS_PENDENTE)} }};"]
+        corpo += [f"    if ({codigo}) return {{ media: _media, status: {json.dumps(status)} }};"
+                  for codigo, status in condicoes]
+        corpo += [f"    return {{ media: _media, status: {json.dumps(self.senao)} }};"]
+        return (
+            "{\n"
+            f"  componentes: {json.dumps(self.componentes)},\n"
+            f"  maximo: {json.dumps(self.maximo)},\n"
+            "  avaliar(v) {\n" + "\n".join(corpo) + "\n  },\n}"
+        )
+
+    # --- API ---
+
+    @property
+    def campos(self):
+        """[(componente, rótulo)] na ordem da política, para montar formulários."""
+        return [(nome, self.rotulos[nome]) for nome in self.componentes]
+
+    def valores(self, dados):
+        """Lê os componentes de um dict (None/'' -> NaN) na ordem da política."""
+        resultado = {}
+        for nome in self.componentes:
+            valor = dados.get(nome)
+            resultado[nome] = math.nan if valor is None or valor == '' else float(valor)
+        return resultado
+
+    def avaliar(self, dados):
+        """Retorna (media ou None, status) para um dict de componentes."""
+        media, status = self._avaliar(self.valores(dados))
+        return (None if math.isnan(media) else media), status
+
+    def avaliar_lote(self, colunas):
+        """
+        colunas: {componente: array de floats com NaN nos ausentes}, todas do
+        mesmo tamanho. Retorna (array de médias com NaN, array de status).
+        """
+        return self._avaliar_lote({nome: np.asarray(colunas[nome], dtype=float) for nome in self.componentes})
+
+
+def _definicoes():
+    definicoes = dict(POLITICAS)
+    definicoes.update(getattr(settings, 'NOTA_POLITICAS', {}))
+    return definicoes
+
+
+@lru_cache(maxsize=None)
+def politica_por_codigo(codigo):
+    definicoes = _definicoes()
+    codigo = (codigo or '').upper()
+    if codigo not in definicoes:
+        codigo = POLITICA_PADRAO
+    return Politica(codigo, definicoes[codigo])
+
+
+def politica_da_turma(turma):
+    return politica_por_codigo(turma.modalidade)
+
+
+@lru_cache(maxsize=None)
+def gerar_javascript():
+    """
+    Módulo JS com o avaliador de todas as políticas, no formato
+    window.SGDE_POLITICAS_NOTAS[codigo].avaliar({componente: valor}).
+    Retorna (código, etag).
+    """
+    politicas = ",\n".join(
+        f"  {json.dumps(codigo)}: {politica_por_codigo(codigo).codigo_js}".replace("\n", "\n  ")
+        for codigo in sorted(_definicoes())
+    )
+    codigo = (
+        "// Gerado a partir de core/politicas_notas.py; não edite à mão.\n"
+        "(function () {\n"
+        + AUXILIARES_JS
+        + "  window.SGDE_POLITICAS_NOTAS = {\n" + politicas + "\n  };\n})();\n"
+    )
+    return codigo, hashlib.sha256(codigo.encode()).hexdigest()[:16]
@@ -0,0 +1,93 @@
+"""
+Registro dos dados de referência usados nos formulários: cursos, matérias,
+turmas e as escolhas fixas (eixo, turno, ano/módulo).
+
+As três tabelas são lidas uma vez por processo e ficam em memória junto com
+os carimbos de versão de Curso, Materia e Turma (core.cache_versoes). Cada
+acesso confere os carimbos com uma leitura do cache; se algum mudou (receivers
+em core/models.py ou invalidar_versao() depois de uma carga em lote), as
+tabelas são relidas. Assim um formset com muitas linhas monta e valida as
+escolhas sem consultar o banco.
+
+    from core import referencias
+
+    referencias.lista('Curso')                      # [Curso] por nome
+    referencias.turmas(curso_id=3, ano_modulo='1º ANO')
+    referencias.obter('Materia', 12)                # cópia, ou None
+
+Os objetos de lista()/turmas() são compartilhados entre requisições: só
+leia. Para guardar num model use obter(), que devolve uma cópia.
+"""
+import copy
+import threading
+
+from core.cache_versoes import versoes_modelos
+from core.models import Curso, Materia, Turma
+
+MODELOS = ('Curso', 'Materia', 'Turma')
+
+EIXOS = Curso.EIXO_CHOICES
+TURNOS = Turma.TURNO_CHOICES
+ANOS_MODULO = Turma.ANO_MODULO_CHOICES
+
+_trava = threading.Lock()
+# (versões, {modelo: [objetos]}, {modelo: {pk: objeto}}), trocado de uma vez
+_registro = (None, {}, {})
+
+
+def _carregar():
+    cursos = list(Curso.objects.order_by('nome'))
+    cursos_por_id = {curso.pk: curso for curso in cursos}
+    turmas = list(Turma.objects.order_by('ano_modulo', 'turma', 'id'))
+    for turma in turmas:
+        # O __str__ da turma usa o curso: aproveita os que já estão aqui
+        turma.curso = cursos_por_id[turma.curso_id]
+    return {
+        'Curso': cursos,
+        'Materia': list(Materia.objects.order_by('nome', 'id')),
+        'Turma': turmas,
+    }
+
+
+def _tabelas():
+    global _registro
+    versoes = versoes_modelos(*MODELOS)
+    if _registro[0] != versoes:
+        with _trava:
+            if _registro[0] != versoes:
+                tabelas = _carregar()
+                indices = {modelo: {obj.pk: obj for obj in objetos} for modelo, objetos in tabelas.items()}
+                _registro = (versoes, tabelas, indices)
+    return _registro
+
+
+def lista(modelo):
+    """Todos os objetos de 'Curso', 'Materia' ou 'Turma', na ordem dos selects."""
+    return _tabelas()[1][modelo]
+
+
+def obter(modelo, pk):
+    """Cópia do objeto com essa pk, ou None."""
+    objeto = _tabelas()[2][modelo].get(pk)
+    return copy.copy(objeto) if objeto is not None else None
+
+
+def turmas(curso_id=None, ano_modulo=None, turno=None):
+    """Turmas filtradas pelos critérios informados (vazios são ignorados)."""
+    criterios = {'curso_id': curso_id, 'ano_modulo': ano_modulo, 'turno': turno}
+    criterios = {campo: valor for campo, valor in criterios.items() if valor not in (None, '')}
+    return [
+        turma for turma in lista('Turma')
+        if all(getattr(turma, campo) == valor for campo, valor in criterios.items())
+    ]
+
+
+def anos_modulo(curso_id):
+    """Anos/módulos (ordenados) que o curso tem turmas."""
+    return sorted({turma.ano_modulo for turma in turmas(curso_id=curso_id)})
+
+
+def turnos(**criterios):
+    """[(valor, rótulo)] dos turnos que existem entre as turmas filtradas."""
+    existentes = {turma.turno for turma in turmas(**criterios)}
+    return [(valor, rotulo) for valor, rotulo in TURNOS if valor in existentes]
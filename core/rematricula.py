@@ -0,0 +1,157 @@
+"""
+Rematrícula em lote na virada do ano/semestre letivo.
+
+Cada turma de origem é mapeada para uma turma de destino (por padrão a do
+mesmo curso, turno, código e modalidade no ano/módulo seguinte) e a turma
+inteira é movida com INSERT ... SELECT e DELETE, numa transação só,
+sem passar pelo AlunoTurma.save() aluno a aluno.
+
+O cadastro de alunos trata o AlunoTurma como a matrícula atual (um por
+aluno), então a matrícula de origem vai para o arquivo histórico
+(AlunoTurmaArquivada) depois de criada a nova. As notas continuam ligadas à
+turma e ao período em que foram lançadas.
+
+Usado pelo comando 'rematricular' e pela tela admin de rematrícula.
+"""
+import datetime
+from collections import OrderedDict
+
+from django.db import connection, transaction
+from django.db.models import Count, Max
+
+from core.cache_versoes import invalidar_versao
+from core.arquivo import COLUNAS_MATRICULA, mover_linhas
+from core.models import AlunoTurma, AlunoTurmaArquivada, Turma, ano_letivo_atual
+from core.painel_admin import invalidar_contadores_admin
+
+PROXIMO_ANO_MODULO = {
+    '1º ANO': '2º ANO',
+    '2º ANO': '3º ANO',
+    'I MÓDULO': 'II MÓDULO',
+    'II MÓDULO': 'III MÓDULO',
+    'III MÓDULO': 'IV MÓDULO',
+    'IV MÓDULO': 'V MÓDULO',
+    'V MÓDULO': 'VI MÓDULO',
+}
+
+
+def _chave_destino(turma, ano_modulo):
+    return (turma.curso_id, ano_modulo, turma.turno, turma.turma, turma.modalidade)
+
+
+def sugerir_mapeamento(turmas=None):
+    """
+    {turma de origem: turma de destino (ou None)} para as turmas com alunos.
+    O destino None indica turma concluinte (3º ANO, VI MÓDULO) ou turma
+    seguinte ainda não cadastrada (ver turma_seguinte_a_criar).
+    """
+    turmas = list(turmas if turmas is not None else Turma.objects.select_related('curso'))
+    por_chave = {_chave_destino(t, t.ano_modulo): t for t in turmas}
+    com_alunos = set(AlunoTurma.objects.values_list('turma_id', flat=True).distinct())
+
+    mapeamento = OrderedDict()
+    for turma in sorted(turmas, key=lambda t: (t.curso.nome, t.turno, t.ano_modulo, t.turma or '')):
+        if turma.pk not in com_alunos:
+            continue
+        proximo = PROXIMO_ANO_MODULO.get(turma.ano_modulo)
+        mapeamento[turma] = por_chave.get(_chave_destino(turma, proximo)) if proximo else None
+    return mapeamento
+
+
+def turma_seguinte_a_criar(turma):
+    """Turma (não salva) do ano/módulo seguinte, ou None se a turma é concluinte."""
+    proximo = PROXIMO_ANO_MODULO.get(turma.ano_modulo)
+    if not proximo:
+        return None
+    return Turma(curso=turma.curso, ano_modulo=proximo, turno=turma.turno, turma=turma.turma, modalidade=turma.modalidade)
+
+
+def planejar(mapeamento):
+    """
+    Diff do que aplicar() fará, sem alterar nada: uma linha por turma de
+    origem com a quantidade de alunos que mudam e dos que já estão no destino.
+    """
+    origens = [t.pk for t in mapeamento]
+    alunos = dict(
+        AlunoTurma.objects.filter(turma_id__in=origens)
+        .order_by().values_list('turma_id').annotate(total=Count('id'))
+    )
+
+    destinos = {t.pk: d.pk for t, d in mapeamento.items() if d is not None and d.pk}
+    ja_matriculados = {}
+    if destinos:
+        # Alunos que já têm matrícula na turma de destino (só a de origem é removida)
+        no_destino = {}
+        for aluno_id, turma_id in AlunoTurma.objects.filter(turma_id__in=set(destinos.values())).values_list('aluno_id', 'turma_id'):
+            no_destino.setdefault(turma_id, set()).add(aluno_id)
+        for aluno_id, origem_id in AlunoTurma.objects.filter(turma_id__in=list(destinos)).values_list('aluno_id', 'turma_id'):
+            if aluno_id in no_destino.get(destinos[origem_id], ()):
+                ja_matriculados[origem_id] = ja_matriculados.get(origem_id, 0) + 1
+
+    return [
+        {
+            'origem': origem,
+            'destino': destino,
+            'alunos': alunos.get(origem.pk, 0),
+            'ja_matriculados': ja_matriculados.get(origem.pk, 0),
+        }
+        for origem, destino in mapeamento.items()
+    ]
+
+
+def aplicar(mapeamento, ano_letivo=None, criar_turmas=False):
+    """
+    Move os alunos de cada turma de origem para a de destino. Origens sem
+    destino ficam como estão (a não ser que criar_turmas crie a turma
+    seguinte). Retorna (alunos movidos, turmas criadas).
+    """
+    ano_letivo = ano_letivo or ano_letivo_atual()
+    tabela = connection.ops.quote_name(AlunoTurma._meta.db_table)
+    hoje = datetime.date.today()
+
+    with transaction.atomic():
+        criadas = 0
+        pares = []
+        for origem, destino in mapeamento.items():
+            if destino is None and criar_turmas:
+                destino = turma_seguinte_a_criar(origem)
+                if destino is not None:
+                    destino.save()
+                    criadas += 1
+            if destino is not None and destino.pk != origem.pk:
+                pares.append((origem.pk, destino.pk))
+
+        if not pares:
+            return 0, criadas
+
+        # Novas matrículas têm id maior que este: só as de antes vão para o arquivo
+        ultimo_id = AlunoTurma.objects.aggregate(ultimo=Max('id'))['ultimo'] or 0
+        origens = [o for o, _ in pares]
+        caso = ' '.join('WHEN %s THEN %s' for _ in pares)
+        marcadores = ', '.join(['%s'] * len(origens))
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {tabela} (aluno_id, turma_id, data_matricula, ano_letivo)
+                SELECT DISTINCT origem.aluno_id, CASE origem.turma_id {caso} END, %s, %s
+                FROM {tabela} AS origem
+                WHERE origem.turma_id IN ({marcadores})
+                  AND NOT EXISTS (
+                      SELECT 1 FROM {tabela} AS existente
+                      WHERE existente.aluno_id = origem.aluno_id
+                        AND existente.turma_id = CASE origem.turma_id {caso} END
+                  )
+                """,
+                [v for par in pares for v in par] + [hoje.isoformat(), ano_letivo] + origens + [v for par in pares for v in par],
+            )
+            movidos = mover_linhas(
+                cursor, AlunoTurma, AlunoTurmaArquivada, COLUNAS_MATRICULA,
+                f"turma_id IN ({marcadores}) AND id <= %s", origens + [ultimo_id],
+                extras={'motivo': 'REMATRICULA'},
+            )
+
+    # SQL direto não dispara os sinais do AlunoTurma
+    invalidar_versao('AlunoTurma')
+    invalidar_contadores_admin()
+    return movidos, criadas
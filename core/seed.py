@@ -0,0 +1,242 @@
+"""
+Carga idempotente da estrutura da escola (cursos, turmas, matérias e quais
+matérias cada turma tem).
+
+Os dados vêm de cursos.txt/matérias.txt (ler_cursos, ler_materias) ou das
+listas dos comandos seed_*. Cada aplicar_*() lê a tabela inteira uma vez,
+compara em memória e grava só o que mudou, em lote (bulk_create/bulk_update):
+rodar de novo com os mesmos dados não faz nenhuma escrita.
+
+    python manage.py carregar_seed --dry-run
+"""
+import re
+
+from django.db import transaction
+
+from core.cache_versoes import invalidar_versao
+from core.models import AtribuicaoProfessor, Curso, Materia, Turma
+from core.painel_admin import invalidar_contadores_admin
+
+CURSOS_SAUDE = {'ANÁLISES CLÍNICAS', 'ENFERMAGEM', 'SEGURANÇA DO TRABALHO'}
+PALAVRAS_MINUSCULAS = {'da', 'das', 'de', 'do', 'dos', 'e'}
+SECOES_TURNO = {'MATUTINO', 'VESPERTINO', 'NOTURNO'}
+
+# "1º ANO ADMINISTRAÇÃO M1 (SALA 02)", "1º ADMINISTRAÇÃO M1:",
+# "II MÓDULO SEGURANÇA DO TRABALHO - - Modalidade SUBSEQUENTE (SALA 21)"
+LINHA_TURMA = re.compile(
+    r"^(?P<ano>[1-3]º(?: ANO)?|[IV]+ MÓDULO) (?P<curso>.+?)(?: -)*"
+    r" (?:(?P<turma>[MV]\d+)|Modalidade (?P<modalidade>\w+))"
+    r"(?: \((?P<sala>.+)\))?:?$"
+)
+
+
+def chave(nome):
+    """Forma de comparar nomes vindos do arquivo (maiúsculas) com os do banco."""
+    return ' '.join(nome.upper().split())
+
+
+def titulo(nome):
+    """'SEGURANÇA DO TRABALHO' -> 'Segurança do Trabalho' (para cursos novos)."""
+    palavras = nome.lower().split()
+    return ' '.join(p if p in PALAVRAS_MINUSCULAS and i else p.capitalize() for i, p in enumerate(palavras))
+
+
+def interpretar_turma(texto):
+    """
+    Converte a descrição de uma turma em (curso, ano_modulo, turno, turma,
+    modalidade, sala), com o curso em chave(); None se não reconhecer.
+    """
+    achou = LINHA_TURMA.match(' '.join(texto.split()))
+    if not achou:
+        return None
+    ano = achou['ano'] if 'MÓDULO' in achou['ano'] else f"{achou['ano'][:2]} ANO"
+    if achou['turma']:
+        turno = 'matutino' if achou['turma'].startswith('M') else 'vespertino'
+        modalidade = 'EPI'
+    else:
+        turno, modalidade = 'noturno', achou['modalidade'].upper()
+    return chave(achou['curso']), ano, turno, achou['turma'], modalidade, achou['sala']
+
+
+def ler_cursos(caminho):
+    """cursos.txt -> ({curso: eixo}, [turmas no formato de interpretar_turma])."""
+    cursos, turmas = {}, []
+    with open(caminho, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            linha = linha.strip()
+            if linha.startswith('**') and linha.endswith('**'):
+                nome = chave(linha.strip('*'))
+                cursos[nome] = 'SAUDE' if nome in CURSOS_SAUDE else 'GESTAO'
+            elif linha.startswith('* '):
+                turma = interpretar_turma(linha[2:])
+                if turma:
+                    turmas.append(turma)
+    return cursos, turmas
+
+
+def ler_materias(caminho):
+    """matérias.txt -> {(curso, ano_modulo, turno, turma, modalidade): [matérias]}."""
+    grade = {}
+    atual = None
+    with open(caminho, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            linha = linha.strip()
+            if not linha or linha in SECOES_TURNO:
+                continue
+            if linha.endswith(':'):
+                turma = interpretar_turma(linha)
+                atual = grade.setdefault(turma[:5], []) if turma else None
+            elif atual is not None:
+                atual.append(' '.join(linha.split()))
+    return grade
+
+
+def aplicar_cursos(cursos, dry_run=False):
+    """
+    {nome: eixo} -> cria os cursos que faltam e corrige o eixo dos existentes.
+    Retorna ({chave(nome): Curso}, criados, atualizados).
+    """
+    existentes = {chave(c.nome): c for c in Curso.objects.all()}
+    mudancas = []
+    criados = atualizados = 0
+    for nome, eixo in cursos.items():
+        curso = existentes.get(chave(nome))
+        if curso is None:
+            curso = existentes[chave(nome)] = Curso(nome=titulo(nome) if nome.isupper() else nome, eixo=eixo)
+            criados += 1
+        elif curso.eixo != eixo:
+            curso.eixo = eixo
+            atualizados += 1
+        else:
+            continue
+        mudancas.append(curso)
+
+    if mudancas and not dry_run:
+        # Um só INSERT ... ON CONFLICT(nome) DO UPDATE para os novos e os alterados
+        Curso.objects.bulk_create(mudancas, update_conflicts=True, unique_fields=['nome'], update_fields=['eixo'])
+    return existentes, criados, atualizados
+
+
+def chave_turma(curso, ano_modulo, turno, turma, modalidade):
+    return chave(curso), ano_modulo, turno, turma or None, modalidade or None
+
+
+def aplicar_turmas(turmas, cursos, dry_run=False):
+    """
+    turmas: [(curso, ano_modulo, turno, turma, modalidade, sala)]; cursos: o
+    mapa de aplicar_cursos(). Cria as turmas que faltam e atualiza a sala.
+    Retorna ({chave_turma: Turma}, criadas, atualizadas).
+    """
+    existentes = {
+        chave_turma(t.curso.nome, t.ano_modulo, t.turno, t.turma, t.modalidade): t
+        for t in Turma.objects.select_related('curso')
+    }
+    novas, alteradas = [], []
+    for curso, ano_modulo, turno, nome, modalidade, sala in turmas:
+        if turno != 'noturno':
+            # Mesma regra de Turma.save(), que o bulk_create não chama
+            modalidade = 'EPI'
+        k = chave_turma(curso, ano_modulo, turno, nome, modalidade)
+        turma = existentes.get(k)
+        if turma is None:
+            turma = existentes[k] = Turma(curso=cursos[chave(curso)], ano_modulo=ano_modulo, turno=turno,
+                                          turma=nome, modalidade=modalidade, sala=sala)
+            novas.append(turma)
+        elif sala and turma.sala != sala:
+            turma.sala = sala
+            alteradas.append(turma)
+
+    if not dry_run:
+        # As noturnas têm turma NULL, que não conflita no UNIQUE: por isso o diff é feito em memória
+        Turma.objects.bulk_create(novas, batch_size=500)
+        Turma.objects.bulk_update(alteradas, ['sala'], batch_size=500)
+    return existentes, len(novas), len(alteradas)
+
+
+def aplicar_materias(nomes, dry_run=False):
+    """Cria as matérias que faltam (sem diferenciar maiúsculas). Retorna ({chave(nome): Materia}, criadas)."""
+    existentes = {}
+    for materia in Materia.objects.order_by('id'):
+        existentes.setdefault(chave(materia.nome), materia)
+    novas = []
+    for nome in nomes:
+        if chave(nome) not in existentes:
+            existentes[chave(nome)] = Materia(nome=nome)
+            novas.append(existentes[chave(nome)])
+    if not dry_run:
+        Materia.objects.bulk_create(novas, batch_size=500)
+    return existentes, len(novas)
+
+
+def aplicar_grade(grade, materias, turmas, dry_run=False):
+    """
+    grade: {chave_turma: [matérias]}. Acrescenta os vínculos Materia.turmas
+    que faltam; os que já existem (inclusive os feitos à mão) ficam.
+    Retorna quantos vínculos foram (ou seriam) criados.
+    """
+    Vinculo = Materia.turmas.through
+    existentes = set(Vinculo.objects.values_list('materia_id', 'turma_id'))
+    novos = []
+    for turma_chave, nomes in grade.items():
+        turma = turmas[turma_chave]
+        for nome in dict.fromkeys(nomes):
+            materia = materias[chave(nome)]
+            if turma.pk is None or materia.pk is None or (materia.pk, turma.pk) not in existentes:
+                novos.append(Vinculo(materia=materia, turma=turma))
+    if not dry_run:
+        Vinculo.objects.bulk_create(novos, batch_size=500, ignore_conflicts=True)
+    return len(novos)
+
+
+def carregar(cursos, turmas, materias=(), grade=None, dry_run=False):
+    """
+    Aplica a estrutura inteira numa transação: cursos ({nome: eixo}), turmas
+    (formato de interpretar_turma), matérias avulsas e a grade
+    ({chave_turma: [matérias]}). Turmas da grade que não existem nem em
+    `turmas` nem no banco são ignoradas. Retorna as contagens.
+    """
+    grade = grade or {}
+    with transaction.atomic():
+        mapa_cursos, cursos_criados, cursos_atualizados = aplicar_cursos(cursos, dry_run)
+        mapa_turmas, turmas_criadas, turmas_atualizadas = aplicar_turmas(turmas, mapa_cursos, dry_run)
+
+        todas = list(dict.fromkeys([*materias, *(nome for nomes in grade.values() for nome in nomes)]))
+        mapa_materias, materias_criadas = aplicar_materias(todas, dry_run)
+
+        ignoradas = [k for k in grade if chave_turma(*k) not in mapa_turmas]
+        grade = {chave_turma(*k): nomes for k, nomes in grade.items() if k not in ignoradas}
+        vinculos = aplicar_grade(grade, mapa_materias, mapa_turmas, dry_run)
+
+        if turmas_criadas and not dry_run:
+            # Turmas novas podem casar com vínculos de professor já cadastrados
+            AtribuicaoProfessor.reconstruir()
+
+    if not dry_run and materias_criadas:
+        invalidar_versao('Materia')
+    if not dry_run and (cursos_criados or cursos_atualizados or turmas_criadas or turmas_atualizadas):
+        # bulk_create/bulk_update não disparam os sinais
+        invalidar_versao('Curso')
+        invalidar_versao('Turma')
+        invalidar_contadores_admin()
+
+    return {
+        'cursos_criados': cursos_criados, 'cursos_atualizados': cursos_atualizados,
+        'turmas_criadas': turmas_criadas, 'turmas_atualizadas': turmas_atualizadas,
+        'materias_criadas': materias_criadas, 'vinculos_criados': vinculos,
+        'turmas_ignoradas': ignoradas,
+    }
+
+
+def resumo(resultado):
+    """Linhas legíveis com as contagens de carregar()."""
+    linhas = [
+        f"Cursos criados: {resultado['cursos_criados']}",
+        f"Cursos atualizados: {resultado['cursos_atualizados']}",
+        f"Turmas criadas: {resultado['turmas_criadas']}",
+        f"Turmas atualizadas: {resultado['turmas_atualizadas']}",
+        f"Matérias criadas: {resultado['materias_criadas']}",
+        f"Vínculos matéria/turma criados: {resultado['vinculos_criados']}",
+    ]
+    for curso, ano_modulo, turno, turma, modalidade in resultado['turmas_ignoradas']:
+        linhas.append(f"Turma não encontrada (ignorada): {ano_modulo} {curso} {turma or modalidade} ({turno})")
+    return linhas
@@ -0,0 +1,247 @@
+"""
+Pipeline de arquivos estáticos para produção.
+
+O `collectstatic` com StaticPrecomprimidoStorage:
+- grava cada arquivo com o hash do conteúdo no nome (ManifestStaticFilesStorage);
+- gera, ao lado de cada arquivo de texto, as versões .gz e .br (pacote
+  `brotli`);
+- gera uma variante .webp das imagens grandes (Pillow).
+
+brotli e Pillow estão no requirements.txt. Se algum faltar no ambiente, o
+collectstatic segue sem aquela variante, mas avisa no log.
+
+O StaticPrecomprimidoMiddleware entrega essas variantes conforme o navegador
+aceita, com cache imutável de um ano para os nomes com hash.
+"""
+import gzip
+import io
+import logging
+import mimetypes
+import os
+import re
+import stat as stat_module
+
+from django.conf import settings
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # sem brotli só geramos .gz (ver _avisar_dependencias_ausentes)
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:  # sem Pillow não há variantes .webp
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+EXTENSOES_COMPRIMIVEIS = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.ico', '.map')
+EXTENSOES_IMAGEM = ('.png', '.jpg', '.jpeg')
+WEBP_TAMANHO_MINIMO = getattr(settings, 'STATIC_WEBP_MIN_BYTES', 16 * 1024)
+COMPRESSAO_TAMANHO_MINIMO = 512
+
+HASH_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+CACHE_CURTO = 'public, max-age=300'
+
+
+def comprimir_gzip(conteudo):
+    buffer = io.BytesIO()
+    # mtime=0 deixa o .gz determinístico entre builds
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9, mtime=0) as arquivo:
+        arquivo.write(conteudo)
+    return buffer.getvalue()
+
+
+def comprimir_brotli(conteudo):
+    if brotli is None:
+        return None
+    return brotli.compress(conteudo, quality=11)
+
+
+def converter_webp(conteudo):
+    if Image is None:
+        return None
+    with Image.open(io.BytesIO(conteudo)) as imagem:
+        saida = io.BytesIO()
+        imagem.save(saida, format='WEBP', quality=82, method=6)
+    return saida.getvalue()
+
+
+class StaticPrecomprimidoStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage que também escreve as variantes
+    pré-comprimidas (.gz/.br) e .webp de cada arquivo com hash.
+    """
+
+    # O bootstrap/inputmask vendorizados apontam para .map que não estão no
+    # repositório: não reescrevemos sourceMappingURL (só url() e @import).
+    patterns = tuple(
+        (extensao, tuple(p for p in padroes if 'sourceMappingURL' not in str(p)))
+        for extensao, padroes in ManifestStaticFilesStorage.patterns
+    )
+
+    def post_process(self, paths, dry_run=False, **options):
+        processados = set()
+        for nome, nome_hash, processado in super().post_process(paths, dry_run, **options):
+            if nome_hash and not isinstance(processado, Exception):
+                processados.add(nome_hash)
+            yield nome, nome_hash, processado
+
+        if dry_run:
+            return
+
+        self._avisar_dependencias_ausentes()
+        for nome_hash in sorted(processados):
+            self._gerar_variantes(nome_hash)
+
+    def _avisar_dependencias_ausentes(self):
+        ausentes = [
+            f"{pacote} (sem {variante})"
+            for pacote, modulo, variante in (('brotli', brotli, '.br'), ('Pillow', Image, '.webp'))
+            if modulo is None
+        ]
+        if ausentes:
+            logger.warning(
+                "collectstatic sem %s: instale o requirements.txt para gerar todas as variantes.",
+                ', '.join(ausentes),
+            )
+        return ausentes
+
+    def _gerar_variantes(self, nome):
+        extensao = os.path.splitext(nome)[1].lower()
+
+        with self.open(nome) as arquivo:
+            conteudo = arquivo.read()
+
+        if extensao in EXTENSOES_COMPRIMIVEIS and len(conteudo) >= COMPRESSAO_TAMANHO_MINIMO:
+            self._salvar_se_menor(f"{nome}.gz", comprimir_gzip(conteudo), len(conteudo))
+            self._salvar_se_menor(f"{nome}.br", comprimir_brotli(conteudo), len(conteudo))
+
+        elif extensao in EXTENSOES_IMAGEM and len(conteudo) >= WEBP_TAMANHO_MINIMO:
+            self._salvar_se_menor(f"{nome}.webp", converter_webp(conteudo), len(conteudo))
+
+    def _salvar_se_menor(self, nome, conteudo, tamanho_original):
+        if conteudo is None or len(conteudo) >= tamanho_original:
+            return
+        if self.exists(nome):
+            self.delete(nome)
+        self._save(nome, ContentFile(conteudo))
+
+
+class StaticPrecomprimidoMiddleware:
+    """
+    Serve STATIC_ROOT direto do middleware (antes de sessão/autenticação),
+    escolhendo a melhor variante: .webp para imagens se o navegador aceitar,
+    senão .br ou .gz conforme o Accept-Encoding.
+
+    Só fica ativo com DEBUG desligado e STATIC_ROOT já coletado; com Nginx na
+    frente (gzip_static/brotli_static) este middleware nunca é alcançado.
+
+    Funciona nos dois modos: sob ASGI não força as views assíncronas a rodar
+    numa thread (um middleware só síncrono na pilha faria isso).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        raiz = getattr(settings, 'STATIC_ROOT', None)
+        if settings.DEBUG or not raiz or not os.path.isdir(raiz):
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.raiz = str(raiz)
+        self.prefixo = '/' + settings.STATIC_URL.strip('/') + '/'
+        self._stats = {}
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self._servir_se_estatico(request)
+        if response is not None:
+            return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # os.stat dos estáticos existentes fica em cache: depois do primeiro acesso, sem E/S de bloqueio aqui
+        response = self._servir_se_estatico(request)
+        if response is not None:
+            return response
+        return await self.get_response(request)
+
+    def _servir_se_estatico(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefixo):
+            return self.servir(request, request.path_info[len(self.prefixo):])
+        return None
+
+    def _stat(self, caminho):
+        # Os arquivos coletados não mudam com o processo no ar: guarda o os.stat.
+        # Só dos que existem (são os do collectstatic); uma falta não entra no
+        # cache, senão qualquer URL inventada sob STATIC_URL o faria crescer.
+        stat = self._stats.get(caminho)
+        if stat is None:
+            try:
+                stat = self._stats[caminho] = os.stat(caminho)
+            except OSError:
+                return None
+        return stat
+
+    def _escolher_variante(self, request, caminho):
+        if caminho.lower().endswith(EXTENSOES_IMAGEM):
+            if 'image/webp' in request.headers.get('Accept', ''):
+                stat = self._stat(caminho + '.webp')
+                if stat:
+                    return caminho + '.webp', stat, 'image/webp', None
+            return None
+
+        aceitas = request.headers.get('Accept-Encoding', '')
+        for sufixo, codificacao in (('.br', 'br'), ('.gz', 'gzip')):
+            if codificacao in aceitas:
+                stat = self._stat(caminho + sufixo)
+                if stat:
+                    return caminho + sufixo, stat, None, codificacao
+        return None
+
+    def servir(self, request, nome):
+        try:
+            caminho = safe_join(self.raiz, nome)
+        except SuspiciousFileOperation:
+            return None
+
+        stat = self._stat(caminho)
+        if stat is None or not stat_module.S_ISREG(stat.st_mode):
+            return None
+
+        content_type = mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+        codificacao = None
+        arquivo_servido = caminho
+
+        variante = self._escolher_variante(request, caminho)
+        if variante:
+            arquivo_servido, stat, tipo_variante, codificacao = variante
+            content_type = tipo_variante or content_type
+
+        if not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(open(arquivo_servido, 'rb'), content_type=content_type)
+            # O nome no disco pode ser o da variante (.gz/.br/.webp)
+            response.headers.pop('Content-Disposition', None)
+            if codificacao:
+                response['Content-Encoding'] = codificacao
+
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Vary'] = 'Accept' if nome.lower().endswith(EXTENSOES_IMAGEM) else 'Accept-Encoding'
+        response['Cache-Control'] = CACHE_IMUTAVEL if HASH_RE.search(nome) else CACHE_CURTO
+        return response
@@ -0,0 +1,34 @@
+"""
+Tarefas em segundo plano do SGDE (executadas por 'manage.py run_workers').
+Ver core/fila_tarefas.py.
+"""
+from django.core.files.storage import default_storage
+
+from core.fila_tarefas import tarefa
+
+# Senha dos usuários recém-cadastrados; trocada no primeiro acesso (senha_temporaria)
+SENHA_INICIAL = "Senha123#"
+
+
+@tarefa(prioridade=10)
+def definir_senha_inicial(usuario_id):
+    """
+    Grava o hash da senha inicial. O cadastro salva o usuário com senha
+    inutilizável e deixa o hash (lento de propósito) para cá.
+    """
+    from core.models import CustomUser
+
+    usuario = CustomUser.objects.filter(pk=usuario_id).first()
+    # Apagado nesse meio tempo, ou já com senha definida por outro caminho
+    if usuario is None or usuario.has_usable_password():
+        return
+    usuario.set_password(SENHA_INICIAL)
+    usuario.save(update_fields=['password'])
+
+
+@tarefa
+def apagar_arquivos(nomes):
+    """Remove arquivos do storage de mídia (PDFs e anexos substituídos ou excluídos)."""
+    for nome in nomes:
+        if default_storage.exists(nome):
+            default_storage.delete(nome)
@@ -0,0 +1,73 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from core.cache_versoes import MODELOS_VERSIONADOS, versoes_modelos
+
+register = template.Library()
+
+
+class FragmentoNode(template.Node):
+    def __init__(self, nodelist, nome, modelos):
+        self.nodelist = nodelist
+        self.nome = nome
+        self.modelos = modelos
+
+    def render(self, context):
+        request = context.get('request')
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return self.nodelist.render(context)
+
+        versoes = versoes_modelos(*self.modelos) if self.modelos else {}
+        chave = make_template_fragment_key(
+            f"fragmento:{self.nome}",
+            [user.tipo, user.pk] + [versoes[m] for m in self.modelos],
+        )
+
+        conteudo = cache.get(chave)
+        if conteudo is None:
+            conteudo = self.nodelist.render(context)
+            cache.set(chave, conteudo, getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 600))
+        return conteudo
+
+
+@register.tag
+def fragmento(parser, token):
+    """
+    Cacheia um trecho de template por papel (tipo), usuário e versão dos
+    modelos de que ele depende:
+
+        {% load fragmentos %}
+        {% fragmento 'fila_direcao' 'DocumentoEstagio' 'Estagio' %}
+            ...
+        {% endfragmento %}
+
+    Sem modelos, o trecho é considerado estático e só expira pelo TTL.
+    Inclua 'CustomUser' quando o trecho mostra nomes de usuários.
+    Num acerto o trecho não é renderizado, mas o que a view já consultou
+    (as views assíncronas listam os querysets antes do render) continua
+    sendo consultado.
+    Não use em trechos com {% csrf_token %} ou mensagens.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' precisa de um nome entre aspas.")
+
+    argumentos = []
+    for bit in bits[1:]:
+        if bit[0] not in ('"', "'") or bit[-1] != bit[0]:
+            raise template.TemplateSyntaxError(f"'{bits[0]}' só aceita textos entre aspas: {bit}")
+        argumentos.append(bit[1:-1])
+
+    nome, modelos = argumentos[0], tuple(argumentos[1:])
+    for modelo in modelos:
+        if modelo not in MODELOS_VERSIONADOS:
+            raise template.TemplateSyntaxError(
+                f"'{modelo}' não é versionado. Opções: {', '.join(MODELOS_VERSIONADOS)}"
+            )
+
+    nodelist = parser.parse(('endfragmento',))
+    parser.delete_first_token()
+    return FragmentoNode(nodelist, nome, modelos)
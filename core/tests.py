@@ -1,3 +1,712 @@
-from django.test import TestCase
+import asyncio
+import contextlib
+import datetime
+import io
+import itertools
+import math
+import os
+import socket
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core import arquivo, eventos, fila_tarefas, rematricula, staticfiles
+from core.fila_assinaturas import CANAL_DIRECAO, STATUS_FILA_DIRECAO, STATUS_FILA_PROFESSOR, canal_professor
+from core.models import (
+    AlunoTurma, AlunoTurmaArquivada, Curso, CustomUser, DocumentoEstagio, Estagio, EstatisticaNotaTurma, HistoricoPeriodo,
+    Materia, Nota, NotaArquivada, Notificacao, PeriodoArquivado, ProfessorMateriaAnoCursoModalidade, Tarefa, Turma,
+)
+from core.notificacoes import enviar_resumos
+from core.painel_admin import contadores_admin, invalidar_contadores_admin
+from core.permissoes import acesso
+from core.politicas_notas import politica_por_codigo
+from core.tarefas import SENHA_INICIAL
+
+
+def criar_turma(nome='Informática'):
+    curso = Curso.objects.create(nome=nome)
+    return Turma.objects.create(curso=curso, ano_modulo='1º ANO', turno='matutino', turma='M1')
+
+
+class GravarNotaConcorrenteTests(TransactionTestCase):
+    """NotaQuerySet.gravar(): escritores simultâneos na mesma chave aluno/matéria/turma."""
+
+    ESCRITORES = 6
+    GRAVACOES = 5
+
+    def setUp(self):
+        self.turma = criar_turma()
+        self.materia = Materia.objects.create(nome='Algoritmos')
+        self.aluno = CustomUser.objects.create(username='aluno', tipo='aluno')
+        AlunoTurma.objects.create(aluno=self.aluno, turma=self.turma)
+        self.componentes = Nota(turma=self.turma).politica().componentes
+
+    def test_uma_linha_e_estatistica_coerente(self):
+        erros = []
+        largada = threading.Barrier(self.ESCRITORES)
+
+        def escritor(indice):
+            try:
+                largada.wait()
+                for vez in range(self.GRAVACOES):
+                    valor = float((indice + vez) % 10)
+                    Nota.objects.gravar(
+                        self.aluno.pk, self.materia.pk, self.turma,
+                        {nome: valor for nome in self.componentes},
+                    )
+            except Exception as erro:
+                erros.append(erro)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=escritor, args=(i,)) for i in range(self.ESCRITORES)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(erros, [])
+        notas = Nota.objects.filter(aluno=self.aluno, materia=self.materia, turma=self.turma)
+        self.assertEqual(notas.count(), 1)
+
+        nota = notas.get()
+        estatistica = EstatisticaNotaTurma.objects.get(turma=self.turma, materia=self.materia)
+        self.assertEqual(estatistica.total_notas, 1)
+        self.assertEqual(estatistica.notas_com_media, 0 if nota.media_final is None else 1)
+        self.assertAlmostEqual(estatistica.soma_medias, nota.media_final or 0)
+        campo = EstatisticaNotaTurma._campo_status(nota.status_final)
+        self.assertEqual(getattr(estatistica, campo), 1)
+        self.assertEqual(estatistica.aprovados + estatistica.reprovados + estatistica.pendentes, 1)
+
+
+class RemoverNotasDuplicadasTests(TransactionTestCase):
+    """Migração 0014_nota_unica: fica a nota de maior id de cada aluno/matéria/turma."""
+
+    antes = [('core', '0013_atribuicaoprofessor')]
+    depois = [('core', '0014_nota_unica')]
+
+    def _migrar(self, alvo):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(alvo)
+        return executor.loader.project_state(alvo).apps
+
+    def tearDown(self):
+        self._migrar(MigrationExecutor(connection).loader.graph.leaf_nodes('core'))
+
+    def test_mantem_a_mais_recente_e_refaz_a_estatistica(self):
+        apps = self._migrar(self.antes)
+        Curso = apps.get_model('core', 'Curso')
+        Turma = apps.get_model('core', 'Turma')
+        Materia = apps.get_model('core', 'Materia')
+        Usuario = apps.get_model('core', 'CustomUser')
+        NotaAntiga = apps.get_model('core', 'Nota')
+        Estatistica = apps.get_model('core', 'EstatisticaNotaTurma')
+
+        curso = Curso.objects.create(nome='Informática')
+        turma = Turma.objects.create(curso=curso, ano_modulo='1º ANO', turno='matutino', turma='M1', modalidade='EPI')
+        materia = Materia.objects.create(nome='Algoritmos')
+        repetido = Usuario.objects.create(username='repetido', tipo='aluno', numero_matricula='1')
+        unico = Usuario.objects.create(username='unico', tipo='aluno', numero_matricula='2')
+
+        def nota(aluno, media, status):
+            return NotaAntiga.objects.create(aluno=aluno, materia=materia, turma=turma, media_final=media, status_final=status)
+
+        nota(repetido, 4.0, 'Reprovado')
+        nota(repetido, 5.0, 'Reprovado')
+        mais_recente = nota(repetido, 8.0, 'Aprovado')
+        sozinha = nota(unico, 3.0, 'Reprovado')
+        Estatistica.objects.create(
+            turma=turma, materia=materia, total_notas=4, notas_com_media=4, soma_medias=20, aprovados=1, reprovados=3,
+        )
+
+        apps = self._migrar(self.depois)
+        NotaNova = apps.get_model('core', 'Nota')
+        self.assertEqual(set(NotaNova.objects.values_list('id', flat=True)), {mais_recente.pk, sozinha.pk})
+
+        estatistica = apps.get_model('core', 'EstatisticaNotaTurma').objects.get(turma_id=turma.pk, materia_id=materia.pk)
+        self.assertEqual(
+            (estatistica.total_notas, estatistica.soma_medias, estatistica.aprovados, estatistica.reprovados),
+            (2, 11.0, 1, 1),
+        )
+
+
+def media_e_status_antigos(nota_1, nota_2, nota_3, nota_recuperacao):
+    """A conta do Nota.calcular_media/calcular_status de antes das políticas."""
+    notas_validas = [n for n in (nota_1, nota_2, nota_3) if n is not None]
+    if not notas_validas:
+        return None, "Pendente"
+    media = sum(notas_validas) / len(notas_validas)
+    if media >= 5:
+        return media, "Aprovado"
+    if nota_recuperacao is not None:
+        return media, "Aprovado" if (media + nota_recuperacao) / 2 >= 5 else "Reprovado na Final"
+    return media, "Reprovado"
+
+
+class PoliticasNotasTests(SimpleTestCase):
+    """core.politicas_notas: o avaliador escalar e o em lote dão o mesmo resultado."""
+
+    # Valores de cada componente, combinados entre si: cobrem ausentes, aprovação
+    # direta, recuperação/final que aprova e que reprova
+    VALORES = {
+        'PADRAO': [None, 0, 4, 5, 9],
+        'EPI': [None, 0, 30, 60],
+        'PROEJA': [None, 0, 30, 60],
+    }
+
+    def _casos(self, politica):
+        for valores in itertools.product(self.VALORES[politica.codigo], repeat=len(politica.componentes)):
+            yield dict(zip(politica.componentes, valores))
+
+    def test_escalar_e_lote_concordam(self):
+        for codigo in self.VALORES:
+            politica = politica_por_codigo(codigo)
+            casos = list(self._casos(politica))
+            colunas = {
+                nome: [math.nan if caso[nome] is None else caso[nome] for caso in casos]
+                for nome in politica.componentes
+            }
+            medias, situacoes = politica.avaliar_lote(colunas)
+
+            self.assertEqual(set(situacoes), set(politica.status_possiveis), codigo)
+            for caso, media, status in zip(casos, medias, situacoes):
+                with self.subTest(politica=codigo, **caso):
+                    self.assertEqual(politica.avaliar(caso), (None if math.isnan(media) else media, status))
+
+    def test_padrao_repete_a_conta_antiga(self):
+        politica = politica_por_codigo('PADRAO')
+        for caso in self._casos(politica):
+            with self.subTest(**caso):
+                self.assertEqual(politica.avaliar(caso), media_e_status_antigos(**caso))
+
+
+class SenhaInicialTests(TestCase):
+    """Cadastro com o hash da senha inicial deixado para a fila (core.tarefas)."""
+
+    def _cadastrar(self):
+        usuario = CustomUser(username='novo', tipo='aluno')
+        usuario.set_unusable_password()
+        usuario._senha_inicial_pendente = True
+        usuario.save()
+        return usuario
+
+    @override_settings(TAREFAS_IMEDIATAS=True)
+    def test_sem_worker_a_senha_e_definida_apos_o_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            usuario = self._cadastrar()
+        usuario.refresh_from_db()
+        self.assertTrue(usuario.check_password(SENHA_INICIAL))
+
+    @override_settings(TAREFAS_IMEDIATAS=False)
+    def test_com_worker_fica_na_fila(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            usuario = self._cadastrar()
+        usuario.refresh_from_db()
+        self.assertFalse(usuario.has_usable_password())
+        self.assertTrue(Tarefa.objects.filter(funcao='core.tarefas.definir_senha_inicial', status='PENDENTE').exists())
+
+
+class BackendQueFalha(BaseEmailBackend):
+    """Servidor SMTP fora do ar."""
+
+    def send_messages(self, email_messages):
+        raise ConnectionError("SMTP indisponível")
+
+
+def criar_estagio(aluno, orientador):
+    return Estagio.objects.create(
+        aluno=aluno, orientador=orientador, supervisor_nome='Supervisor', supervisor_empresa='Empresa',
+        supervisor_cargo='Cargo', data_inicio=datetime.date(2026, 2, 1), data_fim=datetime.date(2026, 6, 30),
+    )
+
+
+@override_settings(TAREFAS_IMEDIATAS=False)
+class NotificacoesTests(TestCase):
+    """Outbox e resumo por destinatário de core.notificacoes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.orientador = CustomUser.objects.create(
+            username='orientador', tipo='professor', first_name='Ana', email='ana@escola.test',
+        )
+        cls.diretores = [
+            CustomUser.objects.create(username=f'direcao{i}', tipo='direcao', email=f'direcao{i}@escola.test')
+            for i in range(2)
+        ]
+        aluno = CustomUser.objects.create(username='aluno', tipo='aluno', first_name='Bruno')
+        estagio = criar_estagio(aluno, cls.orientador)
+        cls.termo = DocumentoEstagio.objects.create(estagio=estagio, tipo_documento='TERMO_COMPROMISSO')
+        cls.ficha = DocumentoEstagio.objects.create(estagio=estagio, tipo_documento='FICHA_PESSOAL')
+
+    def _mudar_status(self, documento, status):
+        documento.status = status
+        documento.save()
+
+    def _enviar_agora(self):
+        """Roda a tarefa enviar_resumos agendada como o run_workers faria, sem esperar o intervalo."""
+        tarefa = Tarefa.objects.get(funcao='core.notificacoes.enviar_resumos', status='PENDENTE')
+        Tarefa.objects.filter(pk=tarefa.pk).update(executar_apos=timezone.now())
+        self.assertEqual(fila_tarefas.reservar('teste'), [tarefa.pk])
+        fila_tarefas.executar(tarefa.pk, 'teste')
+        return Tarefa.objects.get(pk=tarefa.pk)
+
+    def test_outbox_gravada_na_transacao_da_mudanca(self):
+        self._mudar_status(self.termo, STATUS_FILA_PROFESSOR)
+        self.assertEqual(list(Notificacao.objects.values_list('destinatario_id', flat=True)), [self.orientador.pk])
+        self.assertEqual(Tarefa.objects.filter(funcao='core.notificacoes.enviar_resumos').count(), 1)
+
+    def test_outbox_desfeita_com_a_mudanca(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self._mudar_status(self.termo, STATUS_FILA_PROFESSOR)
+            raise RuntimeError("falha depois do save")
+        self.assertFalse(Notificacao.objects.exists())
+        self.assertFalse(Tarefa.objects.exists())
+        self.assertEqual(DocumentoEstagio.objects.get(pk=self.termo.pk).status, 'RASCUNHO')
+
+    def test_um_resumo_por_destinatario(self):
+        self._mudar_status(self.termo, STATUS_FILA_PROFESSOR)
+        self._mudar_status(self.ficha, STATUS_FILA_PROFESSOR)
+
+        self.assertEqual(self._enviar_agora().status, 'CONCLUIDA')
+        self.assertEqual(len(mail.outbox), 1)
+        resumo = mail.outbox[0]
+        self.assertEqual(resumo.to, ['ana@escola.test'])
+        self.assertIn('2 documentos', resumo.subject)
+        self.assertIn('Termo de Compromisso', resumo.body)
+        self.assertIn('Ficha Pessoal', resumo.body)
+        self.assertFalse(Notificacao.objects.filter(enviada_em=None).exists())
+
+    def test_direcao_recebe_um_resumo_cada(self):
+        self._mudar_status(self.termo, STATUS_FILA_DIRECAO)
+        self._mudar_status(self.ficha, STATUS_FILA_DIRECAO)
+        self._enviar_agora()
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['direcao0@escola.test', 'direcao1@escola.test'])
+        self.assertTrue(all('2 documentos' in m.subject for m in mail.outbox))
+
+    def test_documento_que_saiu_da_fila_nao_entra_no_resumo(self):
+        self._mudar_status(self.termo, STATUS_FILA_PROFESSOR)
+        self._mudar_status(self.ficha, STATUS_FILA_PROFESSOR)
+        self._mudar_status(self.ficha, STATUS_FILA_DIRECAO)
+        self._enviar_agora()
+        para_orientador = [m for m in mail.outbox if m.to == ['ana@escola.test']]
+        self.assertEqual(len(para_orientador), 1)
+        self.assertNotIn('Ficha Pessoal', para_orientador[0].body)
+
+    @override_settings(EMAIL_BACKEND='core.tests.BackendQueFalha', TAREFAS_ESPERA_BASE=30)
+    def test_falha_no_envio_volta_para_a_fila_com_espera(self):
+        self._mudar_status(self.termo, STATUS_FILA_PROFESSOR)
+        antes = timezone.now()
+
+        with self.assertLogs('core.fila_tarefas', 'WARNING'):
+            tarefa = self._enviar_agora()
+        self.assertEqual(tarefa.status, 'PENDENTE')
+        self.assertEqual(tarefa.tentativas, 1)
+        self.assertIn('SMTP indisponível', tarefa.ultimo_erro)
+        self.assertGreaterEqual(tarefa.executar_apos, antes + datetime.timedelta(seconds=30))
+        # A notificação volta para a outbox, sem lote, para a próxima tentativa
+        self.assertEqual(list(Notificacao.objects.values_list('lote', 'enviada_em')), [('', None)])
+
+        with self.settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            self.assertEqual(self._enviar_agora().status, 'CONCLUIDA')
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_backend_de_arquivo(self):
+        self._mudar_status(self.termo, STATUS_FILA_PROFESSOR)
+        with tempfile.TemporaryDirectory() as pasta:
+            with self.settings(EMAIL_BACKEND='django.core.mail.backends.filebased.EmailBackend', EMAIL_FILE_PATH=pasta):
+                self._enviar_agora()
+            arquivos = os.listdir(pasta)
+            self.assertEqual(len(arquivos), 1)
+            with open(os.path.join(pasta, arquivos[0]), encoding='utf-8') as arquivo:
+                conteudo = arquivo.read()
+        self.assertIn('To: ana@escola.test', conteudo)
+        self.assertIn('aguardando sua assinatura', conteudo)
+
+    def test_backend_de_console(self):
+        self._mudar_status(self.termo, STATUS_FILA_PROFESSOR)
+        saida = io.StringIO()
+        with contextlib.redirect_stdout(saida):
+            with self.settings(EMAIL_BACKEND='django.core.mail.backends.console.EmailBackend'):
+                self._enviar_agora()
+        self.assertIn('To: ana@escola.test', saida.getvalue())
+        self.assertEqual(enviar_resumos(), 0)
+
+
+class StaticPrecomprimidoStorageTests(TestCase):
+    """collectstatic com core.staticfiles.StaticPrecomprimidoStorage."""
+
+    def _coletar(self, raiz):
+        armazenamento = {'BACKEND': 'core.staticfiles.StaticPrecomprimidoStorage'}
+        with self.settings(STATIC_ROOT=raiz, STORAGES={**settings.STORAGES, 'staticfiles': armazenamento}):
+            call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_avisa_quando_brotli_e_pillow_faltam(self):
+        with tempfile.TemporaryDirectory() as raiz, \
+                mock.patch.object(staticfiles, 'brotli', None), mock.patch.object(staticfiles, 'Image', None):
+            with self.assertLogs('core.staticfiles', 'WARNING') as log:
+                self._coletar(raiz)
+            gerados = [nome for _, _, nomes in os.walk(raiz) for nome in nomes]
+
+        self.assertIn('brotli (sem .br)', log.output[0])
+        self.assertIn('Pillow (sem .webp)', log.output[0])
+        self.assertTrue(any(nome.endswith('.css.gz') for nome in gerados))
+        self.assertFalse(any(nome.endswith(('.br', '.webp')) for nome in gerados))
+
+    def test_middleware_nao_guarda_arquivos_que_faltam(self):
+        with tempfile.TemporaryDirectory() as raiz, self.settings(DEBUG=False, STATIC_ROOT=raiz):
+            with open(os.path.join(raiz, 'app.css'), 'w') as arquivo:
+                arquivo.write('body {}')
+            middleware = staticfiles.StaticPrecomprimidoMiddleware(lambda request: 'view')
+            url = settings.STATIC_URL.rstrip('/') + '/'
+
+            self.assertEqual(middleware(RequestFactory().get(url + 'nao-existe.css')), 'view')
+            resposta = middleware(RequestFactory().get(url + 'app.css'))
+            resposta.close()
+            self.assertEqual(resposta.status_code, 200)
+            self.assertEqual(list(middleware._stats), [os.path.join(raiz, 'app.css')])
+
+            # Um arquivo que aparece depois é servido: a falta não ficou no cache
+            with open(os.path.join(raiz, 'nao-existe.css'), 'w') as arquivo:
+                arquivo.write('p {}')
+            resposta = middleware(RequestFactory().get(url + 'nao-existe.css'))
+            resposta.close()
+            self.assertEqual(resposta.status_code, 200)
+
+
+class RestaurarPeriodoTests(TestCase):
+    """core.arquivo.restaurar_periodo com notas lançadas de novo depois do arquivamento."""
+
+    PERIODO = '2024.2'
+
+    def setUp(self):
+        self.turma = criar_turma()
+        self.materias = [Materia.objects.create(nome=nome) for nome in ('Algoritmos', 'Redes')]
+        self.aluno = CustomUser.objects.create(username='aluno', tipo='aluno')
+        AlunoTurma.objects.create(aluno=self.aluno, turma=self.turma)
+        AlunoTurma.objects.update(ano_letivo=self.PERIODO)
+        for materia in self.materias:
+            Nota.objects.create(aluno=self.aluno, materia=materia, turma=self.turma, ano_letivo=self.PERIODO)
+        arquivo.arquivar_periodo(self.PERIODO)
+        # Relançada depois do arquivamento: mesma chave aluno/matéria/turma
+        self.relancada = Nota.objects.create(
+            aluno=self.aluno, materia=self.materias[0], turma=self.turma, ano_letivo=self.PERIODO, nota_1=9,
+        )
+
+    def test_conflito_e_detectado_e_nada_muda(self):
+        notas_em_conflito, matriculas_em_conflito = arquivo.conflitos_restauracao(self.PERIODO)
+        self.assertEqual(len(notas_em_conflito), 1)
+        self.assertEqual(matriculas_em_conflito, [])
+
+        with self.assertRaisesMessage(ValueError, '1 nota(s)'):
+            arquivo.restaurar_periodo(self.PERIODO)
+        self.assertEqual(NotaArquivada.objects.count(), 2)
+        self.assertEqual(list(Nota.objects.values_list('pk', flat=True)), [self.relancada.pk])
+        self.assertTrue(PeriodoArquivado.objects.filter(ano_letivo=self.PERIODO).exists())
+
+    def test_pular_conflitos_restaura_o_resto(self):
+        notas, matriculas = arquivo.restaurar_periodo(self.PERIODO, pular_conflitos=True)
+        self.assertEqual((notas, matriculas), (1, 1))
+
+        vivas = dict(Nota.objects.values_list('materia_id', 'pk'))
+        self.assertEqual(vivas[self.materias[0].pk], self.relancada.pk)
+        self.assertIn(self.materias[1].pk, vivas)
+        self.assertEqual(list(NotaArquivada.objects.values_list('materia_id', flat=True)), [self.materias[0].pk])
+        self.assertFalse(AlunoTurmaArquivada.objects.exists())
+
+        periodo = PeriodoArquivado.objects.get(ano_letivo=self.PERIODO)
+        self.assertEqual((periodo.notas, periodo.matriculas), (1, 0))
+        self.assertEqual(
+            sum(EstatisticaNotaTurma.objects.filter(turma=self.turma).values_list('total_notas', flat=True)), 2,
+        )
+
+    def test_nota_corrigida_depois_de_restaurar_atualiza_o_historico(self):
+        self.relancada.delete()
+        arquivo.restaurar_periodo(self.PERIODO)
+        self.assertFalse(HistoricoPeriodo.objects.filter(ano_letivo=self.PERIODO).exists())
+
+        corrigida = Nota.objects.get(materia=self.materias[1])
+        corrigida.nota_1 = corrigida.nota_2 = corrigida.nota_3 = 8
+        corrigida.save()
+        arquivo.arquivar_periodo(self.PERIODO)
+
+        retrato = HistoricoPeriodo.objects.get(aluno=self.aluno, ano_letivo=self.PERIODO)
+        arquivadas = {
+            nota.materia.nome: (nota.media_final, nota.status_final)
+            for nota in NotaArquivada.objects.filter(ano_letivo=self.PERIODO).select_related('materia')
+        }
+        self.assertEqual({d['materia']: (d['media'], d['status']) for d in retrato.disciplinas}, arquivadas)
+        self.assertEqual(arquivadas['Redes'], (corrigida.media_final, corrigida.status_final))
+
+
+class RematriculaTests(TestCase):
+    """core.rematricula.aplicar e o comando rematricular."""
+
+    def setUp(self):
+        primeiro = criar_turma()
+        self.turmas = [primeiro] + [
+            Turma.objects.create(curso=primeiro.curso, ano_modulo=ano, turno='matutino', turma='M1')
+            for ano in ('2º ANO', '3º ANO')
+        ]
+        self.calouros = self._matricular('calouro', 3, self.turmas[0])
+        self.veteranos = self._matricular('veterano', 2, self.turmas[1])
+        self.antigas = set(AlunoTurma.objects.values_list('id', flat=True))
+
+    def _matricular(self, prefixo, quantidade, turma):
+        alunos = [CustomUser.objects.create(username=f'{prefixo}{i}', tipo='aluno') for i in range(quantidade)]
+        for aluno in alunos:
+            AlunoTurma.objects.create(aluno=aluno, turma=turma)
+        return alunos
+
+    def _alunos(self, turma):
+        return set(AlunoTurma.objects.filter(turma=turma).values_list('aluno_id', flat=True))
+
+    def test_turmas_encadeadas_andam_um_ano(self):
+        primeiro, segundo, terceiro = self.turmas
+        movidos, criadas = rematricula.aplicar({primeiro: segundo, segundo: terceiro}, ano_letivo='2026.1')
+        self.assertEqual((movidos, criadas), (5, 0))
+
+        # Os calouros que chegaram ao 2º ANO não seguem para o 3º na mesma rodada
+        self.assertEqual(self._alunos(primeiro), set())
+        self.assertEqual(self._alunos(segundo), {aluno.pk for aluno in self.calouros})
+        self.assertEqual(self._alunos(terceiro), {aluno.pk for aluno in self.veteranos})
+
+        arquivadas = AlunoTurmaArquivada.objects.filter(motivo='REMATRICULA')
+        self.assertEqual(set(arquivadas.values_list('id_original', flat=True)), self.antigas)
+        novas = AlunoTurma.objects.all()
+        self.assertTrue(self.antigas.isdisjoint(novas.values_list('id', flat=True)))
+        self.assertEqual(set(novas.values_list('ano_letivo', flat=True)), {'2026.1'})
+
+    def test_aluno_ja_no_destino_nao_e_duplicado(self):
+        primeiro, segundo, _ = self.turmas
+        adiantado = self.calouros[0]
+        AlunoTurma.objects.create(aluno=adiantado, turma=segundo)
+
+        linha, = rematricula.planejar({primeiro: segundo})
+        self.assertEqual((linha['alunos'], linha['ja_matriculados']), (3, 1))
+
+        movidos, _ = rematricula.aplicar({primeiro: segundo})
+        self.assertEqual(movidos, 3)
+        self.assertEqual(AlunoTurma.objects.filter(aluno=adiantado, turma=segundo).count(), 1)
+        self.assertEqual(self._alunos(segundo), {a.pk for a in self.calouros + self.veteranos})
+
+    def test_dry_run_conta_o_mesmo_que_aplicar(self):
+        AlunoTurma.objects.create(aluno=self.calouros[0], turma=self.turmas[1])
+        antes = set(AlunoTurma.objects.values_list('id', flat=True))
+        saida = io.StringIO()
+        call_command('rematricular', '--dry-run', stdout=saida)
+        previstos = int(saida.getvalue().split('Dry-run: ')[1].split(' ')[0])
+        self.assertEqual(set(AlunoTurma.objects.values_list('id', flat=True)), antes)
+
+        call_command('rematricular', stdout=saida)
+        self.assertIn(f'✅ {previstos} aluno(s) rematriculados', saida.getvalue())
+        self.assertEqual(AlunoTurmaArquivada.objects.filter(motivo='REMATRICULA').count(), previstos)
+
+
+class ContadoresAdminTests(TestCase):
+    """core.painel_admin: alunos por curso/eixo e invalidação do cache."""
+
+    def setUp(self):
+        self.informatica = criar_turma('Informática')
+        self.administracao = criar_turma('Administração')
+        self.aluno = CustomUser.objects.create(username='aluno', tipo='aluno')
+        for turma in (self.informatica, self.administracao):
+            AlunoTurma.objects.create(aluno=self.aluno, turma=turma)
+
+    def test_aluno_em_dois_cursos_do_mesmo_eixo_conta_uma_vez(self):
+        contadores = contadores_admin()
+        self.assertEqual([linha['total'] for linha in contadores['alunos_por_curso']], [1, 1])
+        self.assertEqual(contadores['alunos_por_eixo']['Eixo de Gestão'], 1)
+
+    def test_alunoturma_e_lida_uma_vez(self):
+        invalidar_contadores_admin()
+        with CaptureQueriesContext(connection) as consultas:
+            contadores_admin()
+        tabela = AlunoTurma._meta.db_table
+        self.assertEqual(len([c for c in consultas if tabela in c['sql']]), 1)
+
+    def test_curso_renomeado_ou_apagado_invalida_o_cache(self):
+        contadores_admin()
+        curso = self.informatica.curso
+        curso.nome = 'Informática para Internet'
+        curso.save()
+        self.assertIn('Informática para Internet', [l['curso'] for l in contadores_admin()['alunos_por_curso']])
+
+        curso.delete()
+        self.assertEqual([l['curso'] for l in contadores_admin()['alunos_por_curso']], ['Administração'])
+
+
+class PermissoesTests(TestCase):
+    """core.permissoes: o que servidor e professor enxergam."""
+
+    def setUp(self):
+        self.gestao = criar_turma('Administração')
+        self.saude = criar_turma('Enfermagem')
+        self.saude.curso.eixo = 'SAUDE'
+        self.saude.curso.save()
+        self.aluno_gestao = CustomUser.objects.create(username='aluno_gestao', tipo='aluno')
+        self.aluno_saude = CustomUser.objects.create(username='aluno_saude', tipo='aluno')
+        AlunoTurma.objects.create(aluno=self.aluno_gestao, turma=self.gestao)
+        AlunoTurma.objects.create(aluno=self.aluno_saude, turma=self.saude)
+
+    def _acesso(self, user):
+        # Um usuário recém-lido, como o request.user da próxima requisição
+        return acesso(CustomUser.objects.get(pk=user.pk))
+
+    def test_servidor_so_ve_o_proprio_eixo(self):
+        servidor = CustomUser.objects.create(username='servidor', tipo='servidor', eixo='GESTAO')
+        regras = self._acesso(servidor)
+
+        self.assertEqual(list(regras.filtrar_turmas(Turma.objects.all())), [self.gestao])
+        self.assertEqual(list(regras.filtrar_alunos(CustomUser.objects.filter(tipo='aluno'))), [self.aluno_gestao])
+        self.assertTrue(regras.pode_ver_turma(self.gestao))
+        self.assertFalse(regras.pode_ver_turma(self.saude))
+        self.assertTrue(regras.pode_ver_aluno(self.aluno_gestao))
+        self.assertFalse(regras.pode_ver_aluno(self.aluno_saude))
+
+    def test_professor_perde_o_acesso_quando_o_vinculo_sai(self):
+        professor = CustomUser.objects.create(username='prof', tipo='professor')
+        materia = Materia.objects.create(nome='Contabilidade')
+        vinculo = ProfessorMateriaAnoCursoModalidade.objects.create(
+            professor=professor, materia=materia, curso=self.gestao.curso,
+            ano_modulo=self.gestao.ano_modulo, modalidade=self.gestao.modalidade,
+        )
+        regras = self._acesso(professor)
+        self.assertTrue(regras.leciona(materia, self.gestao))
+        self.assertTrue(regras.pode_ver_aluno(self.aluno_gestao))
+        self.assertFalse(regras.pode_ver_aluno(self.aluno_saude))
+
+        vinculo.delete()
+        regras = self._acesso(professor)
+        self.assertFalse(regras.leciona(materia, self.gestao))
+        self.assertFalse(regras.pode_ver_aluno(self.aluno_gestao))
+
+
+class FragmentoTests(TestCase):
+    """{% fragmento %}: a chave muda com o carimbo dos modelos informados."""
+
+    TEMPLATE = Template(
+        "{% load fragmentos %}{% fragmento 'fila' 'DocumentoEstagio' 'CustomUser' %}{{ aluno.get_full_name }}{% endfragmento %}"
+    )
+
+    def _renderizar(self, usuario, aluno):
+        request = RequestFactory().get('/')
+        request.user = usuario
+        return self.TEMPLATE.render(Context({'request': request, 'aluno': CustomUser.objects.get(pk=aluno.pk)}))
+
+    def test_nome_alterado_renderiza_de_novo(self):
+        professor = CustomUser.objects.create(username='prof', tipo='professor')
+        aluno = CustomUser.objects.create(username='aluno', tipo='aluno', first_name='Bruno')
+        self.assertEqual(self._renderizar(professor, aluno), 'Bruno')
+
+        aluno.first_name = 'Bruna'
+        aluno.save()
+        self.assertEqual(self._renderizar(professor, aluno), 'Bruna')
+
+    def test_login_nao_invalida(self):
+        professor = CustomUser.objects.create(username='prof', tipo='professor')
+        aluno = CustomUser.objects.create(username='aluno', tipo='aluno', first_name='Bruno')
+        self._renderizar(professor, aluno)
+
+        CustomUser.objects.filter(pk=aluno.pk).update(first_name='Bruna')  # sem sinal
+        professor.save(update_fields=['last_login'])
+        self.assertEqual(self._renderizar(professor, aluno), 'Bruno')
+
+
+@override_settings(TAREFAS_IMEDIATAS=False)
+class EventosFilaAssinaturasTests(TestCase):
+    """Deltas 'saiu'/'entrou' publicados em core.eventos quando um documento muda de fila."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.orientador = CustomUser.objects.create(username='orientador', tipo='professor')
+        aluno = CustomUser.objects.create(username='aluno', tipo='aluno', first_name='Bruno', last_name='Lima')
+        cls.documento = DocumentoEstagio.objects.create(
+            estagio=criar_estagio(aluno, cls.orientador), tipo_documento='TERMO_COMPROMISSO',
+        )
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        barramento = eventos.BarramentoMemoria()
+        patcher = mock.patch.object(eventos, '_barramento', barramento)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _assinar(self, canal):
+        async def assinar():
+            return eventos.assinar(canal)
+        assinatura = self.loop.run_until_complete(assinar())
+        self.addCleanup(assinatura.cancelar)
+        return assinatura
+
+    def _recebidos(self, assinatura):
+        async def drenar():
+            recebidos = []
+            while True:
+                try:
+                    recebidos.append((await assinatura.proximo(timeout=0.1))['dados'])
+                except asyncio.TimeoutError:
+                    return recebidos
+        return self.loop.run_until_complete(drenar())
+
+    def _mudar_status(self, status):
+        documento = DocumentoEstagio.objects.get(pk=self.documento.pk)
+        documento.status = status
+        with self.captureOnCommitCallbacks(execute=True):
+            documento.save()
+
+    def test_entra_na_fila_do_orientador(self):
+        orientador = self._assinar(canal_professor(self.orientador.pk))
+        direcao = self._assinar(CANAL_DIRECAO)
+
+        self._mudar_status(STATUS_FILA_PROFESSOR)
+
+        [delta] = self._recebidos(orientador)
+        self.assertEqual(delta['acao'], 'entrou')
+        self.assertEqual(delta['documento']['id'], self.documento.pk)
+        self.assertEqual(delta['documento']['aluno'], 'Bruno Lima')
+        self.assertEqual(self._recebidos(direcao), [])
+
+    def test_passa_do_orientador_para_a_direcao(self):
+        self._mudar_status(STATUS_FILA_PROFESSOR)
+        orientador = self._assinar(canal_professor(self.orientador.pk))
+        direcao = self._assinar(CANAL_DIRECAO)
+
+        self._mudar_status(STATUS_FILA_DIRECAO)
+
+        self.assertEqual(self._recebidos(orientador), [{'acao': 'saiu', 'documento': {'id': self.documento.pk}}])
+        [delta] = self._recebidos(direcao)
+        self.assertEqual((delta['acao'], delta['documento']['id']), ('entrou', self.documento.pk))
+
+    def test_sem_mudanca_de_fila_nao_publica(self):
+        self._mudar_status(STATUS_FILA_PROFESSOR)
+        orientador = self._assinar(canal_professor(self.orientador.pk))
+        DocumentoEstagio.objects.get(pk=self.documento.pk).save()
+        self.assertEqual(self._recebidos(orientador), [])
+
+
+class BarramentoBrokerTests(TestCase):
+    def test_broker_fora_do_ar_nao_segura_quem_publica(self):
+        # Porta sem ninguém escutando: a thread de recepção nunca conecta
+        with socket.socket() as reservado:
+            reservado.bind(('127.0.0.1', 0))
+            endereco = reservado.getsockname()
+        barramento = eventos.BarramentoBroker(endereco)
+
+        inicio = time.perf_counter()
+        with self.assertLogs('core.eventos', 'WARNING'):
+            barramento.publicar(CANAL_DIRECAO, {'acao': 'saiu'})
+        self.assertLess(time.perf_counter() - inicio, 0.1)
@@ -24,9 +24,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-s-z#6_)j42n4&6ex_s14iz)es4a1d&z@nf4bvha=@tjjp^_byi'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('SGDE_DEBUG', '1') == '1'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [h for h in os.environ.get('SGDE_ALLOWED_HOSTS', '').split(',') if h]
 
 
 # Application definition
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.staticfiles.StaticPrecomprimidoMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -61,19 +62,31 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Cada template é lido e compilado uma vez por processo.
+            # (No runserver o autoreload limpa esse cache quando um .html muda.)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'sgde.wsgi.application'
 
+# Compila todos os templates de templates/ quando o worker sobe (wsgi/asgi),
+# em vez de deixar o custo para a primeira requisição de cada página.
+# Medição: python manage.py precompilar_templates
+TEMPLATES_PRECOMPILAR = not DEBUG
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -81,10 +94,107 @@ WSGI_APPLICATION = 'sgde.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('SGDE_DB_NAME', BASE_DIR / 'db.sqlite3'),
+        # Banco de teste em arquivo: o em memória compartilhado entre threads
+        # trava tabelas em vez de esperar, e core.tests usa escritores concorrentes.
+        'TEST': {'NAME': os.environ.get('SGDE_TEST_DB_NAME', BASE_DIR / 'test_db.sqlite3')},
+    }
+}
+
+
+# Cache
+# Com vários workers use um backend compartilhado (o file-based já serve com
+# SQLite); o LocMem fica para o desenvolvimento.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache' if DEBUG
+        else 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': 'sgde' if DEBUG else os.path.join(BASE_DIR, '.cache'),
     }
 }
 
+# TTL (segundos) dos fragmentos de template do {% fragmento %}
+FRAGMENT_CACHE_TIMEOUT = 600
+
+# TTL (segundos) dos conjuntos de ids acessíveis por usuário (core.permissoes)
+PERMISSOES_CACHE_TIMEOUT = 600
+
+# Diretório de orientadores (core.orientadores): TTL do cache e, acima de
+# quantos professores, o Termo de Compromisso troca o select pela busca
+ORIENTADORES_CACHE_TIMEOUT = 3600
+ORIENTADORES_LIMITE_SELECT = 200
+
+# TTL (segundos) dos contadores do painel do admin (core.painel_admin)
+ADMIN_CONTADORES_TTL = 60
+
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core': {
+            'handlers': ['console'],
+            'level': os.environ.get('SGDE_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+
+# Pub/sub dos dashboards ao vivo (core.eventos): 'memoria' para um único
+# processo; 'broker' para vários workers, com 'python manage.py broker_eventos'.
+EVENTOS_BACKEND = os.environ.get('SGDE_EVENTOS_BACKEND', 'memoria')
+EVENTOS_BROKER_ENDERECO = ('127.0.0.1', 8766)
+
+# Intervalo (s) dos comentários de keep-alive das conexões SSE
+SSE_KEEPALIVE = 15
+
+# Média mínima para aprovação da política PADRAO (turmas sem modalidade).
+# Depois de mudar: python manage.py recalcular_notas
+NOTA_MINIMA_APROVACAO = 5
+
+# Sobrescreve/acrescenta políticas de avaliação por modalidade; o formato está
+# em core/politicas_notas.py (POLITICAS). Depois de mudar: recalcular_notas.
+NOTA_POLITICAS = {}
+
+# Fila de tarefas em segundo plano (core.fila_tarefas), processada por
+# 'python manage.py run_workers'. Com TAREFAS_IMEDIATAS as tarefas rodam no
+# próprio processo logo após o commit: é o padrão com DEBUG, para o runserver
+# funcionar sem worker. Em produção (SGDE_TAREFAS_IMEDIATAS=0) o run_workers
+# precisa estar rodando, senão, entre outras coisas, os usuários recém-
+# cadastrados ficam sem senha inicial e não conseguem entrar.
+TAREFAS_IMEDIATAS = os.environ.get('SGDE_TAREFAS_IMEDIATAS', '1' if DEBUG else '0') == '1'
+TAREFAS_WORKERS = 2
+# Espera (s) antes da 2ª tentativa; dobra a cada nova falha
+TAREFAS_ESPERA_BASE = 30
+# Tarefa EXECUTANDO há mais que isso (s) é considerada abandonada e volta à fila
+TAREFAS_TEMPO_LIMITE = 600
+TAREFAS_GUARDAR_CONCLUIDAS_DIAS = 7
+
+
+# E-mail. No desenvolvimento as mensagens vão para o console; para gravar em
+# arquivos use SGDE_EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend.
+EMAIL_BACKEND = os.environ.get(
+    'SGDE_EMAIL_BACKEND',
+    'django.core.mail.backends.console.EmailBackend' if DEBUG else 'django.core.mail.backends.smtp.EmailBackend',
+)
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'emails')
+EMAIL_HOST = os.environ.get('SGDE_EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('SGDE_EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.environ.get('SGDE_EMAIL_USUARIO', '')
+EMAIL_HOST_PASSWORD = os.environ.get('SGDE_EMAIL_SENHA', '')
+EMAIL_USE_TLS = os.environ.get('SGDE_EMAIL_TLS', '0') == '1'
+DEFAULT_FROM_EMAIL = os.environ.get('SGDE_EMAIL_REMETENTE', 'SGDE <nao-responda@localhost>')
+
+# Endereço público do sistema, para os links dos e-mails
+SGDE_URL_BASE = os.environ.get('SGDE_URL_BASE', 'http://localhost:8000')
+
+# Notificações das filas de assinatura (core.notificacoes): tudo o que chegar
+# nesse intervalo (s) vira um único e-mail de resumo por destinatário
+NOTIFICACOES_INTERVALO = 900
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -123,6 +233,14 @@ USE_TZ = True
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Quem envia os bytes dos arquivos protegidos depois da checagem de permissão:
+# 'python' -> o próprio Django (FileResponse com Range e GET condicional)
+# 'nginx'  -> cabeçalho X-Accel-Redirect, com a location interna:
+#               location /protected-media/ { internal; alias /caminho/para/media/; }
+# 'apache' -> cabeçalho X-Sendfile (mod_xsendfile com XSendFilePath apontando para MEDIA_ROOT)
+MEDIA_SERVE_BACKEND = os.environ.get('SGDE_MEDIA_BACKEND', 'python')
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
@@ -133,6 +251,24 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Em produção (SGDE_DEBUG=0) o collectstatic grava nomes com hash, versões
+# .gz/.br e variantes .webp das imagens grandes (brotli e Pillow, do requirements.txt).
+# Relatório de bytes por página: python manage.py relatorio_static
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'core.staticfiles.StaticPrecomprimidoStorage'
+        ),
+    },
+}
+STATIC_WEBP_MIN_BYTES = 16 * 1024
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
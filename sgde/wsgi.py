@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sgde.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings
+
+if settings.TEMPLATES_PRECOMPILAR:
+    from core.aquecimento_templates import precompilar_templates
+    precompilar_templates()
@@ -0,0 +1,40 @@
+// Busca de orientador para listas grandes: o select do Termo de Compromisso
+// começa só com o escolhido e é preenchido com as páginas de
+// api_orientadores (?q=&pagina=) conforme o aluno digita.
+document.addEventListener("DOMContentLoaded", () => {
+  const busca = document.querySelector("[data-busca-orientador]");
+  const select = document.getElementById("campoOrientador");
+  if (!busca || !select) return;
+
+  let pedido = 0;
+  let espera = null;
+
+  async function carregar(termo) {
+    const atual = ++pedido;
+    const url = new URL(busca.dataset.buscaOrientador, window.location.origin);
+    url.searchParams.set("q", termo);
+    const resposta = await fetch(url, { headers: { Accept: "application/json" } });
+    if (!resposta.ok || atual !== pedido) return;
+    const dados = await resposta.json();
+
+    const escolhido = select.value;
+    Array.from(select.options).forEach((opcao) => {
+      if (opcao.dataset.aviso || (opcao.value && opcao.value !== escolhido)) opcao.remove();
+    });
+    dados.resultados.forEach((professor) => {
+      if (String(professor.id) === escolhido) return;
+      select.add(new Option(professor.texto, professor.id));
+    });
+    if (dados.tem_mais) {
+      const aviso = new Option(`... mais ${dados.total - dados.resultados.length}: refine a busca`, "");
+      aviso.disabled = true;
+      aviso.dataset.aviso = "1";
+      select.add(aviso);
+    }
+  }
+
+  busca.addEventListener("input", () => {
+    clearTimeout(espera);
+    espera = setTimeout(() => carregar(busca.value.trim()), 250);
+  });
+});
@@ -0,0 +1,42 @@
+// Fila de assinaturas (orientador/direção) ao vivo: recebe os deltas de
+// fila_assinaturas_eventos (server-sent events) e insere/remove os itens da
+// lista sem recarregar a página. O EventSource reconecta sozinho.
+document.addEventListener("DOMContentLoaded", () => {
+  const fila = document.getElementById("filaAssinaturas");
+  if (!fila || !window.EventSource) return;
+
+  const lista = fila.querySelector("[data-fila-lista]");
+  const modeloItem = document.getElementById("filaItem");
+  const vazia = document.getElementById("filaVazia");
+  const urlDocumento = fila.dataset.urlDocumento;
+
+  function atualizarVisibilidade() {
+    const temItens = lista.querySelector("[data-documento]") !== null;
+    fila.classList.toggle("d-none", !temItens);
+    if (vazia) vazia.classList.toggle("d-none", temItens);
+  }
+
+  function entrou(documento) {
+    if (lista.querySelector(`[data-documento="${documento.id}"]`)) return;
+    const item = modeloItem.content.firstElementChild.cloneNode(true);
+    item.dataset.documento = documento.id;
+    item.href = urlDocumento.replace("/0/", `/${documento.id}/`);
+    item.querySelectorAll("[data-campo]").forEach((campo) => {
+      campo.textContent = documento[campo.dataset.campo] || "";
+    });
+    lista.prepend(item);
+  }
+
+  function saiu(documento) {
+    const item = lista.querySelector(`[data-documento="${documento.id}"]`);
+    if (item) item.remove();
+  }
+
+  const eventos = new EventSource(fila.dataset.urlEventos);
+  eventos.addEventListener("fila", (evento) => {
+    const delta = JSON.parse(evento.data);
+    if (delta.acao === "entrou") entrou(delta.documento);
+    else if (delta.acao === "saiu") saiu(delta.documento);
+    atualizarVisibilidade();
+  });
+});
@@ -40,6 +40,11 @@ document.addEventListener('DOMContentLoaded', () => {
           const badgeArea = document.getElementById(`statusBadge${alunoId}`);
           badgeArea.innerHTML = `<span class="badge ${data.badge_class} px-3 py-2">${data.status}</span>`;
 
+          // Avisa quem mostra a lista (planilha_notas.js) para atualizar a linha do aluno
+          document.dispatchEvent(new CustomEvent("nota:salva", {
+            detail: { alunoId: formData.get("aluno_id"), dados: Object.fromEntries(formData), resposta: data },
+          }));
+
           const modal = bootstrap.Modal.getInstance(modalEl);
           if (modal) modal.hide();
         })
@@ -107,42 +112,30 @@ function checkNotas(alunoId) {
     paralela2Row?.classList.add("d-none");
   }
 
-  // ⚙️ Calcular total e status final apenas se todos os campos relevantes forem preenchidos
-  if ([n1s1, n2s1, n1s2, n2s2].every(v => v !== null)) {
-    const somaS1 = n1s1 + n2s1;
-    const somaS2 = n1s2 + n2s2;
-
-    const media1 = paralela1 !== null ? Math.max(somaS1, paralela1) : somaS1;
-    const media2 = paralela2 !== null ? Math.max(somaS2, paralela2) : somaS2;
-    const total = media1 + media2;
-
-    let status = "", badge = "";
-
-    if (total >= 120) {
-      status = "Aprovado";
-      badge = "bg-success text-white";
-    } else {
-      finalSection?.classList.remove("d-none");
-
-      if (recuperacao !== null) {
-        const finalTotal = Math.max(media1, 60) + Math.max(media2, 60) + recuperacao;
-
-        if (finalTotal >= 180) {
-          status = "Aprovado";
-          badge = "bg-success text-white";
-        } else {
-          status = "Reprovado na Final";
-          badge = "bg-danger text-white";
-        }
-      } else {
-        status = "Requer Final";
-        badge = "bg-warning text-dark";
-      }
-    }
+  // ⚙️ Situação calculada pelo avaliador gerado da política da modalidade
+  // (core/politicas_notas.py) — a mesma fórmula que o servidor usa ao salvar
+  const politica = (window.SGDE_POLITICAS_NOTAS || {})[document.body.dataset.politica];
+  if (!politica) return;
+
+  const valores = {};
+  politica.componentes.forEach(nome => { valores[nome] = getInputVal(nome); });
+  const { status } = politica.avaliar(valores);
+  if (status === "Pendente") return;
 
-    // Atualiza o badge
-    statusBadge.innerHTML = `<span class="badge ${badge} px-3 py-2">${status}</span>`;
+  if (status !== "Aprovado" || recuperacao !== null) {
+    finalSection?.classList.remove("d-none");
   }
+
+  const badges = {
+    "Aprovado": "bg-success text-white",
+    "Reprovado na Final": "bg-danger text-white",
+    "Reprovado": "bg-danger-subtle text-dark",
+    "Requer Final": "bg-warning text-dark",
+  };
+  const badge = badges[status] || "bg-secondary text-white";
+
+  // Atualiza o badge
+  statusBadge.innerHTML = `<span class="badge ${badge} px-3 py-2">${status}</span>`;
 }
 
 // Disponibiliza funções para onclick
@@ -0,0 +1,126 @@
+// Planilha de notas do professor: carrega os alunos de api_planilha_notas em
+// páginas (cursor) conforme a lista rola e usa um único editor (#modalNotaEditor)
+// para todos. O navegador revalida cada página com If-None-Match (ETag).
+document.addEventListener("DOMContentLoaded", () => {
+  const planilha = document.getElementById("planilhaNotas");
+  if (!planilha) return;
+
+  const modeloLinha = document.getElementById("planilhaLinha");
+  const sentinela = document.getElementById("planilhaSentinela");
+  const editorEl = document.getElementById("modalNotaEditor");
+  const form = document.getElementById("notaFormEditor");
+  const urlDetalhes = planilha.dataset.urlDetalhes;
+
+  const badges = {
+    "Aprovado": "bg-success text-white",
+    "Reprovado na Final": "bg-danger text-white",
+    "Reprovado": "bg-danger-subtle text-dark",
+    "Requer Final": "bg-warning text-dark",
+  };
+
+  const alunos = new Map(); // id -> {nome, email, status, valores: {componente: valor}}
+  let componentes = [];
+  let cursor = "";
+  let carregando = false;
+  let fim = false;
+
+  function badge(status) {
+    const classe = badges[status] || "bg-secondary text-white";
+    const span = document.createElement("span");
+    span.className = `badge ${classe} px-3 py-2`;
+    span.textContent = status;
+    return span;
+  }
+
+  function desenharLinha(id) {
+    const aluno = alunos.get(id);
+    let linha = planilha.querySelector(`[data-aluno="${id}"]`);
+    if (!linha) {
+      linha = modeloLinha.content.firstElementChild.cloneNode(true);
+      linha.dataset.aluno = id;
+      linha.querySelector('[data-campo="detalhes"]').href = urlDetalhes.replace("/0/", `/${id}/`);
+      linha.querySelector('[data-campo="editar"]').addEventListener("click", () => abrirEditor(id));
+      planilha.appendChild(linha);
+    }
+    linha.querySelector('[data-campo="nome"]').textContent = aluno.nome;
+    linha.querySelector('[data-campo="email"]').textContent = aluno.email;
+    linha.querySelector('[data-campo="status"]').replaceChildren(badge(aluno.status));
+  }
+
+  function receberPagina(pagina) {
+    const colunas = pagina.colunas;
+    componentes = pagina.componentes;
+    colunas.id.forEach((id, i) => {
+      const valores = {};
+      componentes.forEach(nome => { valores[nome] = colunas[nome][i]; });
+      alunos.set(String(id), {
+        nome: colunas.nome[i],
+        email: colunas.email[i],
+        status: colunas.status_final[i],
+        valores,
+      });
+      desenharLinha(String(id));
+    });
+    cursor = pagina.proximo_cursor ?? "";
+    fim = pagina.proximo_cursor === null;
+  }
+
+  async function carregarPagina() {
+    if (carregando || fim) return;
+    carregando = true;
+    try {
+      const url = new URL(planilha.dataset.url, window.location.origin);
+      if (cursor !== "") url.searchParams.set("cursor", cursor);
+      const resposta = await fetch(url, { headers: { "Accept": "application/json" }, credentials: "same-origin" });
+      if (!resposta.ok) throw new Error(`HTTP ${resposta.status}`);
+      receberPagina(await resposta.json());
+    } catch (erro) {
+      console.error("Erro ao carregar a planilha de notas:", erro);
+      document.getElementById("planilhaErro").classList.remove("d-none");
+      fim = true;
+    } finally {
+      carregando = false;
+    }
+
+    if (fim) {
+      sentinela.classList.add("d-none");
+      if (!alunos.size && document.getElementById("planilhaErro").classList.contains("d-none")) {
+        document.getElementById("planilhaVazia").classList.remove("d-none");
+      }
+    } else if (sentinela.getBoundingClientRect().top < window.innerHeight) {
+      // A página coube na tela: continua carregando até encher ou acabar
+      carregarPagina();
+    }
+  }
+
+  function abrirEditor(id) {
+    const aluno = alunos.get(id);
+    form.querySelector('[name="aluno_id"]').value = id;
+    form.querySelectorAll('input[type="number"]').forEach(input => {
+      const valor = aluno.valores[input.name];
+      input.value = valor === null || valor === undefined ? "" : valor;
+      input.classList.remove("is-invalid");
+    });
+    document.getElementById("modalLabelEditor").textContent = `Inserir Notas de ${aluno.nome}`;
+    document.getElementById("statusBadgeEditor").replaceChildren(badge(aluno.status));
+    bootstrap.Modal.getOrCreateInstance(editorEl).show();
+  }
+
+  document.addEventListener("nota:salva", (evento) => {
+    const { alunoId, dados, resposta } = evento.detail;
+    const aluno = alunos.get(String(alunoId));
+    if (!aluno) return;
+    componentes.forEach(nome => {
+      if (nome in dados) aluno.valores[nome] = dados[nome] === "" ? null : parseFloat(dados[nome]);
+    });
+    aluno.status = resposta.status;
+    desenharLinha(String(alunoId));
+  });
+
+  if ("IntersectionObserver" in window) {
+    new IntersectionObserver((entradas) => {
+      if (entradas.some(entrada => entrada.isIntersecting)) carregarPagina();
+    }, { rootMargin: "400px" }).observe(sentinela);
+  }
+  carregarPagina();
+});